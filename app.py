@@ -1,10 +1,43 @@
-from dash import html, dcc, no_update
+from dash import html, dcc, no_update, Patch
 import feffery_antd_components as fac
 from dash.dependencies import Input, Output, State
+from flask import Response, g, jsonify, redirect, request
 from pathlib import Path
-import json
+import hashlib
+import logging
+import math
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from urllib.parse import parse_qs, urlencode
+from config import AppConfig
 from server import app
+from image_pipeline import (
+    DERIVED_URL_PREFIX,
+    GALLERY_DIR,
+    GALLERY_URL_PREFIX,
+    ORIGINAL_RENDITION,
+    content_hash,
+    image_url,
+    send_derivative,
+    send_gallery_image,
+)
+from image_index import ImageEntry, ImageIndex, ImageSnapshot
+from mapping_config import MappingConfig, MappingSnapshot, normalize_text
+from near_duplicates import NearDuplicate, cluster_near_duplicates
+from markdown_cache import MarkdownCache, render_markdown
+from metrics import Metrics, SlowRequestProfiler
+from page_cache import PageCache, serialize_payload
+from search_index import SearchIndex
+from shared_styles import SHARED_STYLES_URL_PREFIX, SharedStyles
+from compression import ResponseCompressor
+from visual_classifier import VisualPredictions
+
+logger = logging.getLogger(__name__)
 
 
 def _sort_key(image_path: Path) -> int:
@@ -15,152 +48,20 @@ def _sort_key(image_path: Path) -> int:
     return int(match.group()) if match else 10 ** 9
 
 
-def _load_images() -> list[str]:
-    photo_dir = Path("./assets/imgs/")
-    if not photo_dir.exists():
-        return []
-
-    return [
-        p.as_posix()
-        for p in sorted(
-            [p for p in photo_dir.rglob("*.*") if p.is_file()],
-            key=_sort_key
-        )
-    ]
-
-
-IMGS = _load_images()
+IMAGE_DIR = GALLERY_DIR
 
 MAPPING_CONFIG_PATH = Path("./public/image_mapping.json")
 
+# 分类映射配置；替换快照后的联动（重新分类、清理缓存）在创建图片索引后挂接
+MAPPING_CONFIG = MappingConfig(MAPPING_CONFIG_PATH)
+MAPPING_CONFIG.refresh()
 
-def _normalize_text(value: str) -> str:
-    return re.sub(r"[_\-\s]+", "", value).lower()
-
-
-DEFAULT_CHART_CATEGORIES = [
-    {
-        "key": "line",
-        "title_zh": "折线图",
-        "title_en": "Line Chart",
-        "icon": "antd-line-chart",
-        "description_zh": "适合展示趋势变化，支持多序列对比和时间维度分析。",
-        "description_en": "Good for trends over time and multi-series comparison.",
-        "keywords": ["line", "trend", "timeseries", "折线", "曲线", "趋势"],
-    },
-    {
-        "key": "scatter",
-        "title_zh": "散点图",
-        "title_en": "Scatter Plot",
-        "icon": "antd-dot-chart",
-        "description_zh": "适合观察变量相关性、离群点与聚类分布。",
-        "description_en": "Great for correlation, outliers, and cluster distribution.",
-        "keywords": ["scatter", "dot", "point", "散点", "点图"],
-    },
-    {
-        "key": "heatmap",
-        "title_zh": "热力图",
-        "title_en": "Heatmap",
-        "icon": "antd-area-chart",
-        "description_zh": "适合展示二维矩阵强度、空间热点和密度变化。",
-        "description_en": "Useful for matrix intensity, hotspots, and density shifts.",
-        "keywords": ["heatmap", "heat", "matrix", "热点", "热力", "矩阵"],
-    },
-    {
-        "key": "bubble",
-        "title_zh": "气泡图",
-        "title_en": "Bubble Chart",
-        "icon": "antd-bulb",
-        "description_zh": "适合展示三维信息：横轴、纵轴与气泡大小。",
-        "description_en": "Shows three dimensions: x, y, and bubble size.",
-        "keywords": ["bubble", "气泡", "气泡图"],
-    },
-    {
-        "key": "bar",
-        "title_zh": "柱形图",
-        "title_en": "Bar Chart",
-        "icon": "antd-bar-chart",
-        "description_zh": "适合展示类别间数值比较，例如分组对比和排序。",
-        "description_en": "Best for category comparison, grouping, and ranking.",
-        "keywords": ["bar", "column", "hist", "柱", "条形", "柱形", "柱状"],
-    },
-    {
-        "key": "tree",
-        "title_zh": "进化树",
-        "title_en": "Phylogenetic Tree",
-        "icon": "antd-apartment",
-        "description_zh": "适合展示系统发育关系、层级结构和分支演化。",
-        "description_en": "Ideal for phylogeny, hierarchy, and branch evolution.",
-        "keywords": ["tree", "phylo", "clade", "dendro", "进化树", "系统发育", "树图"],
-    },
-    {
-        "key": "other",
-        "title_zh": "其他图表",
-        "title_en": "Other Charts",
-        "icon": "antd-app-store",
-        "description_zh": "未命中关键词的图片会自动归入此分类。",
-        "description_en": "Images unmatched by keywords are grouped here.",
-        "keywords": [],
-    },
-]
-
-
-def _load_mapping_config() -> tuple[list[dict], dict[str, str], str]:
-    categories = DEFAULT_CHART_CATEGORIES
-    overrides: dict[str, str] = {}
-    default_category = "other"
-
-    if not MAPPING_CONFIG_PATH.exists() or not MAPPING_CONFIG_PATH.is_file():
-        return categories, overrides, default_category
-
-    try:
-        config_data = json.loads(MAPPING_CONFIG_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return categories, overrides, default_category
-
-    config_categories = config_data.get("categories")
-    if isinstance(config_categories, list) and config_categories:
-        validated_categories = [
-            item
-            for item in config_categories
-            if isinstance(item, dict) and isinstance(item.get("key"), str)
-        ]
-        if validated_categories:
-            categories = validated_categories
-
-    category_keys = {item["key"] for item in categories if isinstance(item.get("key"), str)}
-    if "other" not in category_keys:
-        categories = categories + [
-            {
-                "key": "other",
-                "title_zh": "其他图表",
-                "title_en": "Other Charts",
-                "icon": "antd-app-store",
-                "description_zh": "未命中关键词的图片会自动归入此分类。",
-                "description_en": "Images unmatched by keywords are grouped here.",
-                "keywords": [],
-            }
-        ]
-        category_keys.add("other")
-
-    config_default_category = config_data.get("default_category")
-    if isinstance(config_default_category, str) and config_default_category in category_keys:
-        default_category = config_default_category
-
-    image_category_map = config_data.get("image_category_map")
-    if isinstance(image_category_map, dict):
-        for raw_name, category_key in image_category_map.items():
-            if not isinstance(raw_name, str) or not isinstance(category_key, str):
-                continue
-            if category_key not in category_keys:
-                continue
-            overrides[_normalize_text(raw_name)] = category_key
-
-    return categories, overrides, default_category
-
-
-CHART_CATEGORIES, IMAGE_CATEGORY_OVERRIDES, DEFAULT_CATEGORY_KEY = _load_mapping_config()
-CATEGORY_MAP = {item["key"]: item for item in CHART_CATEGORIES}
+# 离线视觉分类（visual_classifier.py）的预测结果，文件名关键词无法识别时作为回退分类
+VISUAL_PREDICTIONS = VisualPredictions(
+    Path(AppConfig.visual_predictions_path),
+    min_confidence=AppConfig.visual_min_confidence,
+)
+VISUAL_PREDICTIONS.refresh()
 
 I18N = {
     "zh": {
@@ -179,6 +80,8 @@ I18N = {
         "not_found_image": "未找到对应图片，请返回分类页重新选择。",
         "detail": "详情",
         "back_to_category": "← 返回该分类",
+        "prev_figure": "← 上一张",
+        "next_figure": "下一张 →",
         "r_markdown": "R 脚本（Markdown）",
         "menu_home": "主页",
         "bw_mode": "黑白模式",
@@ -186,6 +89,15 @@ I18N = {
         "lang_zh": "中文",
         "lang_en": "English",
         "empty_images": "当前分类没有匹配图片，请检查文件名关键词或补充图片。",
+        "load_more": "加载更多",
+        "prev_page": "上一页",
+        "next_page": "下一页",
+        "page_info": "第 {page} / {total} 页",
+        "search": "搜索",
+        "search_placeholder": "搜索图表…",
+        "search_count": "“{query}” 共找到 {count} 个结果。",
+        "search_empty": "没有找到匹配的图片，请尝试其他关键词。",
+        "search_hint": "请输入关键词进行搜索。",
     },
     "en": {
         "home": "Home",
@@ -203,6 +115,8 @@ I18N = {
         "not_found_image": "Target image was not found. Please go back and select again.",
         "detail": "Detail",
         "back_to_category": "<- Back to category",
+        "prev_figure": "<- Previous",
+        "next_figure": "Next ->",
         "r_markdown": "R Script (Markdown)",
         "menu_home": "Home",
         "bw_mode": "B/W Mode",
@@ -210,6 +124,15 @@ I18N = {
         "lang_zh": "中文",
         "lang_en": "English",
         "empty_images": "No images matched in this category. Please add files or adjust naming keywords.",
+        "load_more": "Load more",
+        "prev_page": "Previous",
+        "next_page": "Next",
+        "page_info": "Page {page} of {total}",
+        "search": "Search",
+        "search_placeholder": "Search charts…",
+        "search_count": "{count} results for “{query}”.",
+        "search_empty": "No matching figures. Try other keywords.",
+        "search_hint": "Enter a keyword to search.",
     },
 }
 
@@ -221,7 +144,7 @@ def tr(lang: str, key: str, **kwargs) -> str:
 
 
 def get_category_title(category_key: str, lang: str) -> str:
-    category = CATEGORY_MAP.get(category_key)
+    category = MAPPING_CONFIG.snapshot.category_map.get(category_key)
     if not category:
         return tr(lang, "category_page")
     if lang == "en":
@@ -230,7 +153,7 @@ def get_category_title(category_key: str, lang: str) -> str:
 
 
 def get_category_desc(category_key: str, lang: str) -> str:
-    category = CATEGORY_MAP.get(category_key)
+    category = MAPPING_CONFIG.snapshot.category_map.get(category_key)
     if not category:
         return ""
     if lang == "en":
@@ -254,7 +177,7 @@ def get_menu_items(lang: str) -> list[dict]:
                     "icon": category.get("icon", "antd-app-store"),
                 },
             }
-            for category in CHART_CATEGORIES
+            for category in MAPPING_CONFIG.snapshot.categories
         ],
     ]
 
@@ -289,54 +212,551 @@ def get_theme_tokens(is_dark: bool) -> dict:
 DEFAULT_THEME = get_theme_tokens(False)
 
 
+def _theme_css_var_name(token_key: str) -> str:
+    return f"--idvti-{token_key.replace('_', '-')}"
+
+
+def get_theme_css_vars(is_dark: bool) -> dict:
+    """
+    主题 token -> CSS 变量，挂在 app-root 上，切换主题时只需替换这一组变量。
+    """
+    return {_theme_css_var_name(key): value for key, value in get_theme_tokens(is_dark).items()}
+
+
+# 页面渲染统一使用 CSS 变量引用，渲染结果与当前主题无关
+THEME_VARS = {key: f"var({_theme_css_var_name(key)})" for key in DEFAULT_THEME}
+
+
 def _normalize_name(image_path: str) -> str:
-    stem = Path(image_path).stem
-    return _normalize_text(stem)
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return normalize_text(stem)
+
+
+def _visual_category(image_path: str, mapping: MappingSnapshot) -> str | None:
+    if not VISUAL_PREDICTIONS:
+        return None
+    try:
+        category_key = VISUAL_PREDICTIONS.category_for(content_hash(image_path))
+    except OSError:
+        return None
+    return category_key if category_key in mapping.category_map else None
 
 
 def _detect_category(image_path: str) -> str:
-    normalized_name = _normalize_name(image_path)
-    override_category = IMAGE_CATEGORY_OVERRIDES.get(normalized_name)
-    if override_category:
-        return override_category
+    """
+    单图覆盖 > 文件名关键词 > 视觉预测 > 默认分类。
+    """
+    mapping = MAPPING_CONFIG.snapshot
+    return (
+        mapping.match(_normalize_name(image_path))
+        or _visual_category(image_path, mapping)
+        or mapping.default_category
+    )
 
-    for category in CHART_CATEGORIES:
-        if category["key"] == "other":
-            continue
 
-        for keyword in category.get("keywords", []):
-            normalized_keyword = _normalize_text(keyword)
-            if normalized_keyword and normalized_keyword in normalized_name:
-                return category["key"]
+def _classifier_version() -> str:
+    # 图片索引清单中分类结果对应的规则：映射配置指纹，加上视觉预测指纹（有预测时）
+    mapping_fingerprint = MAPPING_CONFIG.snapshot.fingerprint
+    if not VISUAL_PREDICTIONS.fingerprint:
+        return mapping_fingerprint
+    return f"{mapping_fingerprint}+{VISUAL_PREDICTIONS.fingerprint}"
 
-    return DEFAULT_CATEGORY_KEY
 
+def _bucket_key(category_key: str, mapping: MappingSnapshot) -> str:
+    # 索引中的分类已不在当前配置里时归入默认分类
+    return category_key if category_key in mapping.category_map else mapping.default_category
 
-def _group_images_by_category(images: list[str]) -> dict[str, list[str]]:
-    grouped = {category["key"]: [] for category in CHART_CATEGORIES}
+
+def _group_images_by_category(images: list[str], detect=_detect_category) -> dict[str, list[str]]:
+    mapping = MAPPING_CONFIG.snapshot
+    grouped = {category["key"]: [] for category in mapping.categories}
     for image in images:
-        category_key = _detect_category(image)
-        if category_key not in grouped:
-            category_key = DEFAULT_CATEGORY_KEY if DEFAULT_CATEGORY_KEY in grouped else "other"
-        grouped[category_key].append(image)
+        grouped[_bucket_key(detect(image), mapping)].append(image)
 
     return grouped
 
 
-IMAGES_BY_CATEGORY = _group_images_by_category(IMGS)
+@dataclass(frozen=True)
+class GalleryState:
+    """
+    由一份索引快照派生的全部图片结构。热重载时整体构建新对象，再以一次引用赋值替换 GALLERY；
+    请求处理时只取一次 GALLERY 的本地引用并传给各辅助函数，同一请求不会混用新旧两份表。
+    构建完成后各字段不再修改。
+    """
+
+    version: int = 0
+    images: list[str] = field(default_factory=list)
+    by_category: dict[str, list[str]] = field(default_factory=dict)
+    # 图片路径 -> (分类 key, 分类内下标)
+    positions: dict[str, tuple[str, int]] = field(default_factory=dict)
+    # 图片路径 -> 索引条目（尺寸、主色、低清占位图）
+    entries: dict[str, ImageEntry] = field(default_factory=dict)
+    # 图片路径 -> 详情页 slug；slug（含哈希前缀别名）-> 图片路径
+    slugs: dict[str, str] = field(default_factory=dict)
+    slug_index: dict[str, str] = field(default_factory=dict)
+    # 近似重复图片 -> 代表图片；走马灯与分类网格中折叠重复图片后的展示列表；代表图片 -> 网格中被折叠的数量
+    near_duplicates: dict[str, NearDuplicate] = field(default_factory=dict)
+    carousel_images: list[str] = field(default_factory=list)
+    grid_by_category: dict[str, list[str]] = field(default_factory=dict)
+    similar_counts: dict[str, int] = field(default_factory=dict)
+    # 聚类输入（感知哈希与距离阈值），未变化时复用上次的聚类结果
+    near_duplicate_key: tuple | None = None
+
+
+def _regroup_changed_buckets(
+    images: list[str], categories: dict[str, str], previous: GalleryState
+) -> tuple[dict[str, list[str]], dict[str, tuple[str, int]]]:
+    """
+    图片集与分类列表均未变化时（映射配置重载后的重新分类），只重建成员发生变化的分类，
+    其余分类沿用 previous 中的列表，返回 (分类分组, 图片位置)。
+    """
+    mapping = MAPPING_CONFIG.snapshot
+    affected = set()
+    for image, category_key in categories.items():
+        previous_key = previous.entries[image].category
+        if previous_key != category_key:
+            affected.add(_bucket_key(previous_key, mapping))
+            affected.add(_bucket_key(category_key, mapping))
+    if not affected:
+        return previous.by_category, previous.positions
+
+    grouped = dict(previous.by_category)
+    for category_key in affected:
+        grouped[category_key] = []
+    for image in images:
+        category_key = _bucket_key(categories[image], mapping)
+        if category_key in affected:
+            grouped[category_key].append(image)
+
+    positions = dict(previous.positions)
+    for category_key in affected:
+        for index, image in enumerate(grouped[category_key]):
+            positions[image] = (category_key, index)
+    return grouped, positions
+
+
+# 无编号图片的 sort_key（见 _sort_key）
+_UNNUMBERED_SORT_KEY = 10 ** 9
+
+# 内容哈希短前缀的长度，用作全部图片的别名；文件名摘要取同样长度
+_HASH_SLUG_LENGTH = 10
+
+
+def _name_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=_HASH_SLUG_LENGTH // 2).hexdigest()
+
+
+def _slug_candidates(entry: ImageEntry) -> list[str]:
+    """
+    按优先级排列的 slug：推文编号（无编号时取文件名中的 ASCII 字母部分），
+    被先收录的图片占用时依次加上文件名、完整路径的摘要。只依赖路径，重新渲染图片不会改变 slug。
+    """
+    if entry.sort_key != _UNNUMBERED_SORT_KEY:
+        base = str(entry.sort_key)
+    else:
+        base = re.sub(r"[^a-z]+", "-", Path(entry.path).stem.lower()).strip("-")
+    name_slug = _name_digest(Path(entry.path).name)
+    path_slug = _name_digest(entry.path)
+    if not base:
+        return [name_slug, path_slug]
+    return [base, f"{base}-{name_slug}", f"{base}-{path_slug}"]
+
+
+def _build_slug_index(entries: tuple[ImageEntry, ...]) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    详情页路由 slug：优先使用文件名中的推文编号（"在模仿中精进数据可视化_03.xxx" -> "3"），
+    无编号时使用文件名（"profile_photo.jpg" -> "profile-photo"）；与图片所在分类及分类内位置无关。
+    按收录先后分配：编号相同时先收录的图片保留 "<编号>"，后收录的为 "<编号>-<文件名摘要>"，
+    新增同编号图片不会改变已有图片的地址。
+    返回 ({图片路径: slug}, {slug 或别名: 图片路径})；别名包括内容哈希前缀与未被占用的其余候选 slug。
+    """
+    slugs = {}
+    taken = set()
+    for entry in sorted(entries, key=lambda item: (item.first_seen, item.sort_key, item.path)):
+        candidates = _slug_candidates(entry)
+        slug = next((candidate for candidate in candidates if candidate not in taken), candidates[-1])
+        slugs[entry.path] = slug
+        taken.add(slug)
+
+    index = {slug: path for path, slug in slugs.items()}
+    for entry in entries:
+        # 先收录的同编号图片被删除后，其余图片的旧地址仍能解析并重定向到规范地址
+        for alias in [*_slug_candidates(entry), entry.hash[:_HASH_SLUG_LENGTH]]:
+            index.setdefault(alias, entry.path)
+    return slugs, index
+
+
+def _build_gallery_state(snapshot: ImageSnapshot, previous: GalleryState) -> GalleryState:
+    """
+    由索引快照构建新的图片结构，分类直接取自索引，不再逐张重新匹配关键词。
+    """
+    categories = {entry.path: entry.category for entry in snapshot.entries}
+    images = snapshot.images
+    bucket_keys = [category["key"] for category in MAPPING_CONFIG.snapshot.categories]
+    if images == previous.images and list(previous.by_category) == bucket_keys:
+        grouped, positions = _regroup_changed_buckets(images, categories, previous)
+    else:
+        grouped = _group_images_by_category(images, detect=categories.__getitem__)
+        positions = {
+            image: (category_key, index)
+            for category_key, category_images in grouped.items()
+            for index, image in enumerate(category_images)
+        }
+    slugs, slug_index = _build_slug_index(snapshot.entries)
+
+    hashes = tuple((entry.path, entry.phash) for entry in snapshot.entries)
+    near_duplicate_key = (hashes, AppConfig.near_duplicate_distance)
+    if previous.near_duplicate_key == near_duplicate_key:
+        near_duplicates = previous.near_duplicates
+    else:
+        near_duplicates = cluster_near_duplicates(hashes, AppConfig.near_duplicate_distance)
+    carousel_images, grid_by_category, similar_counts = _collapse_near_duplicates(
+        images, grouped, positions, near_duplicates
+    )
+
+    return GalleryState(
+        version=snapshot.version,
+        images=images,
+        by_category=grouped,
+        positions=positions,
+        entries={entry.path: entry for entry in snapshot.entries},
+        slugs=slugs,
+        slug_index=slug_index,
+        near_duplicates=near_duplicates,
+        carousel_images=carousel_images,
+        grid_by_category=grid_by_category,
+        similar_counts=similar_counts,
+        near_duplicate_key=near_duplicate_key,
+    )
+
+
+def _collapse_near_duplicates(
+    images: list[str],
+    grouped: dict[str, list[str]],
+    positions: dict[str, tuple[str, int]],
+    near_duplicates: dict[str, NearDuplicate],
+) -> tuple[list[str], dict[str, list[str]], dict[str, int]]:
+    """
+    按排序键顺序聚类后（编号最小的一张作为代表）生成走马灯与分类网格实际展示的图片列表：
+    走马灯隐藏全部重复图片；分类网格只隐藏代表图片在同一分类中的重复图片。
+    """
+    if not AppConfig.collapse_near_duplicates:
+        return images, grouped, {}
+
+    similar_counts: dict[str, int] = {}
+    hidden = set()
+    for image, duplicate in near_duplicates.items():
+        if positions[image][0] == positions[duplicate.representative][0]:
+            hidden.add(image)
+            similar_counts[duplicate.representative] = similar_counts.get(duplicate.representative, 0) + 1
+    carousel_images = [image for image in images if image not in near_duplicates]
+    grid_by_category = {
+        category_key: [image for image in category_images if image not in hidden]
+        for category_key, category_images in grouped.items()
+    }
+    return carousel_images, grid_by_category, similar_counts
+
+
+def _apply_image_snapshot(snapshot: ImageSnapshot):
+    """
+    索引快照替换后重建图片结构，并以一次引用赋值整体替换 GALLERY。
+    """
+    global GALLERY
+    # 图片索引与映射配置的重载可能同时触发，串行构建，避免基于同一旧状态各建一份互相覆盖
+    with _GALLERY_LOCK:
+        GALLERY = _build_gallery_state(snapshot, GALLERY)
+
+
+GALLERY = GalleryState()
+_GALLERY_LOCK = threading.Lock()
+
+
+IMAGE_INDEX = ImageIndex(
+    IMAGE_DIR,
+    sort_key=_sort_key,
+    classify=_detect_category,
+    on_change=_apply_image_snapshot,
+    manifest_path=Path(AppConfig.image_manifest_path),
+    classifier_version=_classifier_version(),
+)
+IMAGE_INDEX.load()
+
+
+def _apply_mapping_snapshot(snapshot: MappingSnapshot, previous: MappingSnapshot):
+    """
+    映射配置替换后：分类规则变化时只重新分类（不重新哈希），分类列表变化时重新分组；
+    默认 R 脚本模板含分类标题，一并清空。页面缓存与搜索索引通过内容版本 / 分类指纹自行失效。
+    """
+    _default_r_markdown.cache_clear()
+    regrouped = False
+    if snapshot.fingerprint != previous.fingerprint:
+        regrouped = IMAGE_INDEX.reclassify(_classifier_version())
+    if not regrouped and list(GALLERY.by_category) != [category["key"] for category in snapshot.categories]:
+        _apply_image_snapshot(IMAGE_INDEX.snapshot)
+
+
+def _apply_visual_predictions(predictions: VisualPredictions):
+    # 只影响关键词无法识别的图片，分类列表不变，重新分类即可
+    IMAGE_INDEX.reclassify(_classifier_version())
+
+
+MAPPING_CONFIG.on_change = _apply_mapping_snapshot
+VISUAL_PREDICTIONS.on_change = _apply_visual_predictions
 R_MARKDOWN_DIR = Path("./public/r_scripts")
 
+METRICS = Metrics()
+PROFILER = SlowRequestProfiler(
+    Path(AppConfig.profile_dir),
+    sample_rate=AppConfig.profile_sample_rate,
+    slow_seconds=AppConfig.profile_slow_ms / 1000,
+)
+PAGE_CACHE = PageCache(
+    max_entries=AppConfig.page_cache_size,
+    serialize=METRICS.timed("serialize", serialize_payload),
+)
+SEARCH_INDEX = SearchIndex()
+MARKDOWN_CACHE = MarkdownCache(recheck_interval=AppConfig.markdown_recheck_interval)
+_SEARCH_INDEX_STATE = {"version": None}
+# (上次扫描时间, 脚本目录签名)
+_MARKDOWN_DIR_STATE = {"checked": (float("-inf"), None)}
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _markdown_dir_signature() -> tuple:
+    """
+    脚本目录签名：(目录 mtime, .md 文件数, 各文件最大 mtime)。原地编辑 .md 不会改变目录 mtime，
+    因此逐个 stat 文件；markdown_recheck_interval 秒内复用上次的扫描结果。
+    """
+    now = time.monotonic()
+    checked_at, signature = _MARKDOWN_DIR_STATE["checked"]
+    if now - checked_at < AppConfig.markdown_recheck_interval:
+        return signature
+
+    count, latest = 0, 0
+    try:
+        with os.scandir(R_MARKDOWN_DIR) as it:
+            for item in it:
+                if item.name.endswith(".md") and item.is_file():
+                    count += 1
+                    latest = max(latest, item.stat().st_mtime_ns)
+    except OSError:
+        pass
+    signature = (_mtime_ns(R_MARKDOWN_DIR), count, latest)
+    _MARKDOWN_DIR_STATE["checked"] = (now, signature)
+    return signature
+
+
+def _search_fields(image_path: str, category_key: str) -> list[tuple[str, float]]:
+    """
+    搜索字段及权重：图片标题 > 分类标题与关键词 = 图片专属 R 脚本 > 分类 R 脚本。
+    """
+    category = MAPPING_CONFIG.snapshot.category_map.get(category_key, {})
+    category_text = " ".join(
+        [category.get("title_zh", ""), category.get("title_en", ""), *category.get("keywords", [])]
+    )
+    fields = [(Path(image_path).stem, 3.0), (category_text, 1.0)]
+    for file_path, weight in [
+        (R_MARKDOWN_DIR / f"{Path(image_path).stem}.md", 1.0),
+        (R_MARKDOWN_DIR / f"{category_key}.md", 0.5),
+    ]:
+        if file_path.is_file():
+            fields.append((file_path.read_text(encoding="utf-8"), weight))
+    return fields
+
+
+def _sync_search_index(gallery: GalleryState):
+    """
+    图片集、映射配置或脚本目录变化后增量同步搜索索引：
+    签名（内容哈希、分类及其配置指纹、脚本 mtime）未变的文档直接跳过。
+    """
+    mapping = MAPPING_CONFIG.snapshot
+    version = (gallery.version, mapping.version, _markdown_dir_signature())
+    if _SEARCH_INDEX_STATE["version"] == version:
+        return
+
+    current_paths = set()
+    for entry in gallery.entries.values():
+        category_key = gallery.positions.get(entry.path, (mapping.default_category, 0))[0]
+        stem = Path(entry.path).stem
+        signature = (
+            entry.hash,
+            category_key,
+            mapping.category_digests.get(category_key),
+            _mtime_ns(R_MARKDOWN_DIR / f"{stem}.md"),
+            _mtime_ns(R_MARKDOWN_DIR / f"{category_key}.md"),
+        )
+        current_paths.add(entry.path)
+        if SEARCH_INDEX.signature(entry.path) != signature:
+            SEARCH_INDEX.add(entry.path, _search_fields(entry.path, category_key), signature=signature)
+
+    for doc_id in SEARCH_INDEX.doc_ids() - current_paths:
+        SEARCH_INDEX.remove(doc_id)
+    _SEARCH_INDEX_STATE["version"] = version
+
+
+def _content_version(gallery: GalleryState) -> tuple:
+    """
+    图片集或映射配置变化时版本随之变化，用于让页面缓存失效。主页与分类页不展示 R 脚本，
+    版本不含脚本目录；详情页按各自的脚本文件计算（见 _chart_page_version），搜索页另加脚本目录签名。
+    """
+    return gallery.version, MAPPING_CONFIG.snapshot.version
+
+
+def _chart_page_version(gallery: GalleryState, image_slug: str) -> tuple:
+    """
+    详情页只依赖图片本身、相邻两张图片、所属分类的配置与对应的 R 脚本，
+    其他图片增删或重新分类时缓存仍然有效。
+    """
+    image_path = gallery.slug_index.get(image_slug)
+    if image_path not in gallery.positions:
+        return _content_version(gallery)
+    category_key = gallery.positions[image_path][0]
+    return (
+        gallery.entries[image_path].hash,
+        # 上一张 / 下一张链接与预取图片
+        *(
+            (gallery.slugs[image], gallery.entries[image].hash) if image else None
+            for image in _adjacent_images(gallery, image_path)
+        ),
+        category_key,
+        MAPPING_CONFIG.snapshot.category_digests.get(category_key),
+        _mtime_ns(R_MARKDOWN_DIR / f"{Path(image_path).stem}.md"),
+        _mtime_ns(R_MARKDOWN_DIR / f"{category_key}.md"),
+    )
+
 # 第三方访客地理分布组件（替换成你的统计系统嵌入地址）
 VISITOR_IP_LAT = 31.2304
 VISITOR_IP_LON = 121.4737
 VISITOR_GEO_WIDGET_URL = f"https://maps.google.com/maps?q={VISITOR_IP_LAT},{VISITOR_IP_LON}&z=2&output=embed"
 
-MENU_ITEMS = get_menu_items("zh")
+def get_ui_resources() -> dict:
+    """
+    客户端切换主题 / 语言所需的全部数据：两套主题的 CSS 变量与两种语言的菜单项。
+    """
+    return {
+        "themes": {"light": get_theme_css_vars(False), "dark": get_theme_css_vars(True)},
+        "menuItems": {lang: get_menu_items(lang) for lang in I18N},
+        "searchPlaceholder": {lang: tr(lang, "search_placeholder") for lang in I18N},
+    }
+
+
+CAROUSEL_AUTOPLAY_SPEED = 2500
+
+# 图片在外框内按 contain 方式缩放，与外框上的低清占位图完全重合
+_FRAMED_IMAGE_STYLE = {"width": "100%", "height": "100%", "objectFit": "contain", "display": "block"}
+
+# 每张幻灯片 / 卡片上重复出现的样式；只引用主题 CSS 变量，与明暗主题无关，
+# style_classes 模式下生成为共享 CSS 类，回调响应中只保留类名
+SHARED_STYLES = SharedStyles(
+    {
+        "idvti-slide": {
+            "height": "min(76vh, 640px)",
+            "padding": "24px 12px",
+            "backgroundColor": THEME_VARS["carousel_bg"],
+            "borderRadius": 8,
+        },
+        "idvti-slide-frame": {
+            "width": "100%",
+            "maxWidth": "620px",
+            "height": "min(68vh, 560px)",
+            "margin": "0 auto",
+            "padding": "12px",
+            "backgroundColor": "#ffffff",
+            "borderRadius": "8px",
+            "overflow": "hidden",
+        },
+        "idvti-card-link": {"width": "calc(33.33% - 12px)", "minWidth": "240px", "textDecoration": "none"},
+        "idvti-card": {
+            "background": THEME_VARS["panel_bg"],
+            "padding": "10px",
+            "borderRadius": "10px",
+            "border": f"1px solid {THEME_VARS['border']}",
+        },
+        "idvti-card-frame": {
+            "height": "220px",
+            "backgroundColor": THEME_VARS["card_bg"],
+            "padding": "8px",
+            "borderRadius": "8px",
+            "border": f"1px solid {THEME_VARS['border']}",
+        },
+        "idvti-card-caption": {
+            "marginTop": "8px",
+            "fontSize": "13px",
+            "color": THEME_VARS["text"],
+            "whiteSpace": "nowrap",
+            "overflow": "hidden",
+            "textOverflow": "ellipsis",
+        },
+    },
+    enabled=AppConfig.style_classes,
+)
+app.config.external_stylesheets.append(SHARED_STYLES.url)
+
+
+def _image_placeholder_style(gallery: GalleryState, image: str, reserve_aspect_ratio: bool = False) -> dict:
+    """
+    图片外框的逐图样式：低清占位图（背景按 contain 居中于内容区，与最终图片位置一致），
+    大图到达前即可完成首次绘制；reserve_aspect_ratio 时按原图宽高比预留高度，避免加载后布局跳动。
+    外框需带 idvti-image-frame 类名（assets/image_frame.css 让 antd 的包装层撑满外框）。
+    """
+    entry = gallery.entries.get(image)
+    if entry is None:
+        return {}
+
+    style = {}
+    if reserve_aspect_ratio and entry.width and entry.height:
+        style["aspectRatio"] = f"{entry.width} / {entry.height}"
+        # 不放大超过原始宽度
+        style["maxWidth"] = f"{entry.width}px"
+    if entry.placeholder:
+        style.update(
+            {
+                "backgroundImage": f"url({entry.placeholder})",
+                "backgroundPosition": "center",
+                "backgroundSize": "contain",
+                "backgroundRepeat": "no-repeat",
+                "backgroundOrigin": "content-box",
+            }
+        )
+    return style
+
+
+# 走马灯哨兵：该幻灯片进入可视区域时，assets/infinite_scroll.js 触发追加下一批
+CAROUSEL_SENTINEL_ATTRIBUTE = "data-carousel-sentinel"
+
+
+def _build_carousel_slide(gallery: GalleryState, img: str, sentinel: bool = False):
+    return html.Div(
+        html.Div(
+            fac.AntdImage(
+                src=image_url(img, "carousel"),
+                preview={"src": image_url(img, ORIGINAL_RENDITION)},
+                style=_FRAMED_IMAGE_STYLE,
+            ),
+            **SHARED_STYLES.props("idvti-slide-frame", "idvti-image-frame", _image_placeholder_style(gallery, img)),
+        ),
+        **SHARED_STYLES.props("idvti-slide"),
+        **({CAROUSEL_SENTINEL_ATTRIBUTE: "true"} if sentinel else {}),
+    )
+
 
+def _build_carousel_slides(gallery: GalleryState, images: list[str], sentinel_index: int) -> list:
+    return [_build_carousel_slide(gallery, img, index == sentinel_index) for index, img in enumerate(images)]
 
-def build_carousel(images: list[str] | None = None, lang: str = "zh", theme: dict | None = None):
-    active_theme = theme or get_theme_tokens(False)
-    target_images = IMGS if images is None else images
+
+def build_carousel(gallery: GalleryState, lang: str = "zh", theme: dict | None = None):
+    """
+    只渲染首屏窗口内的图片，其余图片由 load_carousel_slides 按批次追加：
+    距窗口末尾 carousel_prefetch 张处的幻灯片作为哨兵，进入可视区域时加载下一批。
+    """
+    active_theme = theme or THEME_VARS
+    target_images = gallery.carousel_images
 
     if not target_images:
         return fac.AntdCenter(
@@ -350,61 +770,64 @@ def build_carousel(images: list[str] | None = None, lang: str = "zh", theme: dic
         )
 
     return fac.AntdCarousel(
-        [
-            html.Div(
-                html.Div(
-                    fac.AntdCenter(
-                        fac.AntdImage(
-                            src=img,
-                            preview=True,
-                            style={
-                                "width": "auto",
-                                "height": "auto",
-                                "maxWidth": "100%",
-                                "maxHeight": "100%",
-                                "objectFit": "contain",
-                                "display": "block",
-                                "margin": "0 auto",
-                            },
-                        ),
-                        inline=True,
-                        style={"width": "100%", "height": "100%"},
-                    ),
-                    style={
-                        "width": "100%",
-                        "maxWidth": "620px",
-                        "height": "min(68vh, 560px)",
-                        "margin": "0 auto",
-                        "padding": "12px",
-                        "background": "#ffffff",
-                        "borderRadius": "8px",
-                        "overflow": "hidden",
-                    },
-                ),
-                style={
-                    "height": "min(76vh, 640px)",
-                    "padding": "24px 12px",
-                    "backgroundColor": active_theme["carousel_bg"],
-                    "borderRadius": 8,
-                },
-            )
-            for img in target_images
-        ],
+        _build_carousel_slides(
+            gallery,
+            target_images[: AppConfig.carousel_window],
+            sentinel_index=max(0, AppConfig.carousel_window - AppConfig.carousel_prefetch),
+        ),
+        id="home-carousel",
         autoplay=True,
-        autoplaySpeed=2500,
+        autoplaySpeed=CAROUSEL_AUTOPLAY_SPEED,
         slidesToShow=2,
         slidesToScroll=1,
         arrows=True,
     )
 
 
-def _build_chart_route(category_key: str, image_index: int) -> str:
-    return f"/chart/{category_key}/{image_index}"
+def build_carousel_loader(gallery: GalleryState):
+    remaining = len(gallery.carousel_images) - AppConfig.carousel_window
+    if remaining <= 0:
+        return None
+
+    # 哨兵幻灯片可见时 assets/infinite_scroll.js 点击隐藏按钮，由 load_carousel_slides 追加下一批
+    return html.Div(
+        [
+            dcc.Store(id="home-carousel-state", data={"offset": AppConfig.carousel_window}),
+            fac.AntdButton(id="home-carousel-more"),
+        ],
+        style={"display": "none"},
+    )
+
+
+def _build_chart_route(gallery: GalleryState, image_path: str) -> str:
+    return f"/chart/{gallery.slugs[image_path]}"
+
+
+_LEGACY_CHART_ROUTE_PATTERN = re.compile(r"^/chart/([^/]+)/(\d+)$")
+
+
+def _canonical_chart_route(gallery: GalleryState, pathname: str) -> str | None:
+    """
+    详情页地址 -> 规范地址：兼容旧的按位置编址 /chart/<分类>/<下标> 与哈希前缀别名，无法解析时返回 None。
+    """
+    legacy_match = _LEGACY_CHART_ROUTE_PATTERN.match(pathname)
+    if legacy_match:
+        category_images = gallery.by_category.get(legacy_match.group(1), [])
+        image_index = int(legacy_match.group(2))
+        if image_index >= len(category_images):
+            return None
+        return _build_chart_route(gallery, category_images[image_index])
+
+    image_path = gallery.slug_index.get(pathname.removeprefix("/chart/"))
+    return _build_chart_route(gallery, image_path) if image_path else None
+
+
+_IMAGE_STEM_PLACEHOLDER = "\x00image_stem\x00"
 
 
 def _load_r_markdown(category_key: str, image_path: str, lang: str) -> str:
     """
-    按优先级加载 markdown：
+    按优先级加载 markdown（返回服务端预渲染结果）：
     1) public/r_scripts/<图片名>.md
     2) public/r_scripts/<分类key>.md
     3) 默认模板 markdown
@@ -416,12 +839,22 @@ def _load_r_markdown(category_key: str, image_path: str, lang: str) -> str:
     ]
 
     for file_path in candidate_files:
-        if file_path.exists() and file_path.is_file():
-            return file_path.read_text(encoding="utf-8")
+        rendered = MARKDOWN_CACHE.get(file_path)
+        if rendered is not None:
+            return rendered
+
+    return _default_r_markdown(category_key, lang).replace(_IMAGE_STEM_PLACEHOLDER, image_stem)
 
+
+@lru_cache(maxsize=None)
+def _default_r_markdown(category_key: str, lang: str) -> str:
+    """
+    默认模板按 (分类, 语言) 只渲染一次，图片名以占位符形式保留，使用时再替换。
+    """
+    image_stem = _IMAGE_STEM_PLACEHOLDER
     category_name = get_category_title(category_key, lang)
     if lang == "en":
-        return f"""# {category_name} - R Script Example
+        return render_markdown(f"""# {category_name} - R Script Example
 
 Current image: `{image_stem}`
 
@@ -443,9 +876,9 @@ ggplot(df, aes(x, y)) +
   geom_line(color = "#2ca9e1", linewidth = 1.2) +
   theme_minimal(base_size = 14)
 ```
-"""
+""")
 
-    return f"""# {category_name} - R 脚本示例
+    return render_markdown(f"""# {category_name} - R 脚本示例
 
 当前图片：`{image_stem}`
 
@@ -467,11 +900,11 @@ ggplot(df, aes(x, y)) +
   geom_line(color = "#2ca9e1", linewidth = 1.2) +
   theme_minimal(base_size = 14)
 ```
-"""
+""")
 
 
-def render_home_page(lang: str, theme: dict):
-    home_image_count = len(IMGS)
+def render_home_page(gallery: GalleryState, lang: str, theme: dict):
+    home_image_count = len(gallery.images)
     return html.Div(
         [
             html.H2(
@@ -486,63 +919,124 @@ def render_home_page(lang: str, theme: dict):
                 tr(lang, "home_count", count=home_image_count),
                 style={"marginBottom": "16px", "color": theme["subtext"]},
             ),
-            build_carousel(lang=lang, theme=theme),
+            build_carousel(gallery, lang=lang, theme=theme),
+            build_carousel_loader(gallery),
         ],
         style={"padding": "20px"},
     )
 
 
-def render_category_page(menu_key: str, lang: str, theme: dict):
-    category_images = IMAGES_BY_CATEGORY.get(menu_key, [])
+def _build_category_card(gallery: GalleryState, index: int, image: str, theme: dict):
+    caption = f"#{index + 1} · {Path(image).stem}"
+    if image in gallery.similar_counts:
+        # 网格中折叠了该图的近似重复图片
+        caption += f" (+{gallery.similar_counts[image]})"
+    return dcc.Link(
+        html.Div(
+            [
+                html.Div(
+                    fac.AntdImage(
+                        src=image_url(image, "thumb"),
+                        preview={"src": image_url(image, ORIGINAL_RENDITION)},
+                        style=_FRAMED_IMAGE_STYLE,
+                    ),
+                    **SHARED_STYLES.props("idvti-card-frame", "idvti-image-frame", _image_placeholder_style(gallery, image)),
+                ),
+                html.Div(caption, **SHARED_STYLES.props("idvti-card-caption")),
+            ],
+            **SHARED_STYLES.props("idvti-card"),
+        ),
+        href=_build_chart_route(gallery, image),
+        **SHARED_STYLES.props("idvti-card-link"),
+    )
+
+
+def _build_category_cards(gallery: GalleryState, menu_key: str, offset: int, theme: dict) -> list:
+    """
+    服务端切片：只构建 [offset, offset + page_size) 范围内的卡片。
+    """
+    page_images = gallery.grid_by_category.get(menu_key, [])[offset : offset + AppConfig.category_page_size]
+    return [
+        _build_category_card(gallery, offset + position, image, theme)
+        for position, image in enumerate(page_images)
+    ]
+
+
+def _parse_category_query(search: str | None) -> tuple[int, bool]:
+    """
+    解析 ?page=N / ?offset=N / ?mode=pages|scroll，返回 (起始下标, 是否无限滚动)。
+    """
+    query = parse_qs((search or "").lstrip("?"))
+    page_size = AppConfig.category_page_size
+
+    offset = 0
+    if query.get("offset", [""])[0].isdigit():
+        offset = int(query["offset"][0])
+    elif query.get("page", [""])[0].isdigit():
+        offset = max(int(query["page"][0]) - 1, 0) * page_size
+
+    mode = query.get("mode", [""])[0]
+    infinite_scroll = AppConfig.category_infinite_scroll if mode not in ("pages", "scroll") else mode == "scroll"
+    return offset, infinite_scroll
+
+
+def _build_category_pager(menu_key: str, offset: int, total: int, lang: str, theme: dict):
+    page_size = AppConfig.category_page_size
+    current_page = offset // page_size + 1
+    total_pages = max(math.ceil(total / page_size), 1)
+    link_style = {"color": theme["text"]}
+    page_href = f"/category/{menu_key}?mode=pages&page="
+
+    return html.Div(
+        [
+            dcc.Link(tr(lang, "prev_page"), href=f"{page_href}{current_page - 1}", style=link_style)
+            if current_page > 1
+            else None,
+            html.Span(
+                tr(lang, "page_info", page=current_page, total=total_pages),
+                style={"color": theme["subtext"]},
+            ),
+            dcc.Link(tr(lang, "next_page"), href=f"{page_href}{current_page + 1}", style=link_style)
+            if offset + page_size < total
+            else None,
+        ],
+        style={"display": "flex", "gap": "16px", "justifyContent": "center", "marginTop": "20px"},
+    )
+
+
+def _build_category_load_more(menu_key: str, next_offset: int, total: int, lang: str):
+    return html.Div(
+        [
+            dcc.Store(id="category-grid-state", data={"category": menu_key, "offset": next_offset}),
+            # assets/infinite_scroll.js 会在按钮进入视口时自动触发点击
+            fac.AntdButton(
+                tr(lang, "load_more"),
+                id="category-load-more",
+                type="default",
+                block=True,
+                style={} if next_offset < total else {"display": "none"},
+            ),
+        ],
+        style={"marginTop": "20px"},
+    )
+
+
+def render_category_page(
+    gallery: GalleryState, menu_key: str, lang: str, theme: dict, offset: int = 0, infinite_scroll: bool = False
+):
+    category_images = gallery.grid_by_category.get(menu_key, [])
     category_name = get_category_title(menu_key, lang)
     category_desc = get_category_desc(menu_key, lang)
+    total = len(category_images)
+    if offset >= total:
+        offset = max(total - 1, 0) // AppConfig.category_page_size * AppConfig.category_page_size
 
-    image_boxes = [
-        dcc.Link(
-            html.Div(
-                [
-                    html.Div(
-                        fac.AntdImage(
-                            src=image,
-                            preview=True,
-                            style={
-                                "width": "100%",
-                                "height": "100%",
-                                "objectFit": "contain",
-                            },
-                        ),
-                        style={
-                            "height": "220px",
-                            "background": theme["card_bg"],
-                            "padding": "8px",
-                            "borderRadius": "8px",
-                            "border": f"1px solid {theme['border']}",
-                        },
-                    ),
-                    html.Div(
-                        f"#{index + 1} · {Path(image).stem}",
-                        style={
-                            "marginTop": "8px",
-                            "fontSize": "13px",
-                            "color": theme["text"],
-                            "whiteSpace": "nowrap",
-                            "overflow": "hidden",
-                            "textOverflow": "ellipsis",
-                        },
-                    ),
-                ],
-                style={
-                    "background": theme["panel_bg"],
-                    "padding": "10px",
-                    "borderRadius": "10px",
-                    "border": f"1px solid {theme['border']}",
-                },
-            ),
-            href=_build_chart_route(menu_key, index),
-            style={"width": "calc(33.33% - 12px)", "minWidth": "240px", "textDecoration": "none"},
-        )
-        for index, image in enumerate(category_images)
-    ]
+    image_boxes = _build_category_cards(gallery, menu_key, offset, theme)
+
+    if infinite_scroll:
+        page_footer = _build_category_load_more(menu_key, offset + len(image_boxes), total, lang)
+    else:
+        page_footer = _build_category_pager(menu_key, offset, total, lang, theme)
 
     return html.Div(
         [
@@ -552,7 +1046,7 @@ def render_category_page(menu_key: str, lang: str, theme: dict):
                 style={"color": theme["text"]},
             ),
             html.P(
-                tr(lang, "category_count", count=len(category_images)),
+                tr(lang, "category_count", count=total),
                 style={"marginBottom": "16px", "color": theme["subtext"]},
             ),
             html.Div(
@@ -587,45 +1081,75 @@ def render_category_page(menu_key: str, lang: str, theme: dict):
                         },
                     )
                 ],
+                id="category-grid",
                 style={"display": "flex", "gap": "12px", "flexWrap": "wrap", "marginTop": "16px"},
             ),
+            page_footer if image_boxes else None,
         ],
         style={"padding": "20px"},
     )
 
 
-def render_chart_detail_page(category_key: str, image_index: int, lang: str, theme: dict):
-    category_images = IMAGES_BY_CATEGORY.get(category_key, [])
-    category_name = get_category_title(category_key, lang)
-
-    if image_index < 0 or image_index >= len(category_images):
+def render_chart_detail_page(gallery: GalleryState, image_slug: str, lang: str, theme: dict):
+    image_path = gallery.slug_index.get(image_slug)
+    if image_path not in gallery.positions:
         return tr(lang, "not_found"), fac.AntdCenter(
             tr(lang, "not_found_image"),
             style={"height": 240, "color": theme["subtext"]},
         )
 
-    image_path = category_images[image_index]
+    category_key = gallery.positions[image_path][0]
+    category_name = get_category_title(category_key, lang)
     markdown_content = _load_r_markdown(category_key, image_path, lang)
+    previous_image, next_image = _adjacent_images(gallery, image_path)
+    link_style = {"color": theme["text"]}
 
     content = html.Div(
         [
-            dcc.Link(
-                tr(lang, "back_to_category"),
-                href=f"/category/{category_key}",
-                style={"display": "inline-block", "marginBottom": "12px", "color": theme["text"]},
+            html.Div(
+                [
+                    dcc.Link(tr(lang, "back_to_category"), href=f"/category/{category_key}", style=link_style),
+                    html.Div(
+                        [
+                            dcc.Link(
+                                tr(lang, "prev_figure"),
+                                href=_build_chart_route(gallery, previous_image),
+                                title=Path(previous_image).stem,
+                                style=link_style,
+                            )
+                            if previous_image
+                            else None,
+                            dcc.Link(
+                                tr(lang, "next_figure"),
+                                href=_build_chart_route(gallery, next_image),
+                                title=Path(next_image).stem,
+                                style=link_style,
+                            )
+                            if next_image
+                            else None,
+                        ],
+                        style={"display": "flex", "gap": "16px"},
+                    ),
+                ],
+                style={"display": "flex", "justifyContent": "space-between", "marginBottom": "12px"},
             ),
             html.H2(
-                f"{category_name} · #{image_index + 1}",
+                f"{category_name} · {Path(image_path).stem}",
                 style={"marginBottom": "14px", "color": theme["title_text"]},
             ),
             html.Div(
-                fac.AntdImage(
-                    src=image_path,
-                    preview=True,
+                html.Div(
+                    fac.AntdImage(
+                        src=image_url(image_path, "preview"),
+                        preview={"src": image_url(image_path, ORIGINAL_RENDITION)},
+                        style=_FRAMED_IMAGE_STYLE,
+                    ),
+                    className="idvti-image-frame",
                     style={
-                        "maxWidth": "100%",
+                        "width": "100%",
                         "maxHeight": "520px",
-                        "objectFit": "contain",
+                        "margin": "0 auto",
+                        **_image_placeholder_style(gallery, image_path, reserve_aspect_ratio=True),
                     },
                 ),
                 style={
@@ -639,7 +1163,8 @@ def render_chart_detail_page(category_key: str, image_index: int, lang: str, the
             html.Div(
                 [
                     html.H3(tr(lang, "r_markdown"), style={"marginBottom": "10px", "color": theme["title_text"]}),
-                    dcc.Markdown(markdown_content, style={"color": theme["text"]}),
+                    # 代码块已在服务端高亮为 <pre>，其余原始 HTML 已被转义
+                    dcc.Markdown(markdown_content, dangerously_allow_html=True, style={"color": theme["text"]}),
                 ],
                 style={
                     "background": theme["card_bg"],
@@ -648,6 +1173,7 @@ def render_chart_detail_page(category_key: str, image_index: int, lang: str, the
                     "padding": "16px",
                 },
             ),
+            *_build_prefetch_images([previous_image, next_image]),
         ],
         style={"padding": "20px"},
     )
@@ -655,6 +1181,69 @@ def render_chart_detail_page(category_key: str, image_index: int, lang: str, the
     return f"{category_name} {tr(lang, 'detail')}", content
 
 
+def _adjacent_images(gallery: GalleryState, image_path: str, distance: int = 1) -> tuple[str | None, str | None]:
+    """
+    同一分类中向前 / 向后第 distance 张图片，不存在时为 None。
+    """
+    category_key, index = gallery.positions[image_path]
+    category_images = gallery.by_category.get(category_key, [])
+    previous_index, next_index = index - distance, index + distance
+    return (
+        category_images[previous_index] if previous_index >= 0 else None,
+        category_images[next_index] if next_index < len(category_images) else None,
+    )
+
+
+def _build_prefetch_images(images: list[str | None]) -> list:
+    """
+    相邻详情页的大图提前下载到浏览器缓存。使用隐藏的 <img> 而非 <link rel=prefetch>：
+    衍生图片按 Accept 协商 AVIF / WebP（Vary: Accept），只有图片请求的 Accept 才能命中详情页实际使用的格式。
+    """
+    return [
+        html.Img(src=image_url(image, "preview"), alt="", className="idvti-prefetch", hidden=True)
+        for image in images
+        if image
+    ]
+
+
+def render_search_page(gallery: GalleryState, query: str, lang: str, theme: dict):
+    _sync_search_index(gallery)
+    results = SEARCH_INDEX.search(query, limit=AppConfig.search_result_limit) if query else []
+    result_cards = [
+        _build_category_card(gallery, gallery.positions[image][1], image, theme)
+        for image, _ in results
+        if image in gallery.positions
+    ]
+
+    if not query:
+        summary = tr(lang, "search_hint")
+    else:
+        summary = tr(lang, "search_count", query=query, count=len(result_cards))
+
+    return html.Div(
+        [
+            html.P(summary, style={"marginBottom": "16px", "color": theme["subtext"]}),
+            html.Div(
+                result_cards
+                if result_cards or not query
+                else [
+                    fac.AntdCenter(
+                        tr(lang, "search_empty"),
+                        style={
+                            "height": 180,
+                            "background": theme["empty_bg"],
+                            "borderRadius": 8,
+                            "color": theme["subtext"],
+                        },
+                    )
+                ],
+                style={"display": "flex", "gap": "12px", "flexWrap": "wrap", "marginTop": "16px"},
+            ),
+        ],
+        style={"padding": "20px"},
+    )
+
+
 def render_site_footer(theme: dict):
     return html.Div(
         [
@@ -712,131 +1301,183 @@ def render_site_footer(theme: dict):
     )
 
 
-app.layout = html.Div(
-    id="app-root",
-    style={"height": "100vh", "background": DEFAULT_THEME["page_bg"]},
-    children=[
-        dcc.Location(id="url", refresh=False),
-        fac.AntdLayout(
-            [
-                fac.AntdSider(
-                    [
-                        fac.AntdButton(
-                            id="menu-collapse-trigger",
-                            icon=fac.AntdIcon(
-                                id="menu-collapse-trigger-icon",
-                                icon="antd-arrow-left",
-                                style={"fontSize": "14px"},
+def serve_layout():
+    """
+    每次访问时构建的页面骨架：不含页面内容，page-content 由 render_by_route 在首次回调时填充（并进入页面缓存），
+    导入模块与 worker 启动时不再渲染首页与轮播图。
+    """
+    with METRICS.stage("ui_resources"):
+        ui_resources = get_ui_resources()
+    with METRICS.stage("footer"):
+        footer = render_site_footer(THEME_VARS)
+
+    return html.Div(
+        id="app-root",
+        style={"height": "100vh", "background": THEME_VARS["page_bg"], **get_theme_css_vars(False)},
+        children=[
+            dcc.Location(id="url", refresh=False),
+            # 主题与语言偏好保存在浏览器 localStorage，切换全部在客户端完成
+            dcc.Store(id="theme-preference", storage_type="local", data="light"),
+            dcc.Store(id="lang-preference", storage_type="local", data="zh"),
+            dcc.Store(id="ui-resources", data=ui_resources),
+            fac.AntdLayout(
+                [
+                    fac.AntdSider(
+                        [
+                            fac.AntdButton(
+                                id="menu-collapse-trigger",
+                                icon=fac.AntdIcon(
+                                    id="menu-collapse-trigger-icon",
+                                    icon="antd-arrow-left",
+                                    style={"fontSize": "14px"},
+                                ),
+                                shape="circle",
+                                type="text",
+                                style={
+                                    "position": "absolute",
+                                    "zIndex": 1,
+                                    "top": 20,
+                                    "right": -13,
+                                    "boxShadow": "rgb(0 0 0 / 10%) 0px 4px 10px 0px",
+                                    "background": "white",
+                                },
                             ),
-                            shape="circle",
-                            type="text",
-                            style={
-                                "position": "absolute",
-                                "zIndex": 1,
-                                "top": 20,
-                                "right": -13,
-                                "boxShadow": "rgb(0 0 0 / 10%) 0px 4px 10px 0px",
-                                "background": "white",
-                            },
-                        ),
-                        fac.AntdMenu(
-                            id="left-category-menu",
-                            menuItems=MENU_ITEMS,
-                            mode="inline",
-                            theme="light",
-                            defaultSelectedKey="home",
-                            style={"height": "100%", "overflow": "hidden auto"},
-                        ),
-                    ],
-                    id="left-category-sider",
-                    collapsible=True,
-                    collapsedWidth=60,
-                    trigger=None,
-                    style={
-                        "position": "relative",
-                        "height": "100vh",
-                        "background": DEFAULT_THEME["panel_bg"],
-                        "borderRight": f"1px solid {DEFAULT_THEME['border']}",
-                    },
-                ),
-                fac.AntdLayout(
-                    id="right-main-layout",
-                    children=[
-                        fac.AntdContent(
-                            id="app-content",
-                            children=html.Div(
-                                [
-                                    html.Div(
-                                        [
-                                            fac.AntdButton(
-                                                id="theme-toggle-btn",
-                                                icon=fac.AntdIcon(icon="antd-moon"),
-                                                shape="circle",
-                                                type="default",
-                                                style={"marginRight": "10px"},
-                                            ),
-                                            fac.AntdButton(
-                                                "CN",
-                                                id="lang-toggle-btn",
-                                                type="default",
-                                            ),
-                                        ],
-                                        id="global-controls",
-                                        style={
-                                            "position": "fixed",
-                                            "top": "12px",
-                                            "right": "20px",
-                                            "zIndex": 1100,
-                                            "padding": "8px 10px",
-                                            "display": "flex",
-                                            "alignItems": "center",
-                                            "justifyContent": "flex-end",
-                                            "gap": "8px",
-                                            "borderRadius": "999px",
-                                            "border": f"1px solid {DEFAULT_THEME['border']}",
-                                            "background": DEFAULT_THEME["panel_bg"],
-                                            "boxShadow": "0 2px 10px rgba(0,0,0,0.08)",
-                                            "color": DEFAULT_THEME["text"],
-                                        },
-                                    ),
-                                    html.Div(
-                                        id="page-title",
-                                        children=tr("zh", "home"),
-                                        style={
-                                            "fontSize": "24px",
-                                            "fontWeight": 600,
-                                            "padding": "20px 20px 0 20px",
-                                            "color": DEFAULT_THEME["title_text"],
-                                        },
-                                    ),
-                                    html.Div(id="page-content", children=render_home_page("zh", DEFAULT_THEME)),
-                                    fac.AntdFooter(
-                                        id="app-footer",
-                                        children=render_site_footer(DEFAULT_THEME),
-                                        style={
-                                            "background": DEFAULT_THEME["panel_bg"],
-                                            "borderTop": f"1px solid {DEFAULT_THEME['border']}",
-                                            "padding": "16px 20px 20px 20px",
-                                            "marginTop": "24px",
-                                        },
-                                    ),
-                                ]
+                            fac.AntdMenu(
+                                id="left-category-menu",
+                                menuItems=get_menu_items("zh"),
+                                mode="inline",
+                                theme="light",
+                                defaultSelectedKey="home",
+                                style={
+                                    "height": "100%",
+                                    "overflow": "hidden auto",
+                                    "background": THEME_VARS["panel_bg"],
+                                    "color": THEME_VARS["title_text"],
+                                },
                             ),
-                            style={
-                                "background": DEFAULT_THEME["page_bg"],
-                                "overflow": "auto",
-                                "flex": "1",
-                                "minHeight": 0,
-                            },
-                        ),
-                    ],
-                    style={"height": "100vh", "display": "flex", "flexDirection": "column"},
-                ),
-            ],
-            style={"height": "100vh"},
-        ),
-    ],
-)
+                        ],
+                        id="left-category-sider",
+                        collapsible=True,
+                        collapsedWidth=60,
+                        trigger=None,
+                        style={
+                            "position": "relative",
+                            "height": "100vh",
+                            "background": THEME_VARS["panel_bg"],
+                            "borderRight": f"1px solid {THEME_VARS['border']}",
+                            "color": THEME_VARS["title_text"],
+                        },
+                    ),
+                    fac.AntdLayout(
+                        id="right-main-layout",
+                        children=[
+                            fac.AntdContent(
+                                id="app-content",
+                                children=html.Div(
+                                    [
+                                        html.Div(
+                                            [
+                                                fac.AntdInput(
+                                                    id="search-input",
+                                                    mode="search",
+                                                    placeholder=tr("zh", "search_placeholder"),
+                                                    allowClear=True,
+                                                    style={"width": 200},
+                                                ),
+                                                fac.AntdButton(
+                                                    id="theme-toggle-btn",
+                                                    icon=fac.AntdIcon(id="theme-toggle-icon", icon="antd-moon"),
+                                                    shape="circle",
+                                                    type="default",
+                                                    style={"marginRight": "10px"},
+                                                ),
+                                                fac.AntdButton(
+                                                    "CN",
+                                                    id="lang-toggle-btn",
+                                                    type="default",
+                                                ),
+                                            ],
+                                            id="global-controls",
+                                            style={
+                                                "position": "fixed",
+                                                "top": "12px",
+                                                "right": "20px",
+                                                "zIndex": 1100,
+                                                "padding": "8px 10px",
+                                                "display": "flex",
+                                                "alignItems": "center",
+                                                "justifyContent": "flex-end",
+                                                "gap": "8px",
+                                                "borderRadius": "999px",
+                                                "border": f"1px solid {THEME_VARS['border']}",
+                                                "background": THEME_VARS["panel_bg"],
+                                                "boxShadow": "0 2px 10px rgba(0,0,0,0.08)",
+                                                "color": THEME_VARS["text"],
+                                            },
+                                        ),
+                                        html.Div(
+                                            id="page-title",
+                                            children=tr("zh", "home"),
+                                            style={
+                                                "fontSize": "24px",
+                                                "fontWeight": 600,
+                                                "padding": "20px 20px 0 20px",
+                                                "color": THEME_VARS["title_text"],
+                                            },
+                                        ),
+                                        html.Div(id="page-content"),
+                                        fac.AntdFooter(
+                                            id="app-footer",
+                                            children=footer,
+                                            style={
+                                                "background": THEME_VARS["panel_bg"],
+                                                "borderTop": f"1px solid {THEME_VARS['border']}",
+                                                "padding": "16px 20px 20px 20px",
+                                            },
+                                        ),
+                                    ]
+                                ),
+                                style={
+                                    "background": THEME_VARS["page_bg"],
+                                    "overflow": "auto",
+                                    "flex": "1",
+                                    "minHeight": 0,
+                                    "color": THEME_VARS["text"],
+                                },
+                            ),
+                        ],
+                        style={"height": "100vh", "display": "flex", "flexDirection": "column"},
+                    ),
+                ],
+                style={"height": "100vh"},
+            ),
+        ],
+    )
+
+
+app.layout = serve_layout
+
+
+@app.server.route(f"{DERIVED_URL_PREFIX}/<name>")
+def serve_derived_image(name):
+    return send_derivative(name)
+
+
+@app.server.route(f"{GALLERY_URL_PREFIX}/<digest>/<path:relative_path>")
+def serve_gallery_image(digest, relative_path):
+    return send_gallery_image(digest, relative_path)
+
+
+@app.server.route(f"{SHARED_STYLES_URL_PREFIX}/shared-<digest>.css")
+def serve_shared_styles(digest):
+    # 与图库原图一致：指纹与当前样式不符时重定向到最新地址，旧地址或伪造地址不会以 immutable 缓存当前样式
+    if digest != SHARED_STYLES.digest:
+        return redirect(SHARED_STYLES.url)
+    response = Response(SHARED_STYLES.css, mimetype="text/css")
+    response.set_etag(SHARED_STYLES.digest)
+    # 地址中带内容哈希，样式变化时地址随之变化
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response.make_conditional(request)
 
 
 app.clientside_callback(
@@ -853,160 +1494,413 @@ app.clientside_callback(
 )
 
 
+@app.callback(
+    Output("home-carousel", "children"),
+    Output("home-carousel-state", "data"),
+    Input("home-carousel-more", "nClicks"),
+    State("home-carousel-state", "data"),
+    prevent_initial_call=True,
+)
+def load_carousel_slides(n_clicks, carousel_state):
+    gallery = GALLERY
+    start = carousel_state["offset"]
+    next_images = gallery.carousel_images[start : start + AppConfig.carousel_prefetch]
+    if not next_images:
+        return no_update, no_update
+
+    # 每批的第一张作为下一个哨兵，已加载的图片始终领先于当前播放位置
+    slides = Patch()
+    slides.extend(_build_carousel_slides(gallery, next_images, sentinel_index=0))
+    return slides, {"offset": start + len(next_images)}
+
+
+@app.callback(
+    Output("category-grid", "children"),
+    Output("category-grid-state", "data"),
+    Output("category-load-more", "style"),
+    Input("category-load-more", "nClicks"),
+    State("category-grid-state", "data"),
+    prevent_initial_call=True,
+)
+def load_more_category_images(n_clicks, grid_state):
+    gallery = GALLERY
+    menu_key = grid_state["category"]
+    offset = grid_state["offset"]
+    next_cards = _build_category_cards(gallery, menu_key, offset, THEME_VARS)
+    if not next_cards:
+        return no_update, no_update, {"display": "none"}
+
+    next_offset = offset + len(next_cards)
+    cards = Patch()
+    cards.extend(next_cards)
+    has_more = next_offset < len(gallery.grid_by_category.get(menu_key, []))
+    return cards, {"category": menu_key, "offset": next_offset}, {} if has_more else {"display": "none"}
+
+
+@app.callback(
+    Output("url", "pathname", allow_duplicate=True),
+    Output("url", "search"),
+    Input("search-input", "nSubmit"),
+    Input("search-input", "nClicksSearch"),
+    State("search-input", "value"),
+    prevent_initial_call=True,
+)
+def submit_search(n_submit, n_clicks_search, value):
+    query = (value or "").strip()
+    if not query:
+        return no_update, no_update
+    return "/search", f"?{urlencode({'q': query})}"
+
+
 @app.callback(
     Output("url", "pathname"),
+    Output("url", "search", allow_duplicate=True),
     Input("left-category-menu", "currentKey"),
     State("url", "pathname"),
     prevent_initial_call=True,
 )
 def navigate_from_menu(current_key, current_pathname):
+    """
+    菜单切换页面时同时清空查询串，避免把上一页的 ?mode=pages&page=N / ?q=… 带到新页面。
+    """
     key = current_key or "home"
 
     if key == "home":
-        return "/"
+        return "/", ""
 
-    if key in CATEGORY_MAP:
-        return f"/category/{key}"
+    if key in MAPPING_CONFIG.snapshot.category_map:
+        return f"/category/{key}", ""
 
-    return current_pathname if current_pathname else no_update
+    return (current_pathname, no_update) if current_pathname else (no_update, no_update)
+
+
+app.clientside_callback(
+    """(nClicks, theme) => theme === 'dark' ? 'light' : 'dark'""",
+    Output("theme-preference", "data"),
+    Input("theme-toggle-btn", "nClicks"),
+    State("theme-preference", "data"),
+    prevent_initial_call=True,
+)
+
+
+app.clientside_callback(
+    """(nClicks, lang) => lang === 'en' ? 'zh' : 'en'""",
+    Output("lang-preference", "data"),
+    Input("lang-toggle-btn", "nClicks"),
+    State("lang-preference", "data"),
+    prevent_initial_call=True,
+)
+
+
+app.clientside_callback(
+    """(theme, resources) => {
+        const isDark = theme === 'dark';
+        return [
+            Object.assign(
+                {height: '100vh', background: 'var(--idvti-page-bg)'},
+                resources.themes[isDark ? 'dark' : 'light']
+            ),
+            isDark ? 'dark' : 'light',
+            isDark ? 'antd-sun' : 'antd-moon',
+            isDark ? 'primary' : 'default',
+        ];
+    }""",
+    [
+        Output("app-root", "style"),
+        Output("left-category-menu", "theme"),
+        Output("theme-toggle-icon", "icon"),
+        Output("theme-toggle-btn", "type"),
+    ],
+    Input("theme-preference", "data"),
+    State("ui-resources", "data"),
+)
+
+
+app.clientside_callback(
+    """(lang, resources) => {
+        const isEn = lang === 'en';
+        return [
+            resources.menuItems[isEn ? 'en' : 'zh'],
+            isEn ? 'EN' : 'CN',
+            isEn ? 'primary' : 'default',
+            resources.searchPlaceholder[isEn ? 'en' : 'zh'],
+        ];
+    }""",
+    [
+        Output("left-category-menu", "menuItems"),
+        Output("lang-toggle-btn", "children"),
+        Output("lang-toggle-btn", "type"),
+        Output("search-input", "placeholder"),
+    ],
+    Input("lang-preference", "data"),
+    State("ui-resources", "data"),
+)
 
 
 @app.callback(
     Output("page-title", "children"),
     Output("page-content", "children"),
-    Output("page-title", "style"),
-    Output("left-category-menu", "menuItems"),
-    Output("left-category-menu", "style"),
-    Output("left-category-menu", "theme"),
-    Output("app-root", "style"),
-    Output("left-category-sider", "style"),
-    Output("app-content", "style"),
-    Output("app-footer", "children"),
-    Output("app-footer", "style"),
-    Output("global-controls", "style"),
-    Output("theme-toggle-btn", "icon"),
-    Output("theme-toggle-btn", "type"),
-    Output("lang-toggle-btn", "children"),
-    Output("lang-toggle-btn", "type"),
     Input("url", "pathname"),
-    Input("theme-toggle-btn", "nClicks"),
-    Input("lang-toggle-btn", "nClicks"),
+    Input("url", "search"),
+    Input("lang-preference", "data"),
 )
-def render_by_route(pathname, theme_clicks, lang_clicks):
+def render_by_route(pathname, search, lang):
+    # 整个请求只读这一份图片结构，热重载替换 GALLERY 不影响进行中的渲染
+    gallery = GALLERY
     normalized_path = pathname or "/"
-    lang = "en" if (lang_clicks or 0) % 2 == 1 else "zh"
-    is_bw_mode = (theme_clicks or 0) % 2 == 1
-    theme = get_theme_tokens(is_bw_mode)
-    detail_match = re.match(r"^/chart/([^/]+)/(\d+)$", normalized_path)
-    category_match = re.match(r"^/category/([^/]+)$", normalized_path)
-
-    if normalized_path in ["/", "/home"]:
-        page_title = tr(lang, "home")
-        page_content = render_home_page(lang, theme)
-    elif category_match:
-        category_key = category_match.group(1)
-        if category_key in CATEGORY_MAP:
-            page_title = get_category_title(category_key, lang)
-            page_content = render_category_page(category_key, lang, theme)
+    if normalized_path == "/home":
+        normalized_path = "/"
+    elif normalized_path.startswith("/chart/"):
+        # 旧的按位置编址与哈希别名统一到规范地址，共用同一份缓存
+        normalized_path = _canonical_chart_route(gallery, normalized_path) or normalized_path
+    lang = lang if lang in I18N else "zh"
+    # 只有分类页与搜索页使用查询参数，其余路由忽略 search 以提高缓存命中率
+    if normalized_path.startswith("/category/"):
+        route_query = _parse_category_query(search)
+    elif normalized_path == "/search":
+        route_query = parse_qs((search or "").lstrip("?")).get("q", [""])[0].strip()
+    else:
+        route_query = None
+
+    route_label = _route_label(normalized_path)
+    METRICS.route = route_label
+    rendered = []
+
+    def render():
+        rendered.append(True)
+        return _render_route(gallery, normalized_path, route_query, lang)
+
+    if normalized_path.startswith("/chart/"):
+        version = _chart_page_version(gallery, normalized_path.removeprefix("/chart/"))
+    elif normalized_path == "/search":
+        # 搜索结果取决于脚本全文
+        version = (*_content_version(gallery), _markdown_dir_signature())
+    else:
+        version = _content_version(gallery)
+    payload = PAGE_CACHE.get_or_render((normalized_path, route_query, lang), render, version=version)
+    METRICS.increment("idvti_page_cache_lookups_total", route=route_label, result="miss" if rendered else "hit")
+    if normalized_path.startswith("/chart/"):
+        _warm_adjacent_chart_pages(gallery, normalized_path.removeprefix("/chart/"), lang)
+    return payload
+
+
+# 相邻详情页的后台预热：单线程执行，避免与前台请求争抢 CPU；线程在首次提交时才创建，不受 fork 影响
+_PAGE_WARMER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-warmer")
+_WARMING_KEYS: set = set()
+_WARMING_LOCK = threading.Lock()
+
+
+def _warm_adjacent_chart_pages(gallery: GalleryState, image_slug: str, lang: str):
+    """
+    打开详情页后在后台渲染前后 detail_prefetch_distance 张图片的页面（含 R 脚本 Markdown），
+    顺序浏览时下一次回调直接命中页面缓存。
+    """
+    image_path = gallery.slug_index.get(image_slug)
+    if image_path not in gallery.positions:
+        return
+
+    for distance in range(1, AppConfig.detail_prefetch_distance + 1):
+        for neighbour in _adjacent_images(gallery, image_path, distance):
+            if neighbour is None:
+                continue
+            key = (_build_chart_route(gallery, neighbour), None, lang)
+            version = _chart_page_version(gallery, gallery.slugs[neighbour])
+            if PAGE_CACHE.contains(key, version):
+                continue
+            with _WARMING_LOCK:
+                if key in _WARMING_KEYS:
+                    continue
+                _WARMING_KEYS.add(key)
+            _PAGE_WARMER.submit(_warm_page, gallery, key, version)
+
+
+def _warm_page(gallery: GalleryState, key: tuple, version: tuple):
+    normalized_path, route_query, lang = key
+    METRICS.route = "warm:/chart/<slug>"
+    try:
+        PAGE_CACHE.warm(key, lambda: _render_route(gallery, normalized_path, route_query, lang), version=version)
+    except Exception:
+        logger.exception("Failed to warm page %s", normalized_path)
+    finally:
+        with _WARMING_LOCK:
+            _WARMING_KEYS.discard(key)
+
+
+def _route_label(normalized_path: str) -> str:
+    """
+    指标中的路由标签使用路由模板，避免每个分类 / 图片各占一条时间序列。
+    """
+    if normalized_path in ("/", "/search"):
+        return f"page:{normalized_path}"
+    if normalized_path.startswith("/category/"):
+        return "page:/category/<key>"
+    if normalized_path.startswith("/chart/"):
+        return "page:/chart/<slug>"
+    return "page:other"
+
+
+def _render_route(gallery: GalleryState, normalized_path: str, route_query, lang: str):
+    theme = THEME_VARS
+    with METRICS.stage("route_match"):
+        detail_match = re.match(r"^/chart/(.+)$", normalized_path)
+        category_match = re.match(r"^/category/([^/]+)$", normalized_path)
+
+    with METRICS.stage("render"):
+        if normalized_path == "/":
+            page_title = tr(lang, "home")
+            page_content = render_home_page(gallery, lang, theme)
+        elif category_match:
+            category_key = category_match.group(1)
+            if category_key in MAPPING_CONFIG.snapshot.category_map:
+                page_title = get_category_title(category_key, lang)
+                offset, infinite_scroll = route_query
+                page_content = render_category_page(gallery, category_key, lang, theme, offset, infinite_scroll)
+            else:
+                page_title = tr(lang, "not_found")
+                page_content = fac.AntdCenter(
+                    tr(lang, "not_found_category"),
+                    style={"height": 240, "color": theme["subtext"]},
+                )
+        elif detail_match:
+            page_title, page_content = render_chart_detail_page(gallery, detail_match.group(1), lang, theme)
+        elif normalized_path == "/search":
+            page_title = tr(lang, "search")
+            page_content = render_search_page(gallery, route_query, lang, theme)
         else:
             page_title = tr(lang, "not_found")
             page_content = fac.AntdCenter(
-                tr(lang, "not_found_category"),
+                tr(lang, "not_found_route"),
                 style={"height": 240, "color": theme["subtext"]},
             )
-    elif detail_match:
-        category_key = detail_match.group(1)
-        image_index = int(detail_match.group(2))
-        page_title, page_content = render_chart_detail_page(category_key, image_index, lang, theme)
-    else:
-        page_title = tr(lang, "not_found")
-        page_content = fac.AntdCenter(
-            tr(lang, "not_found_route"),
-            style={"height": 240, "color": theme["subtext"]},
-        )
 
-    page_title_style = {
-        "fontSize": "24px",
-        "fontWeight": 600,
-        "padding": "20px 20px 0 20px",
-        "color": theme["title_text"],
-    }
+    return page_title, page_content
 
-    menu_style = {
-        "height": "100%",
-        "overflow": "hidden auto",
-        "background": theme["panel_bg"],
-        "color": theme["title_text"],
-    }
 
-    app_root_style = {
-        "height": "100vh",
-        "background": theme["page_bg"],
-    }
+@app.server.route("/api/cache-stats")
+def cache_stats():
+    return jsonify(
+        {
+            "page_cache": PAGE_CACHE.stats(),
+            "markdown_cache": MARKDOWN_CACHE.stats(),
+            "default_markdown": _default_r_markdown.cache_info()._asdict(),
+        }
+    )
 
-    sider_style = {
-        "position": "relative",
-        "height": "100vh",
-        "background": theme["panel_bg"],
-        "borderRight": f"1px solid {theme['border']}",
-        "color": theme["title_text"],
-    }
 
-    content_style = {
-        "background": theme["page_bg"],
-        "overflow": "auto",
-        "flex": "1",
-        "minHeight": 0,
-        "color": theme["text"],
-    }
+@app.server.route("/chart/<path:chart_path>")
+def chart_page(chart_path):
+    """
+    直接访问详情页：旧的按位置编址地址与哈希别名以 301 永久重定向到规范地址，其余交给 Dash 页面。
+    """
+    canonical = _canonical_chart_route(GALLERY, request.path)
+    if canonical and canonical != request.path:
+        query = request.query_string.decode()
+        return redirect(f"{canonical}?{query}" if query else canonical, code=301)
+    return app.index()
+
+
+@app.server.route("/api/near-duplicates")
+def near_duplicates_report():
+    groups: dict[str, list[dict]] = {}
+    for image, duplicate in GALLERY.near_duplicates.items():
+        groups.setdefault(duplicate.representative, []).append({"image": image, "distance": duplicate.distance})
+    return jsonify(
+        {
+            "max_distance": AppConfig.near_duplicate_distance,
+            "collapsed": AppConfig.collapse_near_duplicates,
+            "groups": [
+                {"representative": representative, "duplicates": duplicates}
+                for representative, duplicates in groups.items()
+            ],
+        }
+    )
 
-    footer_style = {
-        "background": theme["panel_bg"],
-        "borderTop": f"1px solid {theme['border']}",
-        "padding": "16px 20px 20px 20px",
-    }
 
-    controls_style = {
-        "position": "fixed",
-        "top": "12px",
-        "right": "20px",
-        "zIndex": 1100,
-        "padding": "8px 10px",
-        "display": "flex",
-        "alignItems": "center",
-        "justifyContent": "flex-end",
-        "gap": "8px",
-        "borderRadius": "999px",
-        "border": f"1px solid {theme['border']}",
-        "background": theme["panel_bg"],
-        "boxShadow": "0 2px 10px rgba(0,0,0,0.08)",
-        "color": theme["text"],
-    }
+@app.server.route("/api/mapping-config")
+def mapping_config_status():
+    # 校验失败时返回 422，errors 中列出全部错误，当前生效的仍是 version 对应的上一份有效配置
+    return jsonify({**MAPPING_CONFIG.status(), "visual": VISUAL_PREDICTIONS.status()}), 422 if MAPPING_CONFIG.errors else 200
 
-    theme_btn_icon = fac.AntdIcon(icon="antd-sun") if is_bw_mode else fac.AntdIcon(icon="antd-moon")
-    theme_btn_type = "primary" if is_bw_mode else "default"
-    lang_btn_text = "EN" if lang == "en" else "CN"
-    lang_btn_type = "primary" if lang == "en" else "default"
 
-    return (
-        page_title,
-        page_content,
-        page_title_style,
-        get_menu_items(lang),
-        menu_style,
-        "dark" if is_bw_mode else "light",
-        app_root_style,
-        sider_style,
-        content_style,
-        render_site_footer(theme),
-        footer_style,
-        controls_style,
-        theme_btn_icon,
-        theme_btn_type,
-        lang_btn_text,
-        lang_btn_type,
-    )
+def _request_label() -> str:
+    if request.path == "/_dash-update-component":
+        # Dash 随后读取请求体时复用 Flask 已缓存的解析结果
+        body = request.get_json(silent=True) or {}
+        return f"callback:{body.get('output', '')}"
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+@app.server.before_request
+def start_request_metrics():
+    g.metrics_start = time.perf_counter()
+    g.profile = PROFILER.start()
+    METRICS.route = _request_label()
+
+
+@app.server.after_request
+def record_request_metrics(response):
+    start = g.pop("metrics_start", None)
+    if start is None:
+        # 之前的 before_request 钩子已直接返回响应
+        return response
+    elapsed = time.perf_counter() - start
+    # render_by_route 会把标签细化为页面路由模板
+    route = METRICS.route
+    METRICS.observe("idvti_request_duration_seconds", elapsed, route=route)
+    METRICS.increment("idvti_requests_total", route=route, status=response.status_code)
+    METRICS.increment("idvti_response_bytes_total", response.content_length or 0, route=route)
+
+    profile = g.pop("profile", None)
+    if profile is not None:
+        PROFILER.finish(profile, elapsed, route)
+    return response
+
+
+def _cache_metrics():
+    gallery = GALLERY
+    for name, stats in (("page", PAGE_CACHE.stats()), ("markdown", MARKDOWN_CACHE.stats())):
+        yield f"idvti_{name}_cache_hits_total", "counter", f"{name} cache hits", [({}, stats["hits"])]
+        yield f"idvti_{name}_cache_misses_total", "counter", f"{name} cache misses", [({}, stats["misses"])]
+        yield f"idvti_{name}_cache_entries", "gauge", f"{name} cache entries", [({}, stats["entries"])]
+    yield "idvti_page_cache_warmed_total", "counter", "pages rendered ahead of time by the warmer", [({}, PAGE_CACHE.stats()["warmed"])]
+    default_markdown = _default_r_markdown.cache_info()
+    yield "idvti_default_markdown_cache_hits_total", "counter", "default markdown cache hits", [({}, default_markdown.hits)]
+    yield "idvti_default_markdown_cache_misses_total", "counter", "default markdown cache misses", [({}, default_markdown.misses)]
+    yield "idvti_images", "gauge", "images in the current index snapshot", [({}, len(gallery.images))]
+    yield "idvti_near_duplicate_images", "gauge", "images detected as near-duplicates", [({}, len(gallery.near_duplicates))]
+    yield "idvti_search_documents", "gauge", "documents in the search index", [({}, len(SEARCH_INDEX))]
+    yield "idvti_profiles_saved_total", "counter", "slow request profiles written", [({}, PROFILER.saved)]
+    yield "idvti_mapping_config_version", "gauge", "mapping config snapshots applied", [({}, MAPPING_CONFIG.snapshot.version)]
+    yield "idvti_mapping_config_errors", "gauge", "validation errors in the mapping config file", [({}, len(MAPPING_CONFIG.errors))]
+    yield "idvti_visual_predictions", "gauge", "images with a confident visual category prediction", [({}, len(VISUAL_PREDICTIONS))]
+
+
+METRICS.describe("idvti_request_duration_seconds", "histogram", "request latency by route, including Dash serialisation")
+METRICS.describe("idvti_stage_duration_seconds", "histogram", "time spent in each render stage by route")
+METRICS.describe("idvti_requests_total", "counter", "responses by route and status")
+METRICS.describe("idvti_response_bytes_total", "counter", "response body bytes by route")
+METRICS.describe("idvti_page_cache_lookups_total", "counter", "page cache lookups by route and result")
+METRICS.add_collector(_cache_metrics)
+
+
+@app.server.route("/metrics")
+def metrics():
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+
+COMPRESSOR = ResponseCompressor(min_size=AppConfig.compression_min_size)
+
+
+@app.server.after_request
+def compress_response(response):
+    # 晚于指标钩子注册、因而先于其执行（Flask 逆序调用 after_request），指标中记录的是压缩后的字节数
+    if not AppConfig.response_compression:
+        return response
+    return COMPRESSOR.compress(response)
 
 
 if __name__ == "__main__":
+    IMAGE_INDEX.start_watching(AppConfig.image_index_poll_interval, AppConfig.image_index_full_scan_every)
+    MAPPING_CONFIG.start_watching(AppConfig.mapping_config_poll_interval)
+    VISUAL_PREDICTIONS.start_watching(AppConfig.mapping_config_poll_interval)
     app.run(debug=True)
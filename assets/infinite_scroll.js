@@ -0,0 +1,83 @@
+// 按需加载：
+// - 分类页无限滚动：“加载更多”按钮进入视口时自动触发点击；
+// - 首页走马灯：哨兵幻灯片（data-carousel-sentinel）滑入可视区域时点击隐藏的 home-carousel-more 按钮追加下一批。
+// IntersectionObserver 只在相交状态变化时回调：追加一批后触发元素仍在视口内时需要重新检查，否则加载会停住。
+(function () {
+    // 已点击、等待回调追加内容的按钮；追加完成前不重复点击，避免同一批次被请求两次
+    const pending = new WeakSet();
+
+    function load(button) {
+        if (!button || pending.has(button)) {
+            return;
+        }
+        pending.add(button);
+        button.click();
+    }
+
+    const observer = new IntersectionObserver(
+        (entries) => {
+            entries.forEach((entry) => {
+                if (entry.isIntersecting) {
+                    load(entry.target);
+                }
+            });
+        },
+        { rootMargin: "400px 0px" }
+    );
+
+    // 幻灯片在走马灯内横向裁剪，进入可视区域即为即将播放；每个哨兵只触发一次
+    const sentinelObserver = new IntersectionObserver((entries) => {
+        entries.forEach((entry) => {
+            if (!entry.isIntersecting) {
+                return;
+            }
+            sentinelObserver.unobserve(entry.target);
+            load(document.getElementById("home-carousel-more"));
+        });
+    });
+    const observedSentinels = new WeakSet();
+
+    function appendedInto(mutations, containerId) {
+        return mutations.some(
+            (mutation) =>
+                mutation.addedNodes.length > 0 &&
+                mutation.target instanceof Element &&
+                mutation.target.closest(`#${containerId}`) !== null
+        );
+    }
+
+    // 页面内容由 Dash 回调替换，按钮与幻灯片节点会随路由重新创建
+    let observedButton = null;
+    new MutationObserver((mutations) => {
+        const button = document.getElementById("category-load-more");
+        if (button !== observedButton) {
+            if (observedButton) {
+                observer.unobserve(observedButton);
+            }
+            if (button) {
+                observer.observe(button);
+            }
+            observedButton = button;
+        } else if (button && pending.has(button) && appendedInto(mutations, "category-grid")) {
+            // 一批卡片已追加：重新观察会立即回调一次当前相交状态，按钮仍可见（且未隐藏）时继续加载
+            pending.delete(button);
+            observer.unobserve(button);
+            observer.observe(button);
+        }
+
+        const carouselButton = document.getElementById("home-carousel-more");
+        if (carouselButton && appendedInto(mutations, "home-carousel")) {
+            // 新一批的哨兵在下面开始观察，若已在可视区域内会立即触发下一批
+            pending.delete(carouselButton);
+        }
+
+        // 无限循环模式下的克隆幻灯片（.slick-cloned）不作为哨兵
+        document.querySelectorAll("[data-carousel-sentinel]").forEach((sentinel) => {
+            if (observedSentinels.has(sentinel) || sentinel.closest(".slick-cloned")) {
+                return;
+            }
+            observedSentinels.add(sentinel);
+            sentinelObserver.observe(sentinel);
+        });
+    }).observe(document.body, { childList: true, subtree: true });
+})();
@@ -0,0 +1,76 @@
+"""
+分类器基准：比较逐关键词匹配与预编译正则在合成文件名上的分类耗时，并校验两者结果一致。
+
+运行：python -m benchmarks.bench_classifier [数量]
+"""
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import app
+
+
+def _normalize_text_reference(value: str) -> str:
+    return re.sub(r"[_\-\s]+", "", value).lower()
+
+
+def _detect_category_reference(image_path: str) -> str:
+    """
+    预编译之前的实现：每张图片、每个关键词都做一次正则替换规范化。
+    """
+    mapping = app.MAPPING_CONFIG.snapshot
+    normalized_name = _normalize_text_reference(Path(image_path).stem)
+    override_category = mapping.overrides.get(normalized_name)
+    if override_category:
+        return override_category
+
+    for category in mapping.categories:
+        if category["key"] == "other":
+            continue
+        for keyword in category.get("keywords", []):
+            normalized_keyword = _normalize_text_reference(keyword)
+            if normalized_keyword and normalized_keyword in normalized_name:
+                return category["key"]
+
+    return mapping.default_category
+
+
+def make_filenames(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    keywords = [keyword for category in app.MAPPING_CONFIG.snapshot.categories for keyword in category.get("keywords", [])]
+    fillers = ["使用R语言绘制", "好看的", "进阶版本的", "ggplot2", "复现", "Nature", "微生物", "网络分析", "地图"]
+    names = []
+    for index in range(count):
+        parts = rng.sample(fillers, k=3)
+        for _ in range(rng.randint(0, 2)):
+            parts.insert(rng.randint(0, len(parts)), rng.choice(keywords))
+        names.append(f"assets/imgs/在模仿中精进数据可视化_{index:05d}.{''.join(parts)}.png")
+    return names
+
+
+def _time(func, names: list[str]) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    results = [func(name) for name in names]
+    return time.perf_counter() - start, results
+
+
+def main(argv: list[str]) -> int:
+    count = int(argv[0]) if argv else 10_000
+    names = make_filenames(count)
+
+    reference_seconds, reference_results = _time(_detect_category_reference, names)
+    compiled_seconds, compiled_results = _time(app._detect_category, names)
+
+    mismatches = sum(a != b for a, b in zip(reference_results, compiled_results))
+    print(f"filenames:          {count}")
+    print(f"per-keyword loop:   {reference_seconds * 1000:8.1f} ms")
+    print(f"compiled pattern:   {compiled_seconds * 1000:8.1f} ms")
+    print(f"speedup:            {reference_seconds / compiled_seconds:8.1f}x")
+    print(f"mismatches:         {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
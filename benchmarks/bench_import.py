@@ -0,0 +1,102 @@
+"""
+导入耗时剖析：在全新解释器中以 `-X importtime` 导入 app，按 app 的直接依赖汇总累计耗时（多次运行取中位数），
+并单独测量页面骨架（serve_layout）的构建耗时，用于发现启动成本的回退。
+
+运行：python -m benchmarks.bench_import [--runs N] [--top N] [--budget-ms MS]
+指定 --budget-ms 时，`import app` 总耗时中位数超过预算则以非零状态退出。
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+_IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+_PROBE = """
+import sys, time
+import app
+start = time.perf_counter()
+for _ in range(20):
+    app.serve_layout()
+print("layout_us", int((time.perf_counter() - start) / 20 * 1e6))
+"""
+
+
+def parse_importtime(stderr: str, root: str = "app") -> tuple[dict[str, int], int, int]:
+    """
+    返回 ({直接依赖: 累计微秒}, root 自身微秒, root 累计微秒)。
+
+    -X importtime 按导入完成的顺序输出，子模块先于父模块出现，缩进每层两个空格；
+    root 之前已被导入的模块（例如解释器启动时加载的标准库）不会计入。
+    """
+    pending: list[tuple[int, str, int]] = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = len(indent) // 2
+        if depth == 0 and name == root:
+            children = {child: us for child_depth, child, us in pending if child_depth == 1}
+            return children, int(self_us), int(cumulative_us)
+        if depth == 0:
+            pending.clear()
+        else:
+            pending.append((depth, name, int(cumulative_us)))
+    raise RuntimeError(f"module {root!r} not found in -X importtime output")
+
+
+def run_once() -> tuple[dict[str, int], int, int, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    children, self_us, total_us = parse_importtime(result.stderr)
+    layout_us = int(result.stdout.split("layout_us")[-1])
+    return children, self_us, total_us, layout_us
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    samples: dict[str, list[int]] = defaultdict(list)
+    self_samples, total_samples, layout_samples = [], [], []
+    for _ in range(args.runs):
+        children, self_us, total_us, layout_us = run_once()
+        for name, us in children.items():
+            samples[name].append(us)
+        self_samples.append(self_us)
+        total_samples.append(total_us)
+        layout_samples.append(layout_us)
+
+    rows = sorted(((statistics.median(values), name) for name, values in samples.items()), reverse=True)
+    total_ms = statistics.median(total_samples) / 1000
+
+    print(f"{'module':<40} {'cumulative (ms)':>16}")
+    for us, name in rows[: args.top]:
+        print(f"{name:<40} {us / 1000:>16.1f}")
+    print(f"{'app (self)':<40} {statistics.median(self_samples) / 1000:>16.1f}")
+    print(f"{'import app (total)':<40} {total_ms:>16.1f}")
+    print(f"{'serve_layout() per call':<40} {statistics.median(layout_samples) / 1000:>16.2f}")
+    print(f"median of {args.runs} run(s)")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"import app took {total_ms:.1f} ms, over the {args.budget_ms:.1f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,186 @@
+"""
+近似重复检测基准：生成合成图片（随机折线 / 柱形 / 散点，其中一部分为轻微扰动后的副本），
+统计差值哈希的计算耗时，以及多索引哈希聚类、BK 树聚类与逐一比较代表图片的暴力聚类耗时，
+并校验三者结果一致、植入的副本被检出的比例。
+
+图库哈希两两距离集中在 20~30 位附近，半径 4 的 BK 树查询仍要访问大部分节点，这里保留作对照。
+
+运行：python -m benchmarks.bench_near_duplicates [数量] [--distance N] [--duplicates 比例]
+需要 Pillow。
+"""
+import argparse
+import random
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from config import AppConfig
+from image_pipeline import _difference_hash
+from near_duplicates import NearDuplicate, cluster_near_duplicates, hamming
+
+# 与图库预览尺寸相近，哈希只依赖缩小后的明暗结构
+_EDGE = 128
+
+
+def _draw_figure(rng: random.Random) -> Image.Image:
+    image = Image.new("RGBA", (_EDGE, _EDGE), "white")
+    draw = ImageDraw.Draw(image)
+    kind = rng.choice(("bar", "line", "scatter"))
+    color = tuple(rng.randrange(256) for _ in range(3))
+    if kind == "bar":
+        count = rng.randint(3, 12)
+        width = _EDGE // count
+        for index in range(count):
+            height = rng.randint(8, _EDGE - 8)
+            draw.rectangle((index * width + 2, _EDGE - height, (index + 1) * width - 2, _EDGE), fill=color)
+    elif kind == "line":
+        points = [(x, rng.randint(4, _EDGE - 4)) for x in range(0, _EDGE + 1, rng.choice((8, 16, 32)))]
+        draw.line(points, fill=color, width=rng.randint(2, 6))
+    else:
+        for _ in range(rng.randint(20, 80)):
+            x, y, r = rng.randrange(_EDGE), rng.randrange(_EDGE), rng.randint(2, 6)
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    return image
+
+
+def _perturb(image: Image.Image, rng: random.Random) -> Image.Image:
+    """
+    模拟重新导出的同一张图：轻微模糊、改色或加一行标注。
+    """
+    variant = image.copy()
+    choice = rng.randrange(3)
+    if choice == 0:
+        variant = variant.filter(ImageFilter.GaussianBlur(0.8))
+    elif choice == 1:
+        r, g, b, a = variant.split()
+        variant = Image.merge("RGBA", (g, b, r, a))
+    else:
+        ImageDraw.Draw(variant).text((4, 2), f"v{rng.randint(2, 9)}", fill="black")
+    return variant
+
+
+def make_hashes(count: int, duplicate_ratio: float, seed: int = 0) -> tuple[list[tuple[int, int]], dict[int, int], float]:
+    """
+    返回 ([(编号, 哈希)], {植入副本编号: 原图编号}, 哈希总耗时)。
+    """
+    rng = random.Random(seed)
+    images: list[Image.Image] = []
+    planted = {}
+    for index in range(count):
+        if images and rng.random() < duplicate_ratio:
+            source = rng.randrange(len(images))
+            planted[index] = source
+            images.append(_perturb(images[source], rng))
+        else:
+            images.append(_draw_figure(rng))
+
+    start = time.perf_counter()
+    hashes = [(index, _difference_hash(image)) for index, image in enumerate(images)]
+    return hashes, planted, time.perf_counter() - start
+
+
+class _BKTree:
+    def __init__(self):
+        # 节点：[哈希, 负载, {与父节点的距离: 子节点}]
+        self._root: list | None = None
+
+    def add(self, value: int, payload):
+        if self._root is None:
+            self._root = [value, payload, {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, payload, {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> list[tuple[int, object]]:
+        matches = []
+        pending = [self._root] if self._root is not None else []
+        while pending:
+            node = pending.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                matches.append((distance, node[1]))
+            # 三角不等式：子树中的点与查询点的距离不小于 |d(子, 父) - d(查询, 父)|
+            pending.extend(child for edge, child in node[2].items() if distance - radius <= edge <= distance + radius)
+        return sorted(matches, key=lambda match: match[0])
+
+
+def cluster_bk_tree(items: list[tuple[int, int]], max_distance: int) -> dict[int, NearDuplicate]:
+    representatives = _BKTree()
+    duplicates = {}
+    for key, value in items:
+        if not value:
+            continue
+        matches = representatives.search(value, max_distance)
+        if matches:
+            duplicates[key] = NearDuplicate(matches[0][1], matches[0][0])
+        else:
+            representatives.add(value, key)
+    return duplicates
+
+
+def cluster_brute_force(items: list[tuple[int, int]], max_distance: int) -> dict[int, NearDuplicate]:
+    """
+    与 cluster_near_duplicates 相同的贪心规则，但每张图片都与全部代表图片逐一比较。
+    """
+    representatives: list[tuple[int, int]] = []
+    duplicates = {}
+    for key, value in items:
+        if not value:
+            continue
+        best = None
+        for representative, representative_value in representatives:
+            distance = hamming(value, representative_value)
+            if distance <= max_distance and (best is None or distance < best.distance):
+                best = NearDuplicate(representative, distance)
+        if best is not None:
+            duplicates[key] = best
+        else:
+            representatives.append((key, value))
+    return duplicates
+
+
+def _time(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("count", nargs="?", type=int, default=10_000)
+    parser.add_argument("--distance", type=int, default=AppConfig.near_duplicate_distance)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="植入副本的比例")
+    args = parser.parse_args(argv)
+
+    hashes, planted, hash_seconds = make_hashes(args.count, args.duplicates)
+    index_seconds, index_result = _time(cluster_near_duplicates, hashes, args.distance)
+    tree_seconds, tree_result = _time(cluster_bk_tree, hashes, args.distance)
+    brute_seconds, brute_result = _time(cluster_brute_force, hashes, args.distance)
+
+    # 多索引哈希与暴力聚类的并列规则相同（距离相同取先成为代表的图片），结果应完全一致；
+    # BK 树的并列顺序取决于遍历顺序，只比较是否归为重复以及距离
+    mismatches = sum(index_result.get(key) != brute_result.get(key) for key, _ in hashes)
+    mismatches += sum(
+        tree_result.get(key, NearDuplicate(None, -1)).distance != brute_result.get(key, NearDuplicate(None, -1)).distance
+        for key, _ in hashes
+    )
+    detected = sum(index in index_result for index in planted)
+    print(f"images:             {args.count} ({len(planted)} planted near-duplicates)")
+    print(f"dHash:              {hash_seconds * 1000:8.1f} ms ({hash_seconds / args.count * 1e6:.0f} us/image)")
+    print(f"multi-index hash:   {index_seconds * 1000:8.1f} ms ({brute_seconds / index_seconds:.1f}x vs brute force)")
+    print(f"BK-tree:            {tree_seconds * 1000:8.1f} ms ({brute_seconds / tree_seconds:.1f}x vs brute force)")
+    print(f"brute force:        {brute_seconds * 1000:8.1f} ms")
+    print(f"near-duplicates:    {len(index_result)} found, {detected}/{len(planted)} planted detected")
+    print(f"mismatches:         {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,281 @@
+"""
+路由压测：在临时目录中生成 100 / 1k / 10k 张合成图片，于独立进程中通过 Flask 测试客户端直接驱动
+`/_dash-update-component` 回调与静态资源路由，统计各场景的 p50 / p95 / p99 延迟、吞吐与响应体大小。
+
+每个场景分别以 cached（页面缓存预热）与 uncached（每次请求前清空页面缓存）两种模式测量，
+后者反映 build_carousel / render_category_page 等渲染函数本身随图片数量的变化。
+另输出各场景的响应体大小对比：内联样式 / 共享 CSS 类，以及共享类再经 gzip / brotli 压缩后的字节数。
+主题切换完全在客户端完成，不产生服务端请求，因此不在场景之列。
+
+运行：python -m benchmarks.bench_routes [数量 ...] [--requests N] [--threads N] [--repo]
+--repo 额外以仓库自带的图片集测量一次。需要 Pillow 生成合成图片。
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.bench_startup import make_gallery
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _dash_body(outputs: list[tuple[str, str]], inputs: list[tuple[str, str, object]], state=()) -> dict:
+    if len(outputs) == 1:
+        output = f"{outputs[0][0]}.{outputs[0][1]}"
+    else:
+        output = ".." + "...".join(f"{component}.{prop}" for component, prop in outputs) + ".."
+    return {
+        "output": output,
+        "outputs": [{"id": component, "property": prop} for component, prop in outputs]
+        if len(outputs) > 1
+        else {"id": outputs[0][0], "property": outputs[0][1]},
+        "inputs": [{"id": component, "property": prop, "value": value} for component, prop, value in inputs],
+        "state": [{"id": component, "property": prop, "value": value} for component, prop, value in state],
+        "changedPropIds": [f"{component}.{prop}" for component, prop, _ in inputs[:1]],
+    }
+
+
+def _route_body(pathname: str, search: str = "", lang: str = "zh") -> dict:
+    return _dash_body(
+        [("page-title", "children"), ("page-content", "children")],
+        [("url", "pathname", pathname), ("url", "search", search), ("lang-preference", "data", lang)],
+    )
+
+
+def build_scenarios(app_module) -> dict[str, tuple[bool, list[tuple[str, str, dict | None]]]]:
+    """
+    场景名 -> (是否经过页面缓存, [(方法, 路径, JSON 请求体)])；同一场景的多个请求轮流发送。
+    """
+    update = "/_dash-update-component"
+    gallery = app_module.GALLERY
+    categories = [key for key, images in gallery.by_category.items() if images]
+    details = [
+        app_module._build_chart_route(gallery, image)
+        for key in categories
+        for image in gallery.by_category[key][:3]
+    ]
+    assets = [app_module.image_url(path, app_module.ORIGINAL_RENDITION) for path in gallery.images[:50]]
+
+    scenarios = {
+        "index.html": (False, [("GET", "/", None)]),
+        "layout": (False, [("GET", "/_dash-layout", None)]),
+        "home": (True, [("POST", update, _route_body("/"))]),
+        "home (lang en)": (True, [("POST", update, _route_body("/", lang="en"))]),
+        "category": (True, [("POST", update, _route_body(f"/category/{key}")) for key in categories]),
+        "category (lang en)": (
+            True,
+            [("POST", update, _route_body(f"/category/{key}", lang="en")) for key in categories],
+        ),
+        "detail": (True, [("POST", update, _route_body(path)) for path in details]),
+        "search": (True, [("POST", update, _route_body("/search", "?q=%E7%81%AB%E5%B1%B1%E5%9B%BE"))]),
+        "carousel more": (
+            False,
+            [
+                (
+                    "POST",
+                    update,
+                    _dash_body(
+                        [("home-carousel", "children"), ("home-carousel-state", "data")],
+                        [("home-carousel-more", "nClicks", n)],
+                        [("home-carousel-state", "data", {"offset": app_module.AppConfig.carousel_window + (n - 1) * app_module.AppConfig.carousel_prefetch})],
+                    ),
+                )
+                for n in (1, 2, 3)
+            ],
+        ),
+        "category more": (
+            False,
+            [
+                (
+                    "POST",
+                    update,
+                    _dash_body(
+                        [("category-grid", "children"), ("category-grid-state", "data"), ("category-load-more", "style")],
+                        [("category-load-more", "nClicks", 1)],
+                        [("category-grid-state", "data", {"category": key, "offset": app_module.AppConfig.category_page_size})],
+                    ),
+                )
+                for key in categories
+            ],
+        ),
+        "gallery asset": (False, [("GET", url, None) for url in assets]),
+    }
+    return {name: value for name, value in scenarios.items() if value[1]}
+
+
+def run_scenario(app_module, requests: list, total: int, threads: int, uncached: bool) -> dict:
+    latencies: list[float] = []
+    sizes: list[int] = []
+    statuses: set[int] = set()
+    lock = threading.Lock()
+    cycle = itertools.cycle(requests)
+    local = threading.local()
+
+    def send(_):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app_module.app.server.test_client()
+        with lock:
+            method, path, body = next(cycle)
+            if uncached:
+                app_module.PAGE_CACHE.invalidate()
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        size = len(response.get_data())
+        elapsed = time.perf_counter() - start
+        response.close()
+        with lock:
+            latencies.append(elapsed)
+            sizes.append(size)
+            statuses.add(response.status_code)
+
+    # 预热：每个请求发送一次，确保 cached 模式全部命中
+    for request in requests:
+        method, path, body = request
+        app_module.app.server.test_client().open(path, method=method, json=body).close()
+
+    # uncached 模式测量渲染本身，关闭相邻详情页的后台预热，避免其占用 CPU
+    prefetch_distance = app_module.AppConfig.detail_prefetch_distance
+    if uncached:
+        app_module.AppConfig.detail_prefetch_distance = 0
+    wall_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(send, range(total)))
+    finally:
+        app_module.AppConfig.detail_prefetch_distance = prefetch_distance
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "rps": total / wall,
+        "bytes": statistics.mean(sizes),
+        "statuses": sorted(statuses),
+    }
+
+
+# (列名, 是否启用共享样式类, Accept-Encoding)
+_PAYLOAD_VARIANTS = [
+    ("inline", False, "identity"),
+    ("inline+br", False, "br"),
+    ("classes", True, "identity"),
+    ("classes+gzip", True, "gzip"),
+    ("classes+br", True, "br"),
+]
+
+
+def payload_sizes(app_module) -> dict[str, dict[str, float]]:
+    """
+    每个场景在不同样式模式与压缩方式下的平均响应体字节数（图片等文件流响应除外）。
+    """
+    client = app_module.app.server.test_client()
+    styles_enabled = app_module.SHARED_STYLES.enabled
+    sizes: dict[str, dict[str, float]] = defaultdict(dict)
+    try:
+        for column, classes, encoding in _PAYLOAD_VARIANTS:
+            app_module.SHARED_STYLES.enabled = classes
+            app_module.PAGE_CACHE.invalidate()
+            for name, (_, requests) in build_scenarios(app_module).items():
+                if name == "gallery asset":
+                    continue
+                total = 0
+                for method, path, body in requests:
+                    response = client.open(path, method=method, json=body, headers={"Accept-Encoding": encoding})
+                    total += len(response.get_data())
+                    response.close()
+                sizes[name][column] = total / len(requests)
+    finally:
+        app_module.SHARED_STYLES.enabled = styles_enabled
+        app_module.PAGE_CACHE.invalidate()
+    return dict(sizes)
+
+
+def worker(total: int, threads: int) -> dict:
+    """
+    在当前工作目录（合成图片集）中导入 app 并运行全部场景，结果以 JSON 输出。
+    """
+    sys.path.insert(0, str(REPO_DIR))
+    import app as app_module
+
+    results = {"images": len(app_module.GALLERY.images), "scenarios": {}}
+    for name, (cached_route, requests) in build_scenarios(app_module).items():
+        modes = ("cached", "uncached") if cached_route else ("-",)
+        for mode in modes:
+            stats = run_scenario(app_module, requests, total, threads, uncached=mode == "uncached")
+            results["scenarios"][f"{name} [{mode}]" if cached_route else name] = stats
+    results["payload"] = payload_sizes(app_module)
+    return results
+
+
+def run_worker(work_dir: Path, total: int, threads: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_DIR), os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_routes", "--worker", "--requests", str(total), "--threads", str(threads)],
+        cwd=work_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_results(results: dict):
+    print(f"\n== {results['images']} image(s) ==")
+    print(f"{'scenario':<28} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'req/s':>9} {'bytes':>10}  status")
+    for name, stats in results["scenarios"].items():
+        print(
+            f"{name:<28} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} "
+            f"{stats['rps']:>9.0f} {stats['bytes']:>10.0f}  {','.join(map(str, stats['statuses']))}"
+        )
+
+    columns = [column for column, _, _ in _PAYLOAD_VARIANTS]
+    print(f"\n{'payload bytes':<28}" + "".join(f"{column:>14}" for column in columns))
+    for name, sizes in results["payload"].items():
+        print(f"{name:<28}" + "".join(f"{sizes[column]:>14.0f}" for column in columns))
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("counts", nargs="*", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--requests", type=int, default=200, help="每个场景的请求数")
+    parser.add_argument("--threads", type=int, default=1, help="并发线程数")
+    parser.add_argument("--repo", action="store_true", help="额外测量仓库自带的图片集")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(worker(args.requests, args.threads)))
+        return 0
+
+    if args.repo:
+        print_results(run_worker(REPO_DIR, args.requests, args.threads))
+
+    for count in args.counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            work_dir = Path(tmp)
+            make_gallery(work_dir, count)
+            print_results(run_worker(work_dir, args.requests, args.threads))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
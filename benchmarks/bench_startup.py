@@ -0,0 +1,73 @@
+"""
+冷启动基准：在临时目录中生成 N 张合成图片，分别测量无清单（全量扫描）与有清单时 `import app` 的耗时。
+
+运行：python -m benchmarks.bench_startup [数量 ...]（需要 Pillow）
+"""
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+KEYWORDS = ["柱形图", "火山图", "散点图", "进化树", "气泡图", "热图", "网络图", "地图"]
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {repo!r})
+start = time.perf_counter()
+import app
+print(json.dumps({{"seconds": time.perf_counter() - start, "images": len(app.GALLERY.images)}}))
+"""
+
+
+def make_gallery(work_dir: Path, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    image_dir = work_dir / "assets" / "imgs"
+    image_dir.mkdir(parents=True)
+    for index in range(count):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        name = f"在模仿中精进数据可视化_{index:05d}.使用R语言绘制{rng.choice(KEYWORDS)}.png"
+        Image.new("RGB", (96, 64), color).save(image_dir / name)
+    (work_dir / "public").symlink_to(REPO_DIR / "public")
+
+
+def import_seconds(work_dir: Path) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(repo=str(REPO_DIR))],
+        cwd=work_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str]) -> int:
+    counts = [int(value) for value in argv] or [100, 1000, 5000]
+    runs = 3
+    print(f"{'images':>8} {'no manifest (s)':>16} {'manifest (s)':>14}")
+    for count in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            work_dir = Path(tmp)
+            make_gallery(work_dir, count)
+            manifest_path = work_dir / ".cache" / "image_manifest.json"
+
+            cold = []
+            for _ in range(runs):
+                if manifest_path.exists():
+                    os.remove(manifest_path)
+                cold.append(import_seconds(work_dir)["seconds"])
+
+            warm = [import_seconds(work_dir)["seconds"] for _ in range(runs)]
+            print(f"{count:>8} {statistics.median(cold):>16.3f} {statistics.median(warm):>14.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+"""
+响应压缩：按 Accept-Encoding 对 JSON / HTML / JS / CSS 等文本响应进行 brotli 或 gzip 压缩。
+静态响应（带 ETag，或带一天以上 max-age 的 GET 响应，例如带指纹的 Dash 组件包）
+以更高压缩级别压缩一次后缓存，之后的请求直接复用。
+
+文件流响应（send_file，包括图片与预压缩副本）不经过这里。
+"""
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Brotli 为可选依赖，缺失时只使用 gzip
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+_SKIPPED_STATUSES = {204, 206, 304}
+_STATIC_MIN_MAX_AGE = 24 * 3600
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    encodings = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class ResponseCompressor:
+    def __init__(
+        self,
+        min_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        static_level: int = 9,
+        cache_size: int = 64,
+    ):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        # 静态响应只压缩一次，使用更高的压缩级别
+        self.static_level = static_level
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def negotiate(self, accept_encoding: str) -> str | None:
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _encode(self, data: bytes, encoding: str, static: bool) -> bytes:
+        if encoding == "br":
+            return brotli.compress(data, quality=self.static_level if static else self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.static_level if static else self.gzip_level, mtime=0)
+
+    def compress(self, response):
+        if (
+            response.direct_passthrough
+            or response.status_code < 200
+            or response.status_code in _SKIPPED_STATUSES
+            or "Content-Encoding" in response.headers
+            or not (response.mimetype or "").startswith(_COMPRESSIBLE_TYPES)
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = self.negotiate(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        etag, _ = response.get_etag()
+        max_age = response.cache_control.max_age or 0
+        if etag or (request.method == "GET" and max_age >= _STATIC_MIN_MAX_AGE):
+            cache_key = (etag or request.full_path, encoding)
+            with self._lock:
+                compressed = self._cache.get(cache_key)
+                if compressed is not None:
+                    self._cache.move_to_end(cache_key)
+            if compressed is None:
+                compressed = self._encode(data, encoding, static=True)
+                with self._lock:
+                    self._cache[cache_key] = compressed
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            if etag:
+                # 与 nginx 一致：压缩后的表示只保留弱 ETag
+                response.set_etag(etag, weak=True)
+        else:
+            compressed = self._encode(data, encoding, static=False)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        return response
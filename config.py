@@ -1,3 +1,110 @@
 class AppConfig:
     # app 标签页 title
-    app_title: str = "Improve Data Visualization Through Imitation(IDVTI)"
\ No newline at end of file
+    app_title: str = "Improve Data Visualization Through Imitation(IDVTI)"
+
+    # 图片衍生版本（缩略图等）输出目录
+    derived_image_dir: str = "./.cache/derived"
+
+    # 衍生版本名称 -> 最长边像素，None 表示保持原始分辨率仅重新编码
+    image_renditions: dict = {
+        "thumb": 480,
+        "carousel": 960,
+        "preview": None,
+    }
+
+    # 衍生版本编码格式，按浏览器协商优先级排列
+    image_formats: tuple = ("avif", "webp")
+
+    # 首页走马灯首屏渲染的图片数量，其余图片按批次追加
+    carousel_window: int = 6
+
+    # 每批追加的图片数量
+    carousel_prefetch: int = 4
+
+    # 分类页每页图片数量
+    category_page_size: int = 12
+
+    # 分类页是否默认使用无限滚动（可通过 ?mode=pages / ?mode=scroll 覆盖）
+    category_infinite_scroll: bool = True
+
+    # 页面渲染缓存最多保留的条目数（LRU 淘汰）
+    page_cache_size: int = 256
+
+    # 打开详情页后在后台预热前后各多少张图片的页面（0 表示关闭）
+    detail_prefetch_distance: int = 1
+
+    # 图片目录轮询间隔（秒）
+    image_index_poll_interval: float = 2.0
+
+    # 每隔多少次轮询强制比对一次文件 stat
+    image_index_full_scan_every: int = 30
+
+    # 分类映射配置（public/image_mapping.json）与视觉分类结果的轮询间隔（秒），修改后无需重启即可生效
+    mapping_config_poll_interval: float = 2.0
+
+    # 视觉分类（python visual_classifier.py）：预测结果文件，按内容哈希索引
+    visual_predictions_path: str = "./.cache/visual_categories.json"
+
+    # 按内容哈希缓存的图片特征目录
+    visual_features_cache_dir: str = "./.cache/visual_features"
+
+    # 提取特征的进程数
+    visual_feature_workers: int = 4
+
+    # k 近邻投票的近邻数
+    visual_neighbors: int = 5
+
+    # 只有与样本图片的特征余弦相似度不低于该值的近邻参与投票；图集中已标注的样本较少，
+    # 阈值放宽后同一系列以外的图片也会被投票，预测准确率明显下降
+    visual_min_similarity: float = 0.9
+
+    # 文件名关键词无法识别时，只采用置信度（获胜分类的票数占比）不低于该值的预测
+    visual_min_confidence: float = 0.6
+
+    # 近似重复判定阈值：64 位感知哈希的汉明距离不超过该值视为同一张图（负数表示关闭检测）
+    near_duplicate_distance: int = 4
+
+    # 在首页走马灯与分类网格中折叠近似重复的图片（详情页、搜索不受影响）
+    collapse_near_duplicates: bool = True
+
+    # 搜索结果最多返回的条目数
+    search_result_limit: int = 60
+
+    # R 脚本 Markdown 缓存重新检查文件 mtime 的最短间隔（秒）
+    markdown_recheck_interval: float = 2.0
+
+    # 图片索引启动清单路径
+    image_manifest_path: str = "./.cache/image_manifest.json"
+
+    # 慢请求剖析：按该比例对请求启用 cProfile（0 表示关闭）
+    profile_sample_rate: float = 0.0
+
+    # 只保存耗时超过该值（毫秒）的剖析结果
+    profile_slow_ms: float = 200.0
+
+    # 剖析结果（.prof）输出目录
+    profile_dir: str = "./.cache/profiles"
+
+    # 以共享 CSS 类替代卡片 / 幻灯片上重复的内联样式
+    style_classes: bool = True
+
+    # 文本响应压缩（安装 Brotli 包时优先使用 br，否则使用 gzip）
+    response_compression: bool = True
+
+    # 小于该字节数的响应不压缩
+    compression_min_size: int = 1024
+
+    # R 脚本批量出图（python r_render.py）：Rscript 可执行文件
+    rscript_path: str = "Rscript"
+
+    # 同时运行的 Rscript 进程数
+    r_render_workers: int = 2
+
+    # 单个脚本的运行超时（秒）
+    r_render_timeout: float = 300.0
+
+    # 按脚本哈希缓存的输出目录
+    r_render_cache_dir: str = "./.cache/r_render"
+
+    # 默认图形设备的宽、高（像素）与分辨率（dpi）
+    r_figure_size: tuple = (2400, 1800, 300)
@@ -0,0 +1,374 @@
+"""
+静态站点导出：遍历全部路由（主页、分类分页、图表详情 × 语言），将页面渲染为静态 HTML 与 JSON，
+并复制引用到的图片，生成可直接部署到 CDN 的目录。
+
+运行：python export_static.py [--output ./dist] [--lang zh --lang en]
+"""
+import argparse
+import html as html_lib
+import json
+import re
+import shutil
+import sys
+from collections import deque
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+import app
+from config import AppConfig
+from image_pipeline import DERIVED_DIR, DERIVED_URL_PREFIX, GALLERY_DIR, GALLERY_URL_PREFIX
+from page_cache import serialize_payload
+from shared_styles import style_to_css as _style_to_css
+
+# 只在浏览器端交互中使用的组件，静态页面中直接省略
+_SKIPPED_COMPONENTS = {"Interval", "Store", "Location", "AntdIcon", "AntdButton"}
+_VOID_TAGS = {"img", "br", "hr", "link", "meta", "input"}
+
+_STATIC_CSS = """
+* { box-sizing: border-box; }
+body { margin: 0; font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "PingFang SC", "Microsoft YaHei", sans-serif; }
+.idvti-root { display: flex; min-height: 100vh; background: var(--idvti-page-bg); color: var(--idvti-text); }
+.idvti-sider { width: 220px; flex: 0 0 220px; padding: 16px 0; background: var(--idvti-panel-bg);
+  border-right: 1px solid var(--idvti-border); }
+.idvti-sider a { display: block; padding: 10px 24px; color: var(--idvti-title-text); text-decoration: none; }
+.idvti-sider a.active { font-weight: 600; background: var(--idvti-card-bg); }
+.idvti-lang { margin-top: 16px; border-top: 1px solid var(--idvti-border); padding-top: 8px; }
+.idvti-main { flex: 1; min-width: 0; }
+.idvti-title { font-size: 24px; font-weight: 600; padding: 20px 20px 0 20px; color: var(--idvti-title-text); }
+.idvti-footer { background: var(--idvti-panel-bg); border-top: 1px solid var(--idvti-border); padding: 16px 20px 20px 20px; }
+.idvti-center { display: flex; align-items: center; justify-content: center; }
+.idvti-carousel { display: flex; overflow-x: auto; scroll-snap-type: x mandatory; gap: 12px; }
+.idvti-carousel > * { flex: 0 0 calc(50% - 6px); scroll-snap-align: start; }
+.idvti-image-frame > a { display: block; width: 100%; height: 100%; }
+"""
+
+
+def _markdown_inline(text: str) -> str:
+    text = re.sub(r"`([^`]+)`", lambda m: f"<code>{html_lib.escape(m.group(1), quote=False)}</code>", text)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    return re.sub(r"\[([^\]]+)\]\(([^)\s]+)\)", r'<a href="\2">\1</a>', text)
+
+
+def markdown_to_html(text: str) -> str:
+    """
+    将 render_markdown 的输出（已高亮的 <pre> 代码块 + 普通 Markdown）转换为 HTML，
+    只支持 R 脚本说明中用到的标题、列表、段落与行内代码。
+    """
+    blocks = []
+    paragraph: list[str] = []
+    list_items: list[str] = []
+    lines = iter(text.splitlines())
+
+    def flush():
+        if paragraph:
+            blocks.append(f"<p>{_markdown_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+        if list_items:
+            blocks.append("<ul>" + "".join(f"<li>{_markdown_inline(item)}</li>" for item in list_items) + "</ul>")
+            list_items.clear()
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("<pre"):
+            flush()
+            pre_lines = [line]
+            while "</pre>" not in pre_lines[-1]:
+                next_line = next(lines, None)
+                if next_line is None:
+                    break
+                pre_lines.append(next_line)
+            blocks.append("\n".join(pre_lines))
+        elif not stripped:
+            flush()
+        elif heading := re.match(r"^(#{1,6})\s+(.*)$", stripped):
+            flush()
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{_markdown_inline(heading.group(2))}</h{level}>")
+        elif item := re.match(r"^[-*]\s+(.*)$", stripped):
+            if paragraph:
+                flush()
+            list_items.append(item.group(1))
+        else:
+            if list_items:
+                flush()
+            paragraph.append(stripped)
+    flush()
+    return "\n".join(blocks)
+
+
+class StaticSiteExporter:
+    def __init__(self, output_dir: Path, langs: list[str]):
+        self.output_dir = output_dir
+        self.langs = langs
+        self.assets: dict[str, Path] = {}
+        # 整个导出过程使用同一份图片结构
+        self.gallery = app.GALLERY
+
+    # ---------- URL 映射 ----------
+
+    def static_href(self, href: str, lang: str) -> str:
+        """
+        动态路由 -> 静态目录地址，例如 /category/bar?page=2 -> /en/category/bar/page/2/。
+        """
+        parts = urlsplit(href)
+        path = parts.path.rstrip("/") or "/"
+        page = parse_qs(parts.query).get("page", ["1"])[0]
+        if path.startswith("/category/") and page.isdigit() and int(page) > 1:
+            path = f"{path}/page/{page}"
+
+        prefix = "" if lang == self.langs[0] else f"/{lang}"
+        return f"{prefix}{path}/" if path != "/" else f"{prefix}/"
+
+    def asset_href(self, url: str) -> str:
+        """
+        记录页面引用的图片并返回静态站点中的地址；衍生图片固定导出 WebP 版本。
+        """
+        if url.startswith(f"{GALLERY_URL_PREFIX}/"):
+            digest, relative_path = url[len(GALLERY_URL_PREFIX) + 1 :].split("/", 1)
+            self.assets[f"gallery/{digest}/{unquote(relative_path)}"] = GALLERY_DIR / unquote(relative_path)
+            return url
+        if url.startswith(f"{DERIVED_URL_PREFIX}/"):
+            name = url[len(DERIVED_URL_PREFIX) + 1 :]
+            for fmt in ("webp", *AppConfig.image_formats):
+                source = DERIVED_DIR / f"{name}.{fmt}"
+                if source.exists():
+                    self.assets[f"derived/{name}.{fmt}"] = source
+                    return f"{url}.{fmt}"
+            return url
+
+        local_path = url.lstrip("/")
+        self.assets[local_path] = Path(local_path)
+        return f"/{local_path}"
+
+    # ---------- 组件 JSON -> HTML ----------
+
+    def to_html(self, node, lang: str) -> str:
+        if node is None or isinstance(node, bool):
+            return ""
+        if isinstance(node, (str, int, float)):
+            return html_lib.escape(str(node), quote=False)
+        if isinstance(node, list):
+            return "".join(self.to_html(child, lang) for child in node)
+
+        component_type = node.get("type")
+        props = node.get("props", {})
+        if component_type in _SKIPPED_COMPONENTS:
+            return ""
+
+        style = _style_to_css(props.get("style"))
+        children = props.get("children")
+
+        if component_type == "Link":
+            href = self.static_href(props.get("href", "/"), lang)
+            return self._tag("a", style, self.to_html(children, lang), href=href, class_=props.get("className"))
+        if component_type == "AntdImage":
+            preview = props.get("preview")
+            preview_src = preview.get("src") if isinstance(preview, dict) else None
+            image = self._tag(
+                "img",
+                style,
+                src=self.asset_href(props["src"]),
+                alt=props.get("alt", ""),
+                loading="lazy",
+                decoding="async",
+            )
+            if not preview_src:
+                return image
+            return self._tag("a", "", image, href=self.asset_href(preview_src), target="_blank")
+        if component_type == "Markdown":
+            return self._tag("div", style, markdown_to_html(children or ""))
+        if component_type == "AntdCenter":
+            return self._tag("div", style, self.to_html(children, lang), class_="idvti-center")
+        if component_type == "AntdCarousel":
+            return self._tag("div", style, self.to_html(children, lang), class_="idvti-carousel")
+        if component_type == "Img" and "idvti-prefetch" in (props.get("className") or ""):
+            # 静态站点的图片不做格式协商，直接使用 <link rel=prefetch>
+            return self._tag("link", "", rel="prefetch", href=self.asset_href(props["src"]))
+        if node.get("namespace") == "dash_html_components":
+            return self._tag(
+                component_type.lower(),
+                style,
+                self.to_html(children, lang),
+                src=props.get("src"),
+                class_=props.get("className"),
+            )
+        return self._tag("div", style, self.to_html(children, lang))
+
+    @staticmethod
+    def _tag(name: str, style: str, inner: str = "", **attributes) -> str:
+        attributes["style"] = style
+        rendered = "".join(
+            f' {key.rstrip("_")}="{html_lib.escape(str(value))}"' for key, value in attributes.items() if value
+        )
+        if name in _VOID_TAGS:
+            return f"<{name}{rendered}>"
+        return f"<{name}{rendered}>{inner}</{name}>"
+
+    # ---------- 页面 ----------
+
+    def _css(self) -> str:
+        light_vars = _style_to_css(app.get_theme_css_vars(False))
+        dark_vars = _style_to_css(app.get_theme_css_vars(True))
+        return (
+            f":root {{ {light_vars} }}\n"
+            f"@media (prefers-color-scheme: dark) {{ :root {{ {dark_vars} }} }}\n"
+            f"{_STATIC_CSS}"
+            f"{app.SHARED_STYLES.css}"
+        )
+
+    def _sider(self, lang: str, current_path: str) -> str:
+        links = []
+        for item in app.get_menu_items(lang):
+            key = item["props"]["key"]
+            href = "/" if key == "home" else f"/category/{key}"
+            active = current_path == href or (href != "/" and current_path.startswith(href))
+            links.append(
+                self._tag(
+                    "a",
+                    "",
+                    html_lib.escape(item["props"]["title"]),
+                    href=self.static_href(href, lang),
+                    class_="active" if active else "",
+                )
+            )
+
+        lang_links = [
+            self._tag("a", "", app.tr(other, f"lang_{other}"), href=self.static_href(current_path, other))
+            for other in self.langs
+            if other != lang
+        ]
+        lang_switch = self._tag("div", "", "".join(lang_links), class_="idvti-lang")
+        return self._tag("nav", "", "".join(links) + lang_switch, class_="idvti-sider")
+
+    def render_page(self, route: str, lang: str, title: str, content) -> str:
+        footer = serialize_payload(app.render_site_footer(app.THEME_VARS))
+        return (
+            "<!DOCTYPE html>\n"
+            f'<html lang="{"en" if lang == "en" else "zh-CN"}">\n<head>\n<meta charset="utf-8">\n'
+            '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+            f"<title>{html_lib.escape(title)} - {html_lib.escape(AppConfig.app_title)}</title>\n"
+            f"<style>{self._css()}</style>\n</head>\n<body>\n"
+            '<div class="idvti-root">'
+            f"{self._sider(lang, urlsplit(route).path)}"
+            '<main class="idvti-main">'
+            f'<div class="idvti-title">{html_lib.escape(title)}</div>'
+            f"{self.to_html(content, lang)}"
+            f'<footer class="idvti-footer">{self.to_html(footer, lang)}</footer>'
+            "</main></div>\n</body>\n</html>\n"
+        )
+
+    def _render_route(self, route: str, lang: str) -> tuple[str, object]:
+        # 不经过 render_by_route：它会在后台预热相邻详情页，而导出本身就会逐页渲染全部页面
+        parts = urlsplit(route)
+        route_query = app._parse_category_query(f"?{parts.query}") if parts.path.startswith("/category/") else None
+        title, content = serialize_payload(app._render_route(self.gallery, parts.path, route_query, lang))
+        if parts.path == "/":
+            content = self._expand_home_carousel(content)
+        return title, content
+
+    def _expand_home_carousel(self, content):
+        """
+        静态页面没有分批追加的回调，首页走马灯直接包含全部图片（与在线首页一样折叠近似重复图片）。
+        """
+        all_slides = serialize_payload(
+            [app._build_carousel_slide(self.gallery, image) for image in self.gallery.carousel_images]
+        )
+
+        def expand(node):
+            if isinstance(node, list):
+                return [expand(child) for child in node]
+            if not isinstance(node, dict):
+                return node
+            props = dict(node.get("props", {}))
+            if props.get("id") == "home-carousel":
+                props["children"] = all_slides
+            elif "children" in props:
+                props["children"] = expand(props["children"])
+            return {**node, "props": props}
+
+        return expand(content)
+
+    @staticmethod
+    def _collect_links(node, hrefs: list[str]):
+        if isinstance(node, list):
+            for child in node:
+                StaticSiteExporter._collect_links(child, hrefs)
+        elif isinstance(node, dict):
+            props = node.get("props", {})
+            if node.get("type") == "Link" and props.get("href"):
+                hrefs.append(props["href"])
+            StaticSiteExporter._collect_links(props.get("children"), hrefs)
+
+    @staticmethod
+    def _normalize_route(href: str) -> str:
+        # 分类页统一以分页模式导出，静态页面无法执行无限滚动回调
+        parts = urlsplit(href)
+        if parts.path.startswith("/category/"):
+            page = parse_qs(parts.query).get("page", ["1"])[0]
+            return f"{parts.path}?{urlencode({'mode': 'pages', 'page': page})}"
+        return parts.path
+
+    def _write(self, relative_path: str, content: str):
+        target = self.output_dir / relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content, encoding="utf-8")
+
+    def export(self) -> int:
+        seeds = ["/", *[f"/category/{category['key']}" for category in app.MAPPING_CONFIG.snapshot.categories]]
+        page_count = 0
+        for lang in self.langs:
+            queue = deque(self._normalize_route(route) for route in seeds)
+            visited = set(queue)
+            while queue:
+                route = queue.popleft()
+                title, content = self._render_route(route, lang)
+                relative_dir = self.static_href(route, lang).strip("/")
+                self._write(f"{relative_dir}/index.html".lstrip("/"), self.render_page(route, lang, title, content))
+                self._write(f"{relative_dir}/page.json".lstrip("/"), json.dumps([title, content], ensure_ascii=False))
+                page_count += 1
+
+                hrefs: list[str] = []
+                self._collect_links(content, hrefs)
+                for href in hrefs:
+                    next_route = self._normalize_route(href)
+                    if next_route not in visited:
+                        visited.add(next_route)
+                        queue.append(next_route)
+
+        not_found_title = app.tr(self.langs[0], "not_found")
+        not_found_content = app.tr(self.langs[0], "not_found_route")
+        self._write("404.html", self.render_page("/404", self.langs[0], not_found_title, not_found_content))
+
+        for relative_path, source in self.assets.items():
+            target = self.output_dir / relative_path
+            if source.is_file() and not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source, target)
+
+        return page_count
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Export every route as a static site.")
+    parser.add_argument("--output", default="./dist", help="output directory (default: ./dist)")
+    parser.add_argument(
+        "--lang",
+        action="append",
+        choices=sorted(app.I18N),
+        help="languages to export, the first one is served from the site root",
+    )
+    parser.add_argument("--clean", action="store_true", help="remove the output directory first")
+    args = parser.parse_args(argv)
+
+    output_dir = Path(args.output)
+    if args.clean and output_dir.exists():
+        shutil.rmtree(output_dir)
+
+    exporter = StaticSiteExporter(output_dir, args.lang or ["zh", "en"])
+    page_count = exporter.export()
+    print(f"Exported {page_count} page(s) and {len(exporter.assets)} asset(s) to {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,39 @@
+"""
+后台轮询线程：图片索引、分类映射配置与视觉预测结果共用，按固定间隔检查文件变化。
+"""
+import logging
+import threading
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PollingWatcher:
+    def __init__(self, poll: Callable[[int], object], name: str, description: str):
+        # poll(轮询序号)，序号从 1 开始；description 用于错误日志
+        self.poll = poll
+        self.name = name
+        self.description = description
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, interval: float):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self, interval: float):
+        polls = 0
+        while not self._stop_event.wait(interval):
+            polls += 1
+            try:
+                self.poll(polls)
+            except Exception:
+                # 轮询线程不能因单次重载失败而退出
+                logger.exception("Failed to refresh %s", self.description)
@@ -0,0 +1,42 @@
+"""
+gunicorn 配置：gunicorn -c gunicorn.conf.py wsgi:server
+
+- preload_app：主进程导入 app 一次，图片索引、分类与映射配置在 fork 后以写时复制方式被所有 worker 共享；
+- 平滑重启：kill -HUP <master pid> 逐个替换 worker（preload 模式下不会重新加载代码），
+  更新代码请使用 kill -USR2 <master pid> 启动新主进程，确认正常后再向旧主进程发送 QUIT。
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("IDVTI_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("IDVTI_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("IDVTI_THREADS", 2))
+worker_class = "gthread"
+preload_app = True
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# 定期回收 worker，避免长期运行的内存碎片累积
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    # 冻结预加载阶段创建的对象，避免 worker 中的 GC 触碰这些页面而破坏写时复制
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # 轮询线程无法跨 fork 继承，需要在每个 worker 中单独启动
+    from app import IMAGE_INDEX, MAPPING_CONFIG, VISUAL_PREDICTIONS
+    from config import AppConfig
+
+    IMAGE_INDEX.start_watching(AppConfig.image_index_poll_interval, AppConfig.image_index_full_scan_every)
+    MAPPING_CONFIG.start_watching(AppConfig.mapping_config_poll_interval)
+    VISUAL_PREDICTIONS.start_watching(AppConfig.mapping_config_poll_interval)
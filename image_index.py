@@ -0,0 +1,278 @@
+"""
+图片索引：记录每张图片的路径、大小、修改时间、内容哈希、排序键、分类、尺寸、占位与感知哈希等元数据，
+轮询目录变化并只对新增 / 修改的文件重新哈希与分类，最后整体替换快照。
+
+索引会持久化为启动清单（JSON），目录 mtime 与分类规则未变化时启动只需读取这一个文件。
+"""
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from file_watcher import PollingWatcher
+from image_pipeline import content_hash, image_metadata, remember_hash
+
+logger = logging.getLogger(__name__)
+
+# 预压缩副本与临时文件不作为图片收录
+_IGNORED_SUFFIXES = (".br", ".gz", ".tmp")
+
+# 清单格式变化时递增，旧清单会被忽略并重新扫描
+MANIFEST_VERSION = 4
+
+# 新增 / 修改的图片并行提取元数据（Pillow 解码期间释放 GIL）
+_METADATA_WORKERS = min(8, os.cpu_count() or 1)
+
+
+@dataclass(frozen=True)
+class ImageEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    hash: str
+    sort_key: int
+    category: str
+    width: int | None = None
+    height: int | None = None
+    color: str | None = None
+    placeholder: str | None = None
+    phash: int | None = None
+    # 首次收录该路径的批次序号，文件修改后保持不变；同编号图片按收录先后分配详情页 slug
+    first_seen: int = 0
+
+
+@dataclass(frozen=True)
+class ImageSnapshot:
+    version: int
+    entries: tuple[ImageEntry, ...]
+
+    @property
+    def images(self) -> list[str]:
+        return [entry.path for entry in self.entries]
+
+
+class ImageIndex:
+    def __init__(
+        self,
+        root: Path,
+        sort_key: Callable[[Path], int],
+        classify: Callable[[str], str],
+        on_change: Callable[[ImageSnapshot], None] | None = None,
+        manifest_path: Path | None = None,
+        classifier_version: str = "",
+    ):
+        self.root = root
+        self.sort_key = sort_key
+        self.classify = classify
+        self.on_change = on_change
+        self.manifest_path = manifest_path
+        # 分类规则的指纹，规则变化后清单中的分类结果作废
+        self.classifier_version = classifier_version
+        self.snapshot = ImageSnapshot(version=0, entries=())
+        self._dir_mtimes: dict[str, int] = {}
+        # 过期清单中各图片的首次收录序号，全量重新扫描时沿用
+        self._first_seen: dict[str, int] = {}
+        self._refresh_lock = threading.Lock()
+        self._full_scan_every = 30
+        self._watcher = PollingWatcher(
+            lambda polls: self.refresh(force=polls % self._full_scan_every == 0),
+            "image-index-watcher",
+            f"image index for {root}",
+        )
+
+    def _scan_dir_mtimes(self) -> dict[str, int]:
+        mtimes = {}
+        if not self.root.is_dir():
+            return mtimes
+
+        pending = [self.root.as_posix()]
+        while pending:
+            current = pending.pop()
+            try:
+                mtimes[current] = os.stat(current).st_mtime_ns
+                with os.scandir(current) as it:
+                    pending.extend(item.path for item in it if item.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+        return mtimes
+
+    def _scan_files(self, dir_mtimes: dict[str, int]) -> dict[str, os.stat_result]:
+        files = {}
+        for directory in dir_mtimes:
+            try:
+                with os.scandir(directory) as it:
+                    for item in it:
+                        # 与 rglob("*.*") 保持一致：只收录带扩展名的文件
+                        if item.is_file() and "." in item.name and not item.name.endswith(_IGNORED_SUFFIXES):
+                            files[Path(item.path).as_posix()] = item.stat()
+            except OSError:
+                continue
+        return files
+
+    def load(self) -> bool:
+        """
+        启动入口：清单有效时直接载入，否则全量扫描并写出新清单。返回是否命中清单。
+        """
+        if self.load_manifest():
+            return True
+        self.refresh(force=True)
+        return False
+
+    def load_manifest(self) -> bool:
+        if self.manifest_path is None:
+            return False
+
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+
+        if (
+            not isinstance(manifest, dict)
+            or manifest.get("version") != MANIFEST_VERSION
+            or manifest.get("root") != self.root.as_posix()
+        ):
+            return False
+
+        try:
+            entries = tuple(ImageEntry(*row) for row in manifest["entries"])
+        except (KeyError, TypeError):
+            return False
+
+        # 只 stat 目录即可判断是否有文件增删，不逐个 stat 图片
+        dir_mtimes = self._scan_dir_mtimes()
+        if manifest.get("classifier") != self.classifier_version or manifest.get("dir_mtimes") != dir_mtimes:
+            # 清单已过期需要重新扫描，但收录先后顺序仍然有效，保证详情页 slug 不变
+            self._first_seen = {entry.path: entry.first_seen for entry in entries}
+            return False
+
+        with self._refresh_lock:
+            for entry in entries:
+                remember_hash(entry.path, entry.size, entry.mtime_ns, entry.hash)
+            self._dir_mtimes = dir_mtimes
+            self._swap(entries, persist=False)
+        return True
+
+    def save_manifest(self):
+        if self.manifest_path is None:
+            return
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "root": self.root.as_posix(),
+            "classifier": self.classifier_version,
+            "dir_mtimes": self._dir_mtimes,
+            "entries": [
+                [getattr(entry, field) for field in ImageEntry.__dataclass_fields__]
+                for entry in self.snapshot.entries
+            ],
+        }
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，多个 worker 同时写入时也不会留下半截清单
+            tmp_path = self.manifest_path.with_name(f".{self.manifest_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(self.manifest_path)
+        except OSError:
+            logger.exception("Failed to write image manifest %s", self.manifest_path)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        目录结构未变化时直接返回；否则增量更新并在有变化时替换快照，返回是否发生变化。
+        """
+        with self._refresh_lock:
+            dir_mtimes = self._scan_dir_mtimes()
+            if not force and dir_mtimes == self._dir_mtimes:
+                return False
+
+            previous = {entry.path: entry for entry in self.snapshot.entries}
+            # 本次新收录的图片统一排在此前收录的全部图片之后（序号随清单持久化，重启后仍递增）
+            next_seen = max(
+                [entry.first_seen for entry in previous.values()] + list(self._first_seen.values()), default=0
+            ) + 1
+            entries = []
+            pending = []
+            for path, stat in self._scan_files(dir_mtimes).items():
+                entry = previous.get(path)
+                if entry is None or entry.size != stat.st_size or entry.mtime_ns != stat.st_mtime_ns:
+                    if entry is not None:
+                        first_seen = entry.first_seen
+                    else:
+                        first_seen = self._first_seen.get(path, next_seen)
+                    pending.append((path, stat, first_seen))
+                else:
+                    entries.append(entry)
+
+            if pending:
+                with ThreadPoolExecutor(max_workers=_METADATA_WORKERS) as executor:
+                    entries.extend(executor.map(lambda item: self._build_entry(*item), pending))
+
+            changed = bool(pending) or len(entries) != len(previous)
+            self._dir_mtimes = dir_mtimes
+            if not changed and self.snapshot.version:
+                return False
+
+            entries.sort(key=lambda item: (item.sort_key, item.path))
+            self._first_seen = {}
+            self._swap(tuple(entries))
+            return True
+
+    def _build_entry(self, path: str, stat: os.stat_result, first_seen: int) -> ImageEntry:
+        metadata = image_metadata(path)
+        return ImageEntry(
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            hash=content_hash(path),
+            sort_key=self.sort_key(Path(path)),
+            category=self.classify(path),
+            width=metadata.width,
+            height=metadata.height,
+            color=metadata.color,
+            placeholder=metadata.placeholder,
+            phash=metadata.phash,
+            first_seen=first_seen,
+        )
+
+    def reclassify(self, classifier_version: str | None = None) -> bool:
+        """
+        分类规则变化后只重新计算分类，不重新哈希文件。
+        """
+        with self._refresh_lock:
+            version_changed = classifier_version is not None and classifier_version != self.classifier_version
+            if version_changed:
+                self.classifier_version = classifier_version
+            entries = tuple(
+                replace(entry, category=self.classify(entry.path))
+                for entry in self.snapshot.entries
+            )
+            if entries == self.snapshot.entries:
+                if version_changed:
+                    # 分类结果未变，但清单需记录新的规则指纹，否则下次启动会全量重新扫描
+                    self.save_manifest()
+                return False
+            self._swap(entries)
+            return True
+
+    def _swap(self, entries: tuple[ImageEntry, ...], persist: bool = True):
+        # 整体替换快照对象，读取方始终看到完整一致的一份数据
+        self.snapshot = ImageSnapshot(version=self.snapshot.version + 1, entries=entries)
+        if self.on_change:
+            self.on_change(self.snapshot)
+        if persist:
+            self.save_manifest()
+
+    def start_watching(self, interval: float, full_scan_every: int = 30):
+        """
+        后台轮询：平时只比较目录 mtime，每 full_scan_every 次强制比对一次文件 stat，
+        以发现不改变目录 mtime 的原地覆盖写入。
+        """
+        self._full_scan_every = full_scan_every
+        self._watcher.start(interval)
+
+    def stop_watching(self):
+        self._watcher.stop()
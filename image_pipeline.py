@@ -0,0 +1,342 @@
+"""
+图片衍生版本构建与服务：为 assets/imgs 下的每张图片按内容哈希生成多种尺寸的 WebP/AVIF 版本。
+
+构建：python image_pipeline.py [--force]
+"""
+import base64
+import hashlib
+import io
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from urllib.parse import quote
+
+from flask import abort, redirect, request, send_file
+from werkzeug.security import safe_join
+
+from config import AppConfig
+
+
+DERIVED_DIR = Path(AppConfig.derived_image_dir)
+DERIVED_URL_PREFIX = "/derived"
+GALLERY_DIR = Path("./assets/imgs/")
+GALLERY_URL_PREFIX = "/gallery"
+ORIGINAL_RENDITION = "original"
+
+
+@lru_cache(maxsize=1)
+def _pillow():
+    """
+    首次需要解码图片时才导入 Pillow：命中启动清单时服务进程完全不加载它。
+    Pillow 为可选依赖，缺失时返回 None，页面直接回退到原图。
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+_FORMAT_MIMETYPES = {"avif": "image/avif", "webp": "image/webp"}
+# 预压缩文件后缀 -> Content-Encoding，按优先级排列
+_PRECOMPRESSED_ENCODINGS = [(".br", "br"), (".gz", "gzip")]
+_SAVE_OPTIONS = {
+    "avif": {"quality": 60},
+    "webp": {"quality": 80, "method": 4},
+}
+_DERIVED_NAME_PATTERN = re.compile(r"^([0-9a-f]{16})-([a-z]+)$")
+
+# 路径 -> (文件大小, 修改时间, 内容哈希)，避免每次渲染都重新读取整张图片
+_HASH_CACHE: dict[str, tuple[int, int, str]] = {}
+
+
+def content_hash(image_path: str | Path) -> str:
+    path = Path(image_path)
+    stat = path.stat()
+    cache_key = path.as_posix()
+    cached = _HASH_CACHE.get(cache_key)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    digest = hashlib.blake2b(path.read_bytes(), digest_size=8).hexdigest()
+    _HASH_CACHE[cache_key] = (stat.st_size, stat.st_mtime_ns, digest)
+    return digest
+
+
+def remember_hash(image_path: str, size: int, mtime_ns: int, digest: str):
+    """
+    由图片索引 / 启动清单预先填充哈希缓存，避免首次渲染时重新读取整张图片。
+    """
+    _HASH_CACHE[Path(image_path).as_posix()] = (size, mtime_ns, digest)
+
+
+@dataclass(frozen=True)
+class ImageMetadata:
+    width: int | None = None
+    height: int | None = None
+    # 主色（#rrggbb），图片加载前作为占位背景色
+    color: str | None = None
+    # 最长边 PLACEHOLDER_EDGE 像素的低清预览图（data URI），内联在页面中
+    placeholder: str | None = None
+    # 64 位差值哈希（dHash），用于近似重复检测
+    phash: int | None = None
+
+
+PLACEHOLDER_EDGE = 16
+
+# dHash 比较 (DHASH_SIZE + 1) x DHASH_SIZE 灰度缩略图中横向相邻的像素，得到 DHASH_SIZE² 位
+DHASH_SIZE = 8
+
+
+def _difference_hash(image) -> int:
+    """
+    明暗关系只取决于图像结构，对缩放、重新编码、轻微调色不敏感。
+    """
+    width = DHASH_SIZE + 1
+    pixels = image.convert("L").resize((width, DHASH_SIZE), _pillow().BOX).tobytes()
+    value = 0
+    for row in range(DHASH_SIZE):
+        for column in range(DHASH_SIZE):
+            offset = row * width + column
+            value = (value << 1) | (pixels[offset] > pixels[offset + 1])
+    return value
+
+
+def image_metadata(image_path: str | Path) -> ImageMetadata:
+    """
+    读取宽高并生成主色与低清占位图；JPEG 借助 draft 只解码缩小后的像素。
+    Pillow 缺失或文件无法识别时返回空元数据，页面退回到无占位的渲染方式。
+    """
+    Image = _pillow()
+    if Image is None:
+        return ImageMetadata()
+    try:
+        with Image.open(image_path) as source:
+            width, height = source.size
+            source.draft("RGB", (PLACEHOLDER_EDGE * 4, PLACEHOLDER_EDGE * 4))
+            # 先在原始模式下整数倍缩小再转换颜色模式，避免对整张大图做转换
+            reduced = source if source.mode in ("RGB", "RGBA", "L", "LA") else source.convert("RGBA")
+            preview = reduced.reduce(max(1, min(reduced.size) // (PLACEHOLDER_EDGE * 4))).convert("RGBA")
+    except (OSError, ValueError):
+        return ImageMetadata()
+
+    # 感知哈希取自缩小前的预览（最短边约 PLACEHOLDER_EDGE * 4 像素），细节保留更多，区分度更高
+    phash = _difference_hash(Image.alpha_composite(Image.new("RGBA", preview.size, "white"), preview))
+    preview.thumbnail((PLACEHOLDER_EDGE * 2, PLACEHOLDER_EDGE * 2), Image.BOX)
+    # 含透明像素的图片加载后仍会透出背景，此时只记录主色、不生成占位图
+    transparent = preview.getchannel("A").getextrema()[0] < 255
+    preview = Image.alpha_composite(Image.new("RGBA", preview.size, "white"), preview).convert("RGB")
+    # 量化为 4 色后取像素最多的颜色，比平均色更接近观感上的背景色
+    quantized = preview.quantize(colors=4)
+    palette = quantized.getpalette()
+    _, index = max(quantized.getcolors())
+    color = "#{:02x}{:02x}{:02x}".format(*palette[index * 3 : index * 3 + 3])
+
+    if transparent:
+        return ImageMetadata(width=width, height=height, color=color, phash=phash)
+
+    preview.thumbnail((PLACEHOLDER_EDGE, PLACEHOLDER_EDGE), Image.BOX)
+    fmt = "webp" if "webp" in _supported_formats() else "png"
+    buffer = io.BytesIO()
+    preview.save(buffer, format=fmt.upper(), **({"quality": 40} if fmt == "webp" else {"optimize": True}))
+    placeholder = f"data:image/{fmt};base64,{base64.b64encode(buffer.getvalue()).decode('ascii')}"
+    return ImageMetadata(width=width, height=height, color=color, placeholder=placeholder, phash=phash)
+
+
+@lru_cache(maxsize=1)
+def _supported_formats() -> tuple[str, ...]:
+    if _pillow() is None:
+        return ()
+    from PIL import features
+
+    return tuple(fmt for fmt in AppConfig.image_formats if features.check(fmt))
+
+
+def _derived_file(digest: str, rendition: str, fmt: str) -> Path:
+    return DERIVED_DIR / f"{digest}-{rendition}.{fmt}"
+
+
+def build_derivatives(image_path: str | Path, force: bool = False) -> list[Path]:
+    """
+    为单张图片生成全部衍生版本，已存在的文件默认跳过。
+    """
+    formats = _supported_formats()
+    if not formats:
+        return []
+
+    digest = content_hash(image_path)
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    Image = _pillow()
+    with Image.open(image_path) as source:
+        source = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+        for rendition, max_edge in AppConfig.image_renditions.items():
+            targets = [
+                (fmt, _derived_file(digest, rendition, fmt))
+                for fmt in formats
+                if force or not _derived_file(digest, rendition, fmt).exists()
+            ]
+            if not targets:
+                continue
+
+            resized = source.copy()
+            if max_edge:
+                resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+            for fmt, target in targets:
+                # 先写临时文件再替换，避免并发请求读到半截文件
+                tmp_target = target.with_name(f".{target.name}.tmp")
+                resized.save(tmp_target, format=fmt.upper(), **_SAVE_OPTIONS.get(fmt, {}))
+                tmp_target.replace(target)
+                written.append(target)
+
+    return written
+
+
+def _gallery_url(image_path: str, digest: str) -> str:
+    try:
+        relative_path = Path(image_path).relative_to(GALLERY_DIR)
+    except ValueError:
+        return image_path
+    return f"{GALLERY_URL_PREFIX}/{digest}/{quote(relative_path.as_posix())}"
+
+
+def image_url(image_path: str, rendition: str) -> str:
+    """
+    返回指定尺寸版本的访问地址（路径中带内容哈希，可长期缓存）；衍生版本尚未构建时回退到原图。
+    """
+    try:
+        digest = content_hash(image_path)
+    except OSError:
+        return image_path
+
+    if rendition != ORIGINAL_RENDITION and any(
+        _derived_file(digest, rendition, fmt).exists() for fmt in AppConfig.image_formats
+    ):
+        return f"{DERIVED_URL_PREFIX}/{digest}-{rendition}"
+    return _gallery_url(image_path, digest)
+
+
+def _send_immutable(file_path: Path, etag: str, mimetype: str | None = None, vary: str | None = None):
+    """
+    以强 ETag + immutable 缓存头返回文件：
+    - 支持 If-None-Match / Range（werkzeug conditional 响应）；
+    - 存在 .br / .gz 预压缩文件且客户端接受时直接返回压缩版本（Range 请求始终返回原文件）；
+    - 文件体经 wsgi.file_wrapper 输出，gunicorn 下会使用 sendfile 零拷贝发送。
+    """
+    accept_encoding = request.headers.get("Accept-Encoding", "")
+    content_encoding = None
+    if "Range" not in request.headers:
+        for suffix, encoding in _PRECOMPRESSED_ENCODINGS:
+            compressed_path = file_path.with_name(file_path.name + suffix)
+            if encoding in accept_encoding and compressed_path.is_file():
+                file_path, content_encoding = compressed_path, encoding
+                etag = f"{etag}-{encoding}"
+                break
+
+    response = send_file(
+        file_path.resolve(),
+        mimetype=mimetype or _guess_mimetype(file_path),
+        conditional=True,
+        etag=etag,
+        max_age=_IMMUTABLE_MAX_AGE,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    vary_headers = [header for header in [vary, "Accept-Encoding"] if header]
+    response.headers["Vary"] = ", ".join(vary_headers)
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    return response
+
+
+def _guess_mimetype(file_path: Path) -> str | None:
+    suffix = file_path.suffix.lower()
+    if suffix in (".br", ".gz"):
+        suffix = Path(file_path.stem).suffix.lower()
+    return {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".gif": "image/gif"}.get(suffix)
+
+
+def send_gallery_image(digest: str, relative_path: str):
+    """
+    返回 assets/imgs 下的原图；URL 中的哈希与当前内容不一致时重定向到最新地址。
+    """
+    file_path = safe_join(GALLERY_DIR.as_posix(), relative_path)
+    if file_path is None or not Path(file_path).is_file():
+        abort(404)
+
+    current_digest = content_hash(file_path)
+    if current_digest != digest:
+        return redirect(_gallery_url(Path(file_path).as_posix(), current_digest))
+    return _send_immutable(Path(file_path), etag=digest)
+
+
+def _accepts(mimetype: str) -> bool:
+    # 只认明确列出的类型：不支持 AVIF / WebP 的浏览器同样会发送 image/* 或 */*
+    return any(value == mimetype and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def _original_for_digest(digest: str) -> Path | None:
+    for path, (_, _, cached_digest) in list(_HASH_CACHE.items()):
+        if cached_digest == digest and Path(path).is_file() and content_hash(path) == digest:
+            return Path(path)
+    return None
+
+
+def send_derivative(name: str):
+    """
+    在磁盘上已有的 AVIF/WebP 版本中按请求头 Accept 协商，文件名含内容哈希可长期缓存；
+    客户端不接受任何已有版本时回退到原图。
+    """
+    match = _DERIVED_NAME_PATTERN.match(name)
+    if not match or match.group(2) not in AppConfig.image_renditions:
+        abort(404)
+
+    digest, rendition = match.groups()
+    available = [
+        (fmt, file_path)
+        for fmt in AppConfig.image_formats
+        if (file_path := _derived_file(digest, rendition, fmt)).exists()
+    ]
+    for fmt, file_path in available:
+        if _accepts(_FORMAT_MIMETYPES[fmt]):
+            return _send_immutable(
+                file_path,
+                etag=f"{digest}-{rendition}-{fmt}",
+                mimetype=_FORMAT_MIMETYPES[fmt],
+                vary="Accept",
+            )
+
+    original = _original_for_digest(digest)
+    if original is None:
+        abort(404)
+    return _send_immutable(original, etag=f"{digest}-{rendition}-original", vary="Accept")
+
+
+def main(argv: list[str]) -> int:
+    if _pillow() is None:
+        print("Pillow is required to build image derivatives: pip install Pillow")
+        return 1
+
+    force = "--force" in argv
+    photo_dir = Path("./assets/imgs/")
+    images = sorted(p for p in photo_dir.rglob("*.*") if p.is_file())
+    total_written = 0
+    # AVIF 编码较慢，按图片并行构建
+    with ProcessPoolExecutor() as executor:
+        for image, written in zip(images, executor.map(build_derivatives, images, [force] * len(images))):
+            total_written += len(written)
+            print(f"{image.name}: {len(written)} file(s)")
+
+    print(f"Done. {len(images)} image(s), {total_written} derivative file(s) written to {DERIVED_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,343 @@
+"""
+分类映射配置：读取 public/image_mapping.json 并按结构校验，生成不可变、带版本号的快照；
+后台轮询文件 mtime，内容变化且校验通过时整体替换快照，校验失败时保留上一份有效快照并报告错误。
+
+读取方每次只取一次 snapshot 引用，同一次分类 / 渲染中不会看到新旧配置混杂的结果。
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from file_watcher import PollingWatcher
+
+logger = logging.getLogger(__name__)
+
+_SEPARATOR_PATTERN = re.compile(r"[_\-\s]+")
+
+DEFAULT_CHART_CATEGORIES = [
+    {
+        "key": "line",
+        "title_zh": "折线图",
+        "title_en": "Line Chart",
+        "icon": "antd-line-chart",
+        "description_zh": "适合展示趋势变化，支持多序列对比和时间维度分析。",
+        "description_en": "Good for trends over time and multi-series comparison.",
+        "keywords": ["line", "trend", "timeseries", "折线", "曲线", "趋势"],
+    },
+    {
+        "key": "scatter",
+        "title_zh": "散点图",
+        "title_en": "Scatter Plot",
+        "icon": "antd-dot-chart",
+        "description_zh": "适合观察变量相关性、离群点与聚类分布。",
+        "description_en": "Great for correlation, outliers, and cluster distribution.",
+        "keywords": ["scatter", "dot", "point", "散点", "点图"],
+    },
+    {
+        "key": "heatmap",
+        "title_zh": "热力图",
+        "title_en": "Heatmap",
+        "icon": "antd-area-chart",
+        "description_zh": "适合展示二维矩阵强度、空间热点和密度变化。",
+        "description_en": "Useful for matrix intensity, hotspots, and density shifts.",
+        "keywords": ["heatmap", "heat", "matrix", "热点", "热力", "矩阵"],
+    },
+    {
+        "key": "bubble",
+        "title_zh": "气泡图",
+        "title_en": "Bubble Chart",
+        "icon": "antd-bulb",
+        "description_zh": "适合展示三维信息：横轴、纵轴与气泡大小。",
+        "description_en": "Shows three dimensions: x, y, and bubble size.",
+        "keywords": ["bubble", "气泡", "气泡图"],
+    },
+    {
+        "key": "bar",
+        "title_zh": "柱形图",
+        "title_en": "Bar Chart",
+        "icon": "antd-bar-chart",
+        "description_zh": "适合展示类别间数值比较，例如分组对比和排序。",
+        "description_en": "Best for category comparison, grouping, and ranking.",
+        "keywords": ["bar", "column", "hist", "柱", "条形", "柱形", "柱状"],
+    },
+    {
+        "key": "tree",
+        "title_zh": "进化树",
+        "title_en": "Phylogenetic Tree",
+        "icon": "antd-apartment",
+        "description_zh": "适合展示系统发育关系、层级结构和分支演化。",
+        "description_en": "Ideal for phylogeny, hierarchy, and branch evolution.",
+        "keywords": ["tree", "phylo", "clade", "dendro", "进化树", "系统发育", "树图"],
+    },
+    {
+        "key": "other",
+        "title_zh": "其他图表",
+        "title_en": "Other Charts",
+        "icon": "antd-app-store",
+        "description_zh": "未命中关键词的图片会自动归入此分类。",
+        "description_en": "Images unmatched by keywords are grouped here.",
+        "keywords": [],
+    },
+]
+
+# 未命中任何关键词的图片归入该分类，配置中缺失时自动补上
+OTHER_CATEGORY = DEFAULT_CHART_CATEGORIES[-1]
+
+_CATEGORY_TEXT_FIELDS = ("title_zh", "title_en", "icon", "description_zh", "description_en")
+_CATEGORY_FIELDS = {"key", "keywords", *_CATEGORY_TEXT_FIELDS}
+_TOP_LEVEL_FIELDS = {"categories", "default_category", "image_category_map"}
+
+
+def normalize_text(value: str) -> str:
+    return _SEPARATOR_PATTERN.sub("", value).lower()
+
+
+def _digest(value) -> str:
+    text = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def validate_mapping(data) -> list[str]:
+    """
+    返回全部校验错误（空列表表示通过），每条错误以 JSON 路径开头，例如 "categories[2].keywords: ..."。
+    """
+    if not isinstance(data, dict):
+        return ["$: expected an object"]
+
+    errors = [f"{name}: unknown field" for name in sorted(set(data) - _TOP_LEVEL_FIELDS)]
+    category_keys = {OTHER_CATEGORY["key"]}
+
+    categories = data.get("categories")
+    if categories is None:
+        category_keys.update(category["key"] for category in DEFAULT_CHART_CATEGORIES)
+    elif not isinstance(categories, list) or not categories:
+        errors.append("categories: expected a non-empty list")
+    else:
+        seen = set()
+        for index, category in enumerate(categories):
+            path = f"categories[{index}]"
+            if not isinstance(category, dict):
+                errors.append(f"{path}: expected an object")
+                continue
+            errors.extend(f"{path}.{name}: unknown field" for name in sorted(set(category) - _CATEGORY_FIELDS))
+
+            key = category.get("key")
+            if not isinstance(key, str) or not key.strip():
+                errors.append(f"{path}.key: expected a non-empty string")
+            elif key in seen:
+                errors.append(f"{path}.key: duplicate category {key!r}")
+            else:
+                seen.add(key)
+            for name in _CATEGORY_TEXT_FIELDS:
+                if name in category and not isinstance(category[name], str):
+                    errors.append(f"{path}.{name}: expected a string")
+
+            keywords = category.get("keywords", [])
+            if not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords):
+                errors.append(f"{path}.keywords: expected a list of strings")
+        category_keys.update(seen)
+
+    default_category = data.get("default_category")
+    if default_category is not None and not isinstance(default_category, str):
+        errors.append("default_category: expected a string")
+    elif default_category is not None and default_category not in category_keys:
+        errors.append(f"default_category: unknown category {default_category!r}")
+
+    image_category_map = data.get("image_category_map")
+    if image_category_map is not None:
+        if not isinstance(image_category_map, dict):
+            errors.append("image_category_map: expected an object")
+        else:
+            for name, category_key in image_category_map.items():
+                if not normalize_text(name):
+                    errors.append(f"image_category_map[{name!r}]: empty image name")
+                elif not isinstance(category_key, str):
+                    errors.append(f"image_category_map[{name!r}]: expected a string")
+                elif category_key not in category_keys:
+                    errors.append(f"image_category_map[{name!r}]: unknown category {category_key!r}")
+
+    return errors
+
+
+def _compile_keyword_matcher(categories: tuple[dict, ...]) -> tuple[re.Pattern | None, tuple[str, ...]]:
+    """
+    将全部分类关键词规范化后编译为一个正则，每个分类对应一个命名分组（按分类顺序排列）。
+    外层使用零宽前瞻，使文件名的每个位置都会被尝试，避免较早的匹配吞掉后面优先级更高的关键词。
+    """
+    category_keys = []
+    groups = []
+    for category in categories:
+        if category["key"] == OTHER_CATEGORY["key"]:
+            continue
+
+        keywords = {normalize_text(keyword) for keyword in category.get("keywords", [])}
+        keywords.discard("")
+        if not keywords:
+            continue
+
+        alternation = "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+        groups.append(f"(?P<c{len(category_keys)}>{alternation})")
+        category_keys.append(category["key"])
+
+    if not groups:
+        return None, tuple(category_keys)
+    return re.compile(f"(?=(?:{'|'.join(groups)}))"), tuple(category_keys)
+
+
+@dataclass(frozen=True)
+class MappingSnapshot:
+    version: int
+    categories: tuple[dict, ...]
+    # 规范化图片名 -> 分类 key
+    overrides: dict[str, str]
+    default_category: str
+    category_map: dict[str, dict] = field(repr=False)
+    keyword_pattern: re.Pattern | None = field(repr=False)
+    keyword_keys: tuple[str, ...] = field(repr=False)
+    # 分类规则指纹：只覆盖影响分类结果的字段，修改标题 / 描述不会触发重新分类
+    fingerprint: str
+    # 分类 key -> 该分类全部字段的指纹，用于只重建内容变化的分类相关数据
+    category_digests: dict[str, str] = field(repr=False)
+
+    def classify(self, normalized_name: str) -> str:
+        return self.match(normalized_name) or self.default_category
+
+    def match(self, normalized_name: str) -> str | None:
+        """
+        按单图覆盖与关键词分类，都未命中时返回 None（由调用方决定回退分类）。
+        """
+        override_category = self.overrides.get(normalized_name)
+        if override_category:
+            return override_category
+
+        if self.keyword_pattern is None:
+            return None
+
+        # 同一位置按分类顺序优先匹配，取全部位置中最靠前的分类，与逐个分类检查关键词的结果一致
+        best_rank = None
+        for match in self.keyword_pattern.finditer(normalized_name):
+            rank = int(match.lastgroup[1:])
+            if best_rank is None or rank < best_rank:
+                best_rank = rank
+                if rank == 0:
+                    break
+
+        return None if best_rank is None else self.keyword_keys[best_rank]
+
+
+def build_snapshot(data: dict, version: int) -> MappingSnapshot:
+    """
+    由已通过 validate_mapping 的配置生成快照。
+    """
+    categories = tuple(data.get("categories") or DEFAULT_CHART_CATEGORIES)
+    if not any(category["key"] == OTHER_CATEGORY["key"] for category in categories):
+        categories += (OTHER_CATEGORY,)
+    overrides = {
+        normalize_text(name): category_key
+        for name, category_key in (data.get("image_category_map") or {}).items()
+    }
+    default_category = data.get("default_category") or OTHER_CATEGORY["key"]
+    keyword_pattern, keyword_keys = _compile_keyword_matcher(categories)
+    rules = [[(category["key"], category.get("keywords", [])) for category in categories], overrides, default_category]
+    return MappingSnapshot(
+        version=version,
+        categories=categories,
+        overrides=overrides,
+        default_category=default_category,
+        category_map={category["key"]: category for category in categories},
+        keyword_pattern=keyword_pattern,
+        keyword_keys=keyword_keys,
+        fingerprint=_digest(rules),
+        category_digests={category["key"]: _digest(category) for category in categories},
+    )
+
+
+class MappingConfig:
+    def __init__(self, path: Path, on_change: Callable[[MappingSnapshot, MappingSnapshot], None] | None = None):
+        self.path = path
+        # on_change(新快照, 旧快照)，在替换快照后调用
+        self.on_change = on_change
+        self.snapshot = build_snapshot({}, version=0)
+        # 最近一次读取的校验错误；非空时 snapshot 仍是上一份有效配置
+        self.errors: tuple[str, ...] = ()
+        self._mtime_ns: int | None = None
+        self._reload_lock = threading.Lock()
+        self._watcher = PollingWatcher(lambda polls: self.refresh(), "mapping-config-watcher", f"mapping config {path}")
+
+    def _stat_mtime_ns(self) -> int:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def _read(self) -> tuple[dict | None, list[str]]:
+        # 文件不存在时使用内置默认分类
+        if not self.path.is_file():
+            return {}, []
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError) as exc:
+            return None, [f"$: cannot read {self.path}: {exc}"]
+        except ValueError as exc:
+            return None, [f"$: invalid JSON: {exc}"]
+        errors = validate_mapping(data)
+        return (None if errors else data), errors
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        文件 mtime 未变化时直接返回；否则重新读取并校验，通过且内容变化时替换快照，返回是否替换。
+        """
+        with self._reload_lock:
+            mtime_ns = self._stat_mtime_ns()
+            if not force and mtime_ns == self._mtime_ns:
+                return False
+
+            try:
+                data, errors = self._read()
+            except Exception as exc:
+                # 校验代码未覆盖的异常同样记为错误并保留上一份快照；不记录 mtime，下次轮询重试
+                logger.exception("Failed to load mapping config %s", self.path)
+                self.errors = (f"$: cannot load {self.path}: {exc!r}",)
+                return False
+            self._mtime_ns = mtime_ns
+            self.errors = tuple(errors)
+            if data is None:
+                logger.error(
+                    "Ignoring invalid mapping config %s, keeping version %d:\n  %s",
+                    self.path,
+                    self.snapshot.version,
+                    "\n  ".join(errors),
+                )
+                return False
+
+            snapshot = build_snapshot(data, version=self.snapshot.version + 1)
+            previous = self.snapshot
+            if snapshot.category_digests == previous.category_digests and snapshot.fingerprint == previous.fingerprint:
+                # 只有格式 / 空白变化
+                return False
+
+            self.snapshot = snapshot
+            if self.on_change:
+                self.on_change(snapshot, previous)
+            return True
+
+    def status(self) -> dict:
+        return {
+            "path": self.path.as_posix(),
+            "version": self.snapshot.version,
+            "fingerprint": self.snapshot.fingerprint,
+            "categories": [category["key"] for category in self.snapshot.categories],
+            "overrides": len(self.snapshot.overrides),
+            "errors": list(self.errors),
+        }
+
+    def start_watching(self, interval: float):
+        self._watcher.start(interval)
+
+    def stop_watching(self):
+        self._watcher.stop()
@@ -0,0 +1,134 @@
+"""
+R 脚本 Markdown 缓存：按路径与 mtime 缓存预渲染结果，代码块在服务端完成语法高亮。
+"""
+import html as html_lib
+import os
+import re
+import stat
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+_FENCE_PATTERN = re.compile(r"^```[ \t]*([\w+-]*)[^\n]*\n(.*?)^```[ \t]*$", re.MULTILINE | re.DOTALL)
+# 只转义可能构成 HTML 标签的 "<"，保留 R 中常见的 "<-" 赋值符
+_TAG_OPEN_PATTERN = re.compile(r"<(?=[A-Za-z/!?])")
+# 行内代码（`x <- a<b`）：Markdown 原样显示其中的文本，不能转义；
+# 不跨越空行，被反斜杠转义的反引号不作为开头，其余 "<" 仍按标签开头转义
+_INLINE_CODE_OR_TAG_PATTERN = re.compile(
+    r"(?<![`\\])(?P<ticks>`+)(?!`)(?:(?!\n[ \t]*\n).)+?(?<!`)(?P=ticks)(?!`)|" + _TAG_OPEN_PATTERN.pattern,
+    re.DOTALL,
+)
+_CODE_BLOCK_STYLE = (
+    "background: var(--idvti-empty-bg); border: 1px solid var(--idvti-border); "
+    "border-radius: 8px; padding: 12px; overflow: auto; font-size: 13px; line-height: 1.5"
+)
+
+
+@lru_cache(maxsize=1)
+def _pygments():
+    # 首次渲染代码块时才导入；Pygments 为可选依赖，缺失时代码块仅做转义
+    try:
+        import pygments
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return None
+    return pygments.highlight, HtmlFormatter, get_lexer_by_name, ClassNotFound
+
+
+def _highlight_code(code: str, language: str) -> str:
+    pygments = _pygments() if language else None
+    if pygments is not None:
+        highlight, HtmlFormatter, get_lexer_by_name, ClassNotFound = pygments
+        try:
+            lexer = get_lexer_by_name(language)
+        except ClassNotFound:
+            lexer = None
+        if lexer is not None:
+            return highlight(code, lexer, HtmlFormatter(nowrap=True, noclasses=True))
+    return html_lib.escape(code)
+
+
+def _escape_tags(text: str) -> str:
+    # 行内代码原样保留，其余标签开头的 "<" 转义
+    return _INLINE_CODE_OR_TAG_PATTERN.sub(lambda match: match.group() if match.group("ticks") else "&lt;", text)
+
+
+def render_markdown(text: str) -> str:
+    """
+    代码块转换为带内联样式的 <pre>（HTML 块在 </pre> 处结束，代码中的空行不会打断它），
+    其余文本保持 Markdown 并转义标签开头的 "<"（行内代码除外），使原始 HTML 不会被浏览器执行。
+    """
+    parts = []
+    position = 0
+    for match in _FENCE_PATTERN.finditer(text):
+        parts.append(_escape_tags(text[position : match.start()]))
+        code = _highlight_code(match.group(2), match.group(1).lower())
+        parts.append(f'<pre style="{_CODE_BLOCK_STYLE}"><code>{code.rstrip()}</code></pre>\n')
+        position = match.end()
+    parts.append(_escape_tags(text[position:]))
+    return "".join(parts)
+
+
+@dataclass
+class _CachedFile:
+    mtime_ns: int | None
+    rendered: str | None
+    checked_at: float
+
+
+class MarkdownCache:
+    def __init__(self, recheck_interval: float = 2.0):
+        self.recheck_interval = recheck_interval
+        self.hits = 0
+        self.misses = 0
+        self._files: dict[str, _CachedFile] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> str | None:
+        """
+        返回预渲染后的 Markdown，文件不存在时返回 None；
+        recheck_interval 秒内重复访问不再 stat 文件。
+        """
+        key = path.as_posix()
+        now = time.monotonic()
+        cached = self._files.get(key)
+        if cached and now - cached.checked_at < self.recheck_interval:
+            with self._lock:
+                self.hits += 1
+            return cached.rendered
+
+        try:
+            file_stat = os.stat(key)
+            mtime_ns = file_stat.st_mtime_ns if stat.S_ISREG(file_stat.st_mode) else None
+        except OSError:
+            mtime_ns = None
+
+        if cached and cached.mtime_ns == mtime_ns:
+            cached.checked_at = now
+            with self._lock:
+                self.hits += 1
+            return cached.rendered
+
+        rendered = render_markdown(path.read_text(encoding="utf-8")) if mtime_ns is not None else None
+        with self._lock:
+            self.misses += 1
+            self._files[key] = _CachedFile(mtime_ns=mtime_ns, rendered=rendered, checked_at=now)
+        return rendered
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._files),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,196 @@
+"""
+运行时指标：按路由 / 阶段记录耗时直方图、响应体字节数与缓存命中次数，以 Prometheus 文本格式导出；
+可按比例对请求采样 cProfile，只保留耗时超过阈值的慢请求剖析结果。
+
+指标保存在进程内存中，gunicorn 多 worker 部署时每次抓取只反映处理该请求的 worker（以 pid 标签区分）。
+"""
+import cProfile
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# 秒；覆盖缓存命中（亚毫秒）到冷渲染大图集（数百毫秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# 采集函数返回 (指标名, 类型, 说明, [(标签, 值)])
+Collector = Callable[[], Iterable[tuple[str, str, str, list[tuple[dict, float]]]]]
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._help: dict[str, tuple[str, str]] = {}
+        # 直方图：指标名 -> 标签元组 -> [各桶计数..., 总和, 总数]
+        self._histograms: dict[str, dict[tuple, list]] = defaultdict(dict)
+        self._counters: dict[str, dict[tuple, float]] = defaultdict(lambda: defaultdict(float))
+        self._collectors: list[Collector] = []
+        self._context = threading.local()
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self._help[name] = (kind, help_text)
+
+    def add_collector(self, collector: Collector):
+        """
+        抓取时才调用的采集函数，用于导出缓存统计等已由其他对象维护的数值。
+        """
+        self._collectors.append(collector)
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                series = self._histograms[name][key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] += amount
+
+    # 当前线程正在处理的请求所属路由，阶段耗时以此作为 route 标签
+    @property
+    def route(self) -> str:
+        return getattr(self._context, "route", "unknown")
+
+    @route.setter
+    def route(self, value: str):
+        self._context.route = value
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("idvti_stage_duration_seconds", time.perf_counter() - start, stage=name, route=self.route)
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def render(self) -> str:
+        """
+        Prometheus 文本格式（version 0.0.4）。
+        """
+        pid = os.getpid()
+        lines = []
+
+        def header(name: str, default_kind: str, default_help: str = ""):
+            kind, help_text = self._help.get(name, (default_kind, default_help))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            histograms = {name: {key: list(series) for key, series in values.items()} for name, values in self._histograms.items()}
+            counters = {name: dict(values) for name, values in self._counters.items()}
+
+        for name, values in sorted(histograms.items()):
+            header(name, "histogram")
+            for key, series in sorted(values.items()):
+                labels = {**dict(key), "pid": pid}
+                for bound, count in zip((*self.buckets, float("inf")), (*series[:-2], series[-1])):
+                    lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {series[-1]}")
+
+        for name, values in sorted(counters.items()):
+            header(name, "counter")
+            for key, value in sorted(values.items()):
+                lines.append(f"{name}{_format_labels({**dict(key), 'pid': pid})} {_format_value(value)}")
+
+        for collector in self._collectors:
+            try:
+                collected = list(collector())
+            except Exception:
+                logger.exception("Metrics collector %r failed", collector)
+                continue
+            for name, kind, help_text, samples in collected:
+                header(name, kind, help_text)
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels({**labels, 'pid': pid})} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+class SlowRequestProfiler:
+    """
+    以 sample_rate 的概率对请求启用 cProfile，请求耗时超过 slow_seconds 时写出 .prof 文件，
+    目录中只保留最近 keep 个文件。可用 python -m pstats 或 snakeviz 查看。
+    """
+
+    def __init__(self, directory: Path, sample_rate: float = 0.0, slow_seconds: float = 0.2, keep: int = 50):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.keep = keep
+        self.saved = 0
+        self._sequence = itertools.count()
+
+    def start(self) -> cProfile.Profile | None:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 同一线程已有其他剖析器在运行（例如调试器）
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, elapsed: float, label: str) -> Path | None:
+        profile.disable()
+        if elapsed < self.slow_seconds:
+            return None
+
+        safe_label = "".join(char if char.isalnum() else "_" for char in label).strip("_") or "request"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._sequence):04d}-{int(elapsed * 1000)}ms-{safe_label}"
+        path = self.directory / f"{name}.prof"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(path)
+            self.saved += 1
+            self._prune()
+        except OSError:
+            logger.exception("Failed to write profile %s", path)
+            return None
+        return path
+
+    def _prune(self):
+        profiles = sorted(self.directory.glob("*.prof"), key=lambda item: item.stat().st_mtime_ns)
+        for stale in profiles[: max(0, len(profiles) - self.keep)]:
+            stale.unlink(missing_ok=True)
@@ -0,0 +1,90 @@
+"""
+近似重复检测：以图片的 64 位差值哈希（dHash）的汉明距离衡量相似度，距离不超过阈值视为近似重复。
+
+查找使用多索引哈希：把哈希切成 max_distance + 1 段，距离不超过 max_distance 的两个哈希至少有一段完全相同
+（抽屉原理），因此只需比较任一分段落在同一桶中的候选，聚类总耗时远低于两两比较的 O(n²)。
+"""
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass
+
+HASH_BITS = 64
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class MultiIndexHash:
+    def __init__(self, max_distance: int, bits: int = HASH_BITS):
+        self.max_distance = max_distance
+        segments = max(1, min(bits, max_distance + 1))
+        # (右移位数, 掩码)：前 bits % segments 段各多占一位
+        self._segments = []
+        offset = 0
+        for index in range(segments):
+            width = bits // segments + (1 if index < bits % segments else 0)
+            self._segments.append((offset, (1 << width) - 1))
+            offset += width
+        # 每段一个表：分段取值 -> [(插入序号, 哈希, 负载)]
+        self._tables: list[dict[int, list[tuple[int, int, Hashable]]]] = [{} for _ in self._segments]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, payload: Hashable):
+        entry = (self._size, value, payload)
+        self._size += 1
+        for table, (shift, mask) in zip(self._tables, self._segments):
+            table.setdefault((value >> shift) & mask, []).append(entry)
+
+    def search(self, value: int) -> list[tuple[int, Hashable]]:
+        """
+        返回距离不超过 max_distance 的全部 (距离, 负载)，按距离升序，距离相同时先加入的在前。
+        """
+        seen = set()
+        matches = []
+        for table, (shift, mask) in zip(self._tables, self._segments):
+            for order, candidate, payload in table.get((value >> shift) & mask, ()):
+                if order in seen:
+                    continue
+                seen.add(order)
+                distance = hamming(value, candidate)
+                if distance <= self.max_distance:
+                    matches.append((distance, order, payload))
+        matches.sort(key=lambda match: match[:2])
+        return [(distance, payload) for distance, _, payload in matches]
+
+
+@dataclass(frozen=True)
+class NearDuplicate:
+    # 保留展示的代表图片
+    representative: Hashable
+    distance: int
+
+
+def cluster_near_duplicates(
+    items: Iterable[tuple[Hashable, int | None]],
+    max_distance: int,
+) -> dict[Hashable, NearDuplicate]:
+    """
+    按给定顺序贪心聚类：与已有代表图片的距离不超过 max_distance 时归入最近的一张，否则自身成为代表图片。
+    返回 {重复图片: NearDuplicate}；max_distance 为负数时不做检测。
+
+    哈希为 0（纯色 / 没有明暗变化的图片）不含结构信息，不参与比较。
+    """
+    if max_distance < 0:
+        return {}
+
+    representatives = MultiIndexHash(max_distance)
+    duplicates = {}
+    for key, value in items:
+        if not value:
+            continue
+        matches = representatives.search(value)
+        if matches:
+            distance, representative = matches[0]
+            duplicates[key] = NearDuplicate(representative, distance)
+        else:
+            representatives.add(value, key)
+    return duplicates
@@ -0,0 +1,85 @@
+"""
+页面渲染缓存：按规范化路由与语言缓存已转换为 JSON 结构的页面，重复访问只需一次字典查找。
+"""
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from plotly.io.json import to_json_plotly
+
+
+def serialize_payload(value):
+    """
+    将组件树转换为纯 JSON 结构，Dash 再次编码时无需逐个调用 to_plotly_json。
+    """
+    return json.loads(to_json_plotly(value))
+
+
+class PageCache:
+    def __init__(self, max_entries: int = 256, serialize: Callable = serialize_payload):
+        self.max_entries = max_entries
+        self.serialize = serialize
+        self.hits = 0
+        self.misses = 0
+        self.warmed = 0
+        # key -> (version, payload)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: Hashable, render: Callable, version: Hashable = None):
+        """
+        条目记录渲染时的 version，只有与本次 version 相同才算命中；
+        version 按页面各自的依赖计算，某个页面的内容变化不会让其他页面的缓存失效。
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        payload = self.serialize(render())
+        self._store(key, version, payload)
+        return payload
+
+    def contains(self, key: Hashable, version: Hashable = None) -> bool:
+        with self._lock:
+            cached = self._entries.get(key)
+            return cached is not None and cached[0] == version
+
+    def warm(self, key: Hashable, render: Callable, version: Hashable = None) -> bool:
+        """
+        预热：条目缺失或过期时在后台渲染写入，不计入命中 / 未命中统计。返回是否实际渲染。
+        """
+        if self.contains(key, version):
+            return False
+        self._store(key, version, self.serialize(render()))
+        with self._lock:
+            self.warmed += 1
+        return True
+
+    def _store(self, key: Hashable, version: Hashable, payload):
+        with self._lock:
+            # version 在渲染前计算：渲染期间内容若已变化，下次请求的 version 不同，会重新渲染
+            self._entries[key] = (version, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "warmed": self.warmed,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
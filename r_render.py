@@ -0,0 +1,309 @@
+"""
+R 脚本批量出图：从 public/r_scripts/<图片名>.md 中提取 ```r 代码块，在隔离的临时目录中以 Rscript 运行，
+把生成的图片写回图库（assets/imgs），再由图片索引增量收录，避免手动上传的图片与脚本不一致。
+
+- 有界并发：同时运行的 Rscript 进程不超过 workers 个，每个作业单独超时，超时后终止整个进程组；
+- 按脚本哈希缓存：成功的输出保存在 cache_dir/<哈希>/，脚本未变化的作业不再运行；
+- 只处理与图库中图片同名的 Markdown，分类级模板（<分类key>.md）不会运行。
+
+运行：python r_render.py [图片名 ...] [--workers N] [--timeout 秒] [--force] [--rscript 路径]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import AppConfig
+from image_pipeline import GALLERY_DIR, build_derivatives
+
+R_SCRIPT_DIR = Path("./public/r_scripts")
+
+# 包装脚本或输出格式变化时递增，旧缓存随之失效
+RENDER_VERSION = 1
+
+_R_BLOCK_PATTERN = re.compile(r"^```[ \t]*\{?[rR](?:[ \t,][^\n]*)?\}?[ \t]*\n(.*?)^```[ \t]*$", re.MULTILINE | re.DOTALL)
+
+_FIGURE_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp")
+
+# 默认图形设备输出到工作目录；脚本自行 ggsave / png() 保存的图片优先于设备输出
+_DEVICE_PREFIX = ".device-"
+_R_PRELUDE = """options(warn = 1)
+grDevices::png("{prefix}%02d.png", width = {width}, height = {height}, res = {dpi})
+"""
+_R_EPILOGUE = "\ninvisible(grDevices::graphics.off())\n"
+
+# 失败时日志中保留的末尾字符数
+_LOG_TAIL = 4000
+
+
+def extract_r_code(markdown: str) -> str:
+    """
+    提取全部 ```r / ```{r} 代码块并按出现顺序拼接。
+    """
+    return "\n\n".join(block.strip("\n") for block in _R_BLOCK_PATTERN.findall(markdown))
+
+
+def script_digest(code: str) -> str:
+    return hashlib.blake2b(f"{RENDER_VERSION}\n{code}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    # 图片名（不含扩展名），与 Markdown 文件名一致
+    name: str
+    code: str
+    digest: str
+    # 图库中被替换的图片
+    target: Path
+
+
+@dataclass(frozen=True)
+class RenderResult:
+    name: str
+    digest: str
+    # ok / cached / failed / timeout / no-figure
+    status: str
+    # 排队等待与 Rscript 运行耗时（秒）
+    wait_seconds: float = 0.0
+    run_seconds: float = 0.0
+    figure: str | None = None
+    # 是否改写了图库中的图片
+    published: bool = False
+    message: str = ""
+
+
+def collect_jobs(
+    script_dir: Path = R_SCRIPT_DIR,
+    gallery_dir: Path = GALLERY_DIR,
+    names: set[str] | None = None,
+) -> list[RenderJob]:
+    gallery = {
+        path.stem: path
+        for path in sorted(gallery_dir.rglob("*.*"))
+        if path.is_file() and path.suffix.lower() in _FIGURE_SUFFIXES
+    }
+    jobs = []
+    for markdown_path in sorted(script_dir.glob("*.md")) if script_dir.is_dir() else []:
+        target = gallery.get(markdown_path.stem)
+        if target is None or (names and markdown_path.stem not in names):
+            continue
+        code = extract_r_code(markdown_path.read_text(encoding="utf-8"))
+        if code.strip():
+            jobs.append(RenderJob(markdown_path.stem, code, script_digest(code), target))
+    return jobs
+
+
+def _pick_figure(work_dir: Path) -> Path | None:
+    figures = sorted(
+        (path for path in work_dir.rglob("*.*") if path.is_file() and path.suffix.lower() in _FIGURE_SUFFIXES),
+        key=lambda path: (path.name.startswith(_DEVICE_PREFIX), path.stat().st_mtime_ns, path.name),
+    )
+    # 设备输出按页编号，取第一页
+    return figures[0] if figures else None
+
+
+def publish_figure(figure: Path, target: Path) -> bool:
+    """
+    以原子替换的方式写入图库；格式与目标扩展名不同时用 Pillow 转换。内容未变化时不改写，返回是否写入。
+    """
+    if figure.suffix.lower() == target.suffix.lower():
+        data = figure.read_bytes()
+    else:
+        try:
+            from PIL import Image
+        except ImportError:
+            raise RuntimeError(f"Pillow is required to convert {figure.suffix} to {target.suffix}") from None
+        with Image.open(figure) as image:
+            converted = figure.with_name(f"{figure.stem}.convert{target.suffix}")
+            image.convert("RGB" if target.suffix.lower() in (".jpg", ".jpeg") else image.mode).save(converted)
+        data = converted.read_bytes()
+        converted.unlink()
+
+    if target.is_file() and target.read_bytes() == data:
+        return False
+    # .tmp 后缀不会被图片索引收录
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(target)
+    return True
+
+
+class RScriptRunner:
+    def __init__(
+        self,
+        cache_dir: Path,
+        workers: int = 2,
+        timeout: float = 300.0,
+        rscript: str = "Rscript",
+        figure_size: tuple[int, int, int] = (2400, 1800, 300),
+    ):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.rscript = rscript
+        self.figure_size = figure_size
+
+    def _cached_figure(self, job: RenderJob) -> Path | None:
+        output_dir = self.cache_dir / job.digest
+        try:
+            result = json.loads((output_dir / "result.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        figure = output_dir / result.get("figure", "")
+        return figure if result.get("status") == "ok" and figure.is_file() else None
+
+    def run_all(
+        self,
+        jobs: list[RenderJob],
+        force: bool = False,
+        on_result: Callable[[RenderResult], None] | None = None,
+    ) -> list[RenderResult]:
+        queued_at = time.perf_counter()
+
+        def run(job: RenderJob) -> RenderResult:
+            result = self.run(job, force=force, queued_at=queued_at)
+            if on_result:
+                on_result(result)
+            return result
+
+        # 每个线程只负责等待一个 Rscript 子进程，线程数即同时运行的 R 进程上限
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="rscript") as executor:
+            return list(executor.map(run, jobs))
+
+    def run(self, job: RenderJob, force: bool = False, queued_at: float | None = None) -> RenderResult:
+        started_at = time.perf_counter()
+        wait_seconds = started_at - queued_at if queued_at is not None else 0.0
+
+        cached = None if force else self._cached_figure(job)
+        if cached is not None:
+            published = publish_figure(cached, job.target)
+            return RenderResult(job.name, job.digest, "cached", wait_seconds, 0.0, cached.as_posix(), published)
+
+        work_root = self.cache_dir / ".work"
+        work_root.mkdir(parents=True, exist_ok=True)
+        work_dir = Path(tempfile.mkdtemp(prefix=f"{job.digest}-", dir=work_root))
+        try:
+            status, message, figure = self._execute(job, work_dir)
+            run_seconds = time.perf_counter() - started_at
+            output_dir = self.cache_dir / job.digest
+            output_dir.mkdir(parents=True, exist_ok=True)
+            (output_dir / "run.log").write_text(message, encoding="utf-8")
+            if figure is None:
+                return RenderResult(job.name, job.digest, status, wait_seconds, run_seconds, message=message[-_LOG_TAIL:])
+
+            cached = output_dir / f"figure{figure.suffix.lower()}"
+            shutil.copyfile(figure, cached)
+            (output_dir / "script.R").write_text(job.code, encoding="utf-8")
+            (output_dir / "result.json").write_text(
+                json.dumps({"status": "ok", "name": job.name, "figure": cached.name, "seconds": run_seconds}),
+                encoding="utf-8",
+            )
+            published = publish_figure(cached, job.target)
+            return RenderResult(job.name, job.digest, "ok", wait_seconds, run_seconds, cached.as_posix(), published)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _execute(self, job: RenderJob, work_dir: Path) -> tuple[str, str, Path | None]:
+        width, height, dpi = self.figure_size
+        script = _R_PRELUDE.format(prefix=_DEVICE_PREFIX, width=width, height=height, dpi=dpi) + job.code + _R_EPILOGUE
+        (work_dir / "script.R").write_text(script, encoding="utf-8")
+        env = {
+            **os.environ,
+            # 并发作业之间不再各自开启多线程 BLAS
+            "OMP_NUM_THREADS": "1",
+            "OPENBLAS_NUM_THREADS": "1",
+            "TMPDIR": work_dir.as_posix(),
+        }
+        process = subprocess.Popen(
+            [self.rscript, "script.R"],
+            cwd=work_dir,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            # 独立进程组，超时时连同 R 启动的子进程一起终止
+            start_new_session=True,
+        )
+        try:
+            output, _ = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+            output, _ = process.communicate()
+            return "timeout", f"{output}\nTimed out after {self.timeout:g}s", None
+
+        if process.returncode != 0:
+            return "failed", f"{output}\nRscript exited with status {process.returncode}", None
+        figure = _pick_figure(work_dir)
+        if figure is None:
+            return "no-figure", f"{output}\nThe script did not produce a figure", None
+        return "ok", output, figure
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", help="只运行这些图片名对应的脚本")
+    parser.add_argument("--workers", type=int, default=AppConfig.r_render_workers)
+    parser.add_argument("--timeout", type=float, default=AppConfig.r_render_timeout)
+    parser.add_argument("--rscript", default=AppConfig.rscript_path)
+    parser.add_argument("--force", action="store_true", help="忽略缓存重新运行")
+    args = parser.parse_args(argv)
+
+    if shutil.which(args.rscript) is None:
+        print(f"{args.rscript} not found; install R or pass --rscript")
+        return 1
+
+    jobs = collect_jobs(names=set(args.names) or None)
+    runner = RScriptRunner(
+        Path(AppConfig.r_render_cache_dir),
+        workers=args.workers,
+        timeout=args.timeout,
+        rscript=args.rscript,
+        figure_size=AppConfig.r_figure_size,
+    )
+
+    def report(result: RenderResult):
+        print(
+            f"{result.status:<9} {result.run_seconds:>7.1f}s (waited {result.wait_seconds:.1f}s)"
+            f"{'  updated' if result.published else ''}  {result.name}"
+        )
+        if result.message and result.status != "ok":
+            print("    " + result.message.strip().splitlines()[-1])
+
+    start = time.perf_counter()
+    results = runner.run_all(jobs, force=args.force, on_result=report)
+    published = [job.target for job, result in zip(jobs, results) if result.published]
+    for target in published:
+        build_derivatives(target)
+
+    if published:
+        # 写回索引与启动清单；正在运行的服务会由目录轮询自行发现这些变化
+        from app import IMAGE_INDEX
+
+        IMAGE_INDEX.refresh(force=True)
+
+    counts: dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "no scripts"
+    print(f"Done in {time.perf_counter() - start:.1f}s: {summary}; {len(published)} figure(s) updated")
+    return 0 if all(result.status in ("ok", "cached") for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,107 @@
+"""
+站内搜索：内存倒排索引，英文 / 数字按词切分，中文按相邻二元组（bigram）切分；
+文档同时收录单个汉字，单字查询也能命中。
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[㐀-鿿豈-﫿]+")
+_CJK_PATTERN = re.compile(r"[㐀-鿿豈-﫿]")
+
+
+def tokenize(text: str, unigrams: bool = False) -> list[str]:
+    """
+    中文连续片段切分为二元组，单个汉字保留为一元词，例如 "火山图" -> ["火山", "山图"]；
+    unigrams 时（建索引）额外收录片段中的每个汉字，例如 "火山图" -> ["火山", "山图", "火", "山", "图"]。
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if not _CJK_PATTERN.match(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+            if unigrams:
+                tokens.extend(run)
+    return tokens
+
+
+class SearchIndex:
+    def __init__(self):
+        # token -> {文档 id: 加权词频}
+        self._postings: dict[str, dict[str, float]] = defaultdict(dict)
+        # 文档 id -> (签名, 该文档包含的 token)，签名未变化时跳过重建
+        self._documents: dict[str, tuple[object, tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def doc_ids(self) -> set[str]:
+        with self._lock:
+            return set(self._documents)
+
+    def signature(self, doc_id: str):
+        document = self._documents.get(doc_id)
+        return document[0] if document else None
+
+    def add(self, doc_id: str, fields: list[tuple[str, float]], signature=None):
+        """
+        fields 为 (文本, 权重) 列表；同一文档重复添加时先移除旧的倒排项。
+        """
+        weights: Counter = Counter()
+        for text, weight in fields:
+            for token in tokenize(text, unigrams=True):
+                weights[token] += weight
+
+        with self._lock:
+            self._remove_locked(doc_id)
+            for token, weight in weights.items():
+                self._postings[token][doc_id] = weight
+            self._documents[doc_id] = (signature, tuple(weights))
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str):
+        document = self._documents.pop(doc_id, None)
+        if not document:
+            return
+        for token in document[1]:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+
+    def search(self, query: str, limit: int = 50) -> list[tuple[str, float]]:
+        """
+        TF-IDF 打分，命中全部查询词的文档额外加权，按得分降序返回 (文档 id, 得分)。
+        """
+        query_tokens = set(tokenize(query))
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            total_documents = len(self._documents) or 1
+            scores: dict[str, float] = defaultdict(float)
+            matched_tokens: Counter = Counter()
+            for token in query_tokens:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + total_documents / len(postings))
+                for doc_id, weight in postings.items():
+                    scores[doc_id] += (1 + math.log(weight)) * idf if weight >= 1 else weight * idf
+                    matched_tokens[doc_id] += 1
+
+        ranked = sorted(
+            ((doc_id, score * (1 + matched_tokens[doc_id] / len(query_tokens))) for doc_id, score in scores.items()),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return ranked[:limit]
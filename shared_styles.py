@@ -0,0 +1,60 @@
+"""
+共享样式：把每张卡片 / 幻灯片上重复的内联样式改为 CSS 类，回调响应中只保留类名；
+样式表由同一份样式字典生成，通过带内容哈希的 URL 提供，可被浏览器长期缓存。
+"""
+import hashlib
+import re
+from functools import cached_property
+
+# 不需要补 px 的数值型样式属性（与 React 的处理保持一致）
+_UNITLESS_STYLES = {"fontWeight", "zIndex", "flex", "flexGrow", "flexShrink", "opacity", "lineHeight", "order"}
+_CAMEL_CASE_PATTERN = re.compile(r"(?<!^)([A-Z])")
+
+SHARED_STYLES_URL_PREFIX = "/styles"
+
+
+def style_to_css(style: dict | None) -> str:
+    """
+    React 风格的样式字典 -> CSS 声明文本，例如 {"fontSize": 13} -> "font-size: 13px"。
+    """
+    declarations = []
+    for name, value in (style or {}).items():
+        if value is None:
+            continue
+        css_name = name if name.startswith("--") else _CAMEL_CASE_PATTERN.sub(r"-\1", name).lower()
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and name not in _UNITLESS_STYLES:
+            value = f"{value}px"
+        declarations.append(f"{css_name}: {value}")
+    return "; ".join(declarations)
+
+
+class SharedStyles:
+    def __init__(self, styles: dict[str, dict], enabled: bool = True):
+        self.styles = styles
+        self.enabled = enabled
+
+    def props(self, class_name: str, extra_class: str | None = None, style: dict | None = None) -> dict:
+        """
+        返回组件的 className / style 参数：启用时输出类名，未启用时展开为内联样式；
+        style 为每个组件各不相同的样式，始终内联并覆盖共享样式。
+        """
+        if self.enabled:
+            classes = f"{class_name} {extra_class}" if extra_class else class_name
+            return {"className": classes, "style": style} if style else {"className": classes}
+
+        props = {"style": {**self.styles[class_name], **(style or {})}}
+        if extra_class:
+            props["className"] = extra_class
+        return props
+
+    @cached_property
+    def css(self) -> str:
+        return "".join(f".{name} {{ {style_to_css(style)} }}\n" for name, style in self.styles.items())
+
+    @cached_property
+    def digest(self) -> str:
+        return hashlib.blake2b(self.css.encode("utf-8"), digest_size=8).hexdigest()
+
+    @property
+    def url(self) -> str:
+        return f"{SHARED_STYLES_URL_PREFIX}/shared-{self.digest}.css"
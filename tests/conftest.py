@@ -0,0 +1,17 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# app 中的图片目录、配置文件等均为相对仓库根目录的路径
+REPO_DIR = Path(__file__).resolve().parent.parent
+os.chdir(REPO_DIR)
+sys.path.insert(0, str(REPO_DIR))
+
+
+@pytest.fixture
+def client():
+    import app
+
+    return app.app.server.test_client()
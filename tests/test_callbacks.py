@@ -0,0 +1,44 @@
+import app
+
+
+def _callbacks():
+    # (输出, 输入, 是否为 clientside 回调)
+    for callback in app.app._callback_list:
+        inputs = {f"{item['id']}.{item['property']}" for item in callback["inputs"]}
+        yield callback["output"], inputs, "clientside_function" in callback
+
+
+def test_route_callback_only_updates_title_and_content():
+    outputs = [output for output, inputs, _ in _callbacks() if "url.pathname" in inputs]
+    assert outputs == ["..page-title.children...page-content.children.."]
+
+
+def test_theme_and_language_switches_stay_in_the_browser():
+    for output, inputs, clientside in _callbacks():
+        if inputs & {"theme-preference.data", "theme-toggle-btn.nClicks"}:
+            assert clientside, output
+            assert "page-content" not in output
+        if inputs & {"lang-preference.data", "lang-toggle-btn.nClicks"} and "url.pathname" not in inputs:
+            assert clientside, output
+
+
+def test_route_payload_uses_theme_variables(client):
+    response = client.post(
+        "/_dash-update-component",
+        json={
+            "output": "..page-title.children...page-content.children..",
+            "outputs": [
+                {"id": "page-title", "property": "children"},
+                {"id": "page-content", "property": "children"},
+            ],
+            "inputs": [
+                {"id": "url", "property": "pathname", "value": "/"},
+                {"id": "url", "property": "search", "value": ""},
+                {"id": "lang-preference", "property": "data", "value": "zh"},
+            ],
+            "changedPropIds": ["url.pathname"],
+        },
+    )
+    assert response.status_code == 200
+    # 颜色取自 app-root 上的 CSS 变量，切换主题无需重新渲染页面
+    assert "var(--idvti-" in response.get_data(as_text=True)
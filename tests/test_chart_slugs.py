@@ -0,0 +1,46 @@
+from image_index import ImageEntry
+
+import app
+
+
+def _entry(path: str, sort_key: int, first_seen: int = 1, content: str = "0") -> ImageEntry:
+    return ImageEntry(
+        path=path,
+        size=1,
+        mtime_ns=1,
+        hash=content * 16,
+        sort_key=sort_key,
+        category="other",
+        first_seen=first_seen,
+    )
+
+
+def test_existing_slug_survives_a_second_image_with_the_same_number():
+    original = _entry("imgs/chart_45.png", 45)
+    slugs, _ = app._build_slug_index((original,))
+    assert slugs[original.path] == "45"
+
+    # 后收录的图片排序上在前（路径更小），也不能抢走已有图片的地址
+    newcomer = _entry("imgs/a_chart_45.png", 45, first_seen=2, content="1")
+    slugs, index = app._build_slug_index((newcomer, original))
+    assert slugs[original.path] == "45"
+    assert slugs[newcomer.path].startswith("45-")
+    assert index["45"] == original.path
+    assert index[slugs[newcomer.path]] == newcomer.path
+
+
+def test_unnumbered_slug_follows_the_filename_not_the_content():
+    before = _entry("imgs/profile_photo.jpg", app._UNNUMBERED_SORT_KEY, content="a")
+    after = _entry("imgs/profile_photo.jpg", app._UNNUMBERED_SORT_KEY, content="b")
+    assert app._build_slug_index((before,))[0][before.path] == "profile-photo"
+    assert app._build_slug_index((after,))[0][after.path] == "profile-photo"
+
+
+def test_removed_first_image_keeps_later_slug_resolvable():
+    original = _entry("imgs/chart_45.png", 45)
+    newcomer = _entry("imgs/chart_45_v2.png", 45, first_seen=2, content="1")
+    old_slug = app._build_slug_index((original, newcomer))[0][newcomer.path]
+
+    slugs, index = app._build_slug_index((newcomer,))
+    assert slugs[newcomer.path] == "45"
+    assert index[old_slug] == newcomer.path
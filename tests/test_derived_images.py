@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+import image_pipeline
+from config import AppConfig
+
+
+@pytest.fixture
+def derived_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_pipeline, "DERIVED_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def gallery_image():
+    import app
+
+    return app.GALLERY.images[0]
+
+
+def test_derivative_url_serves_an_image(derived_dir, client, gallery_image):
+    assert image_pipeline.build_derivatives(gallery_image)
+    url = image_pipeline.image_url(gallery_image, "thumb")
+    assert url.startswith(f"{image_pipeline.DERIVED_URL_PREFIX}/")
+
+    response = client.get(url, headers={"Accept": "image/avif,image/webp,*/*"})
+    assert response.status_code == 200
+    assert response.mimetype in ("image/avif", "image/webp")
+    assert "Accept" in response.headers["Vary"]
+
+
+@pytest.mark.parametrize(
+    ("formats", "accept", "expected"),
+    [
+        (("avif", "webp"), "image/avif,image/webp,*/*", "image/avif"),
+        (("avif", "webp"), "image/webp,*/*", "image/webp"),
+        (("avif",), "image/webp,*/*", None),
+        (("webp",), "image/png,image/*;q=0.8", None),
+    ],
+)
+def test_derivative_negotiates_existing_variants(derived_dir, client, gallery_image, monkeypatch, formats, accept, expected):
+    monkeypatch.setattr(image_pipeline, "_supported_formats", lambda: formats)
+    assert image_pipeline.build_derivatives(gallery_image)
+
+    response = client.get(image_pipeline.image_url(gallery_image, "thumb"), headers={"Accept": accept})
+    assert response.status_code == 200
+    # 没有可接受的衍生版本时回退到原图
+    assert response.mimetype == (expected or image_pipeline._guess_mimetype(Path(gallery_image)))
+    response.close()
+
+
+def test_unknown_derivative_is_not_found(derived_dir, client):
+    rendition = next(iter(AppConfig.image_renditions))
+    assert client.get(f"{image_pipeline.DERIVED_URL_PREFIX}/{'0' * 16}-{rendition}").status_code == 404
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from mapping_config import MappingConfig, validate_mapping
+
+
+@pytest.mark.parametrize(
+    "data, error",
+    [
+        ({"default_category": ["other"]}, "default_category: expected a string"),
+        ({"image_category_map": {"foo": ["bar"]}}, "image_category_map['foo']: expected a string"),
+        ({"image_category_map": {"foo": {"key": "bar"}}}, "image_category_map['foo']: expected a string"),
+    ],
+)
+def test_non_string_category_is_a_validation_error(data, error):
+    assert validate_mapping(data) == [error]
+
+
+def test_invalid_file_keeps_previous_snapshot_and_is_retried(tmp_path, monkeypatch):
+    path = tmp_path / "image_mapping.json"
+    path.write_text(json.dumps({"image_category_map": {"foo": "missing"}}), encoding="utf-8")
+    config = MappingConfig(path)
+    config.refresh()
+    assert config.errors == ("image_category_map['foo']: unknown category 'missing'",)
+
+    path.write_text(json.dumps({"default_category": ["other"]}), encoding="utf-8")
+    assert config.refresh() is False
+    assert config.errors == ("default_category: expected a string",)
+    assert config.snapshot.version == 0
+
+    # 读取过程中的意外异常不会中断调用方，且同一 mtime 下次仍会重新读取
+    path.write_text(json.dumps({"default_category": "other"}), encoding="utf-8")
+    monkeypatch.setattr(config, "_read", lambda: 1 / 0)
+    assert config.refresh() is False
+    assert config.errors[0].startswith("$: cannot load")
+    monkeypatch.undo()
+    config.refresh()
+    assert config.errors == ()
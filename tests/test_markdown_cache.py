@@ -0,0 +1,10 @@
+from markdown_cache import render_markdown
+
+
+def test_inline_code_is_left_verbatim():
+    assert render_markdown("`x <- a<b` and <b>x</b>") == "`x <- a<b` and &lt;b>x&lt;/b>"
+
+
+def test_unterminated_backtick_does_not_hide_tags():
+    assert render_markdown("one ` <b>\n\n<i> `") == "one ` &lt;b>\n\n&lt;i> `"
+    assert render_markdown("\\`<script>`") == "\\`&lt;script>`"
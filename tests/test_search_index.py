@@ -0,0 +1,32 @@
+import os
+
+from search_index import SearchIndex, tokenize
+
+import app
+
+
+def test_single_cjk_character_matches_indexed_runs():
+    index = SearchIndex()
+    index.add("tree", [("系统发育树", 1.0)])
+    index.add("volcano", [("火山图", 1.0)])
+    assert [doc_id for doc_id, _ in index.search("树")] == ["tree"]
+    # 多字查询仍只按二元组匹配
+    assert tokenize("火山图") == ["火山", "山图"]
+
+
+def test_in_place_markdown_edit_changes_only_script_dependent_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "R_MARKDOWN_DIR", tmp_path)
+    monkeypatch.setattr(app.AppConfig, "markdown_recheck_interval", 0)
+    script = tmp_path / "bar.md"
+    script.write_text("v1", encoding="utf-8")
+    signature = app._markdown_dir_signature()
+    content_version = app._content_version(app.GALLERY)
+
+    dir_mtime = tmp_path.stat().st_mtime_ns
+    script.write_text("v2", encoding="utf-8")
+    stat = script.stat()
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert tmp_path.stat().st_mtime_ns == dir_mtime
+    # 搜索索引与搜索页感知到原地编辑；主页与分类页不展示脚本，缓存不失效
+    assert app._markdown_dir_signature() != signature
+    assert app._content_version(app.GALLERY) == content_version
@@ -0,0 +1,15 @@
+import app
+
+
+def test_current_digest_is_served_immutable(client):
+    response = client.get(app.SHARED_STYLES.url)
+    assert response.status_code == 200
+    assert response.mimetype == "text/css"
+    assert "immutable" in response.headers["Cache-Control"]
+
+
+def test_stale_digest_redirects_to_current_stylesheet(client):
+    response = client.get(f"{app.SHARED_STYLES_URL_PREFIX}/shared-0000000000000000.css")
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith(app.SHARED_STYLES.url)
+    assert "immutable" not in response.headers.get("Cache-Control", "")
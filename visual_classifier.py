@@ -0,0 +1,386 @@
+"""
+按图片内容分类：为图库中的每张图片提取廉价的视觉特征（颜色直方图、边缘方向与直线统计、灰度缩略图向量），
+以文件名已能识别分类的图片为样本做 k 近邻投票，为关键词无法识别的图片给出预测分类。
+
+- 离线批处理，只用 CPU：特征在进程池中提取，按内容哈希缓存在 cache_dir/v<FEATURE_VERSION>/<哈希>.npy，
+  图片未变化时不再解码；相似度与投票对整个图集一次性用 NumPy 矩阵运算完成；
+- 预测结果写入 JSON（按内容哈希索引），服务进程只读取该文件、不依赖 NumPy，
+  分类优先级为：单图覆盖 > 文件名关键词 > 视觉预测（置信度不低于阈值）> 默认分类。
+
+运行：python visual_classifier.py [--workers N] [--neighbors K] [--force] [--dry-run]
+需要 NumPy 与 Pillow。
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from config import AppConfig
+from file_watcher import PollingWatcher
+
+logger = logging.getLogger(__name__)
+
+# 特征定义变化时递增，旧缓存随之失效
+FEATURE_VERSION = 1
+# 预测文件格式版本
+PREDICTIONS_VERSION = 1
+
+# 特征提取前统一缩放到的边长；分块缩略图为 _THUMB_EDGE x _THUMB_EDGE
+_EDGE = 128
+_THUMB_EDGE = 16
+# 各通道量化级数，颜色直方图共 _COLOR_LEVELS³ 个桶
+_COLOR_LEVELS = 4
+_ORIENTATION_BINS = 6
+# 三个通道都高于该值的像素视为背景
+_BACKGROUND_LEVEL = 0.92
+# 灰度梯度幅值高于该值的像素视为边缘
+_EDGE_THRESHOLD = 0.1
+# 同方向边缘像素覆盖超过该比例的行 / 列视为一条贯穿的直线（坐标轴、网格线、柱边）
+_LINE_COVERAGE = 0.5
+
+
+@lru_cache(maxsize=1)
+def _numpy():
+    """
+    NumPy 只在离线提取特征时需要，服务进程读取预测文件时不导入。
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+@lru_cache(maxsize=1)
+def _pillow():
+    """
+    Pillow 同样只在离线提取特征时需要，缺失时返回 None。
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def _normalized(vector):
+    norm = _numpy().linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def extract_features(image_path: str):
+    """
+    返回 float32 特征向量（各特征块分别归一化后拼接，整体再归一化，点积即余弦相似度）；
+    文件无法解码时返回 None。
+    """
+    Image = _pillow()
+    np = _numpy()
+    try:
+        with Image.open(image_path) as source:
+            width, height = source.size
+            source.draft("RGB", (_EDGE * 2, _EDGE * 2))
+            image = source.convert("RGBA")
+    except (OSError, ValueError):
+        return None
+
+    # 透明背景按白色处理，与页面上的观感一致
+    image = Image.alpha_composite(Image.new("RGBA", image.size, "white"), image).convert("RGB")
+    pixels = np.asarray(image.resize((_EDGE, _EDGE), Image.BOX), dtype=np.float32) / 255
+
+    foreground = (pixels < _BACKGROUND_LEVEL).any(axis=2)
+    levels = np.minimum((pixels * _COLOR_LEVELS).astype(np.int64), _COLOR_LEVELS - 1)
+    bins = (levels[..., 0] * _COLOR_LEVELS + levels[..., 1]) * _COLOR_LEVELS + levels[..., 2]
+    color_histogram = np.bincount(bins[foreground], minlength=_COLOR_LEVELS ** 3).astype(np.float32)
+    if foreground.any():
+        color_histogram /= foreground.sum()
+
+    gray = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    gx = np.diff(gray, axis=1)[:-1, :]
+    gy = np.diff(gray, axis=0)[:, :-1]
+    magnitude = np.hypot(gx, gy)
+    edges = magnitude > _EDGE_THRESHOLD
+    orientation = (np.arctan2(gy, gx) % np.pi)[edges]
+    orientation_histogram = np.histogram(
+        orientation, bins=_ORIENTATION_BINS, range=(0, np.pi), weights=magnitude[edges]
+    )[0].astype(np.float32)
+    # 纵向梯度占优的边缘组成横线，横向梯度占优的组成竖线
+    horizontal = edges & (np.abs(gy) > np.abs(gx))
+    vertical = edges & (np.abs(gx) >= np.abs(gy))
+    statistics = np.array(
+        [
+            foreground.mean(),
+            edges.mean(),
+            (horizontal.mean(axis=1) > _LINE_COVERAGE).mean(),
+            (vertical.mean(axis=0) > _LINE_COVERAGE).mean(),
+            (color_histogram > 0.01).mean(),
+            np.clip(np.log(width / height), -1, 1) if width and height else 0.0,
+        ],
+        dtype=np.float32,
+    )
+
+    block = _EDGE // _THUMB_EDGE
+    thumbnail = gray.reshape(_THUMB_EDGE, block, _THUMB_EDGE, block).mean(axis=(1, 3)).ravel()
+    thumbnail = thumbnail - thumbnail.mean()
+
+    blocks = (color_histogram, orientation_histogram, statistics, thumbnail)
+    return _normalized(np.concatenate([_normalized(block) for block in blocks])).astype(np.float32)
+
+
+def compute_features(
+    items: list[tuple[str, str]],
+    cache_dir: Path,
+    workers: int = 4,
+    force: bool = False,
+) -> tuple[object, int]:
+    """
+    items 为 [(图片路径, 内容哈希)]，返回 (特征矩阵, 本次新提取的数量)；无法解码的图片对应全零行。
+    """
+    np = _numpy()
+    version_dir = cache_dir / f"v{FEATURE_VERSION}"
+    features: dict[str, object] = {}
+    pending = []
+    for path, digest in items:
+        cache_path = version_dir / f"{digest}.npy"
+        if not force and digest not in features:
+            try:
+                features[digest] = np.load(cache_path)
+                continue
+            except (OSError, ValueError):
+                pass
+        if digest not in features:
+            features[digest] = None
+            pending.append((path, digest))
+
+    if pending:
+        version_dir.mkdir(parents=True, exist_ok=True)
+        # 解码与缩放占大头，按图片分发到多个进程
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+            extracted = executor.map(extract_features, [path for path, _ in pending], chunksize=8)
+            for (_, digest), vector in zip(pending, extracted):
+                features[digest] = vector
+                if vector is None:
+                    continue
+                tmp_path = version_dir / f".{digest}.{os.getpid()}.tmp.npy"
+                np.save(tmp_path, vector)
+                tmp_path.replace(version_dir / f"{digest}.npy")
+
+    size = next((vector.size for vector in features.values() if vector is not None), 0)
+    matrix = np.zeros((len(items), size), dtype=np.float32)
+    for row, (_, digest) in enumerate(items):
+        if features[digest] is not None:
+            matrix[row] = features[digest]
+    return matrix, len(pending)
+
+
+def knn_predict(
+    features,
+    labels: list[str | None],
+    neighbors: int = 5,
+    min_similarity: float = 0.0,
+) -> tuple[list[str | None], object]:
+    """
+    以已标注的行为样本做相似度加权的 k 近邻投票，返回每一行的 (预测分类, 置信度)；
+    置信度为获胜分类的票数占比，相似度低于 min_similarity 的近邻不参与投票，没有近邻时不做预测。
+    已标注的行不与自身比较（留一法），其预测可用于评估准确率。
+    """
+    np = _numpy()
+    labelled = np.flatnonzero([label is not None for label in labels])
+    classes = sorted({labels[row] for row in labelled})
+    count = len(labels)
+    if len(labelled) < 2 or not count:
+        return [None] * count, np.zeros(count, dtype=np.float32)
+
+    class_index = {category: index for index, category in enumerate(classes)}
+    targets = np.array([class_index[labels[row]] for row in labelled])
+    similarities = features @ features[labelled].T
+    similarities[labelled, np.arange(len(labelled))] = -np.inf
+
+    k = min(neighbors, len(labelled) - 1)
+    nearest = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    weights = np.take_along_axis(similarities, nearest, axis=1)
+    weights = np.where(weights >= max(min_similarity, 0.0), weights, 0.0)
+    votes = np.zeros((count, len(classes)), dtype=np.float32)
+    np.add.at(votes, (np.arange(count)[:, None], targets[nearest]), weights)
+
+    best = votes.argmax(axis=1)
+    totals = votes.sum(axis=1)
+    confidence = np.divide(votes[np.arange(count), best], totals, out=np.zeros(count, dtype=np.float32), where=totals > 0)
+    predictions = [classes[index] if total > 0 else None for index, total in zip(best, totals)]
+    return predictions, confidence
+
+
+def write_predictions(path: Path, rows: list[tuple[str, str, str | None, float]], neighbors: int):
+    """
+    rows 为 [(图片路径, 内容哈希, 预测分类, 置信度)]，以内容哈希为键写出，重命名图片后仍然有效。
+    """
+    predictions = {
+        digest: {"category": category, "confidence": round(float(confidence), 4), "image": image_path}
+        for image_path, digest, category, confidence in rows
+        if category is not None
+    }
+    data = {
+        "version": PREDICTIONS_VERSION,
+        "feature_version": FEATURE_VERSION,
+        "neighbors": neighbors,
+        "predictions": predictions,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+class VisualPredictions:
+    def __init__(
+        self,
+        path: Path,
+        min_confidence: float = 0.6,
+        on_change: Callable[["VisualPredictions"], None] | None = None,
+    ):
+        self.path = path
+        self.min_confidence = min_confidence
+        # on_change(self)，在替换预测结果后调用
+        self.on_change = on_change
+        # 内容哈希 -> 分类 key，只含置信度不低于阈值的预测
+        self.categories: dict[str, str] = {}
+        # 预测结果指纹，参与图片索引的分类规则指纹；没有预测时为空
+        self.fingerprint = ""
+        self._mtime_ns: int | None = None
+        self._reload_lock = threading.Lock()
+        self._watcher = PollingWatcher(
+            lambda polls: self.refresh(), "visual-predictions-watcher", f"visual predictions {path}"
+        )
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def category_for(self, digest: str) -> str | None:
+        return self.categories.get(digest)
+
+    def _read(self) -> dict[str, str] | None:
+        # 文件不存在表示尚未运行过离线分类
+        if not self.path.is_file():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != PREDICTIONS_VERSION:
+                raise ValueError(f"unsupported version {data.get('version')!r}")
+            return {
+                digest: prediction["category"]
+                for digest, prediction in data["predictions"].items()
+                if prediction["confidence"] >= self.min_confidence
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            logger.error("Ignoring invalid visual predictions %s: %s", self.path, exc)
+            return None
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        文件 mtime 未变化时直接返回；否则重新读取，预测结果变化时替换并返回 True。
+        """
+        with self._reload_lock:
+            try:
+                mtime_ns = self.path.stat().st_mtime_ns
+            except OSError:
+                mtime_ns = 0
+            if not force and mtime_ns == self._mtime_ns:
+                return False
+            self._mtime_ns = mtime_ns
+
+            categories = self._read()
+            if categories is None or categories == self.categories:
+                return False
+
+            text = json.dumps(categories, sort_keys=True)
+            self.categories = categories
+            self.fingerprint = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest() if categories else ""
+            if self.on_change:
+                self.on_change(self)
+            return True
+
+    def status(self) -> dict:
+        return {
+            "path": self.path.as_posix(),
+            "predictions": len(self.categories),
+            "min_confidence": self.min_confidence,
+            "fingerprint": self.fingerprint,
+        }
+
+    def start_watching(self, interval: float):
+        self._watcher.start(interval)
+
+    def stop_watching(self):
+        self._watcher.stop()
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=AppConfig.visual_feature_workers)
+    parser.add_argument("--neighbors", type=int, default=AppConfig.visual_neighbors)
+    parser.add_argument("--min-similarity", type=float, default=AppConfig.visual_min_similarity)
+    parser.add_argument("--force", action="store_true", help="忽略特征缓存重新提取")
+    parser.add_argument("--dry-run", action="store_true", help="只打印预测，不写出结果")
+    args = parser.parse_args(argv)
+
+    if _pillow() is None or _numpy() is None:
+        print("NumPy and Pillow are required: pip install numpy pillow")
+        return 1
+
+    from app import IMAGE_INDEX, MAPPING_CONFIG, VISUAL_PREDICTIONS
+    from mapping_config import normalize_text
+
+    entries = IMAGE_INDEX.snapshot.entries
+    mapping = MAPPING_CONFIG.snapshot
+    start = time.perf_counter()
+    features, extracted = compute_features(
+        [(entry.path, entry.hash) for entry in entries],
+        Path(AppConfig.visual_features_cache_dir),
+        workers=args.workers,
+        force=args.force,
+    )
+    print(f"Features: {len(entries)} image(s), {extracted} extracted, {len(entries) - extracted} cached in {time.perf_counter() - start:.1f}s")
+
+    # 单图覆盖与文件名关键词给出的分类作为样本标签
+    labels = [mapping.match(normalize_text(Path(entry.path).stem)) for entry in entries]
+    start = time.perf_counter()
+    predictions, confidence = knn_predict(features, labels, args.neighbors, args.min_similarity)
+    print(f"Classified in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    threshold = VISUAL_PREDICTIONS.min_confidence
+    labelled = [row for row, label in enumerate(labels) if label is not None]
+    # 留一法：只统计会被采用的预测（有足够相似的近邻且置信度达到阈值）
+    accepted = [row for row in labelled if predictions[row] and confidence[row] >= threshold]
+    if labelled:
+        correct = sum(predictions[row] == labels[row] for row in accepted)
+        print(
+            f"Leave-one-out on {len(labelled)} filename-labelled image(s): "
+            f"{len(accepted)} predicted, {correct} correct"
+        )
+
+    for row, entry in enumerate(entries):
+        if labels[row] is None and predictions[row]:
+            marker = "" if confidence[row] >= threshold else "  (below threshold)"
+            print(f"  {predictions[row]:<12} {confidence[row]:.2f}  {Path(entry.path).name}{marker}")
+    unpredicted = sum(label is None and not prediction for label, prediction in zip(labels, predictions))
+    print(f"{unpredicted} unlabelled image(s) have no neighbour above similarity {args.min_similarity:g}")
+
+    if args.dry_run:
+        return 0
+    rows = [(entry.path, entry.hash, predictions[row], confidence[row]) for row, entry in enumerate(entries)]
+    write_predictions(VISUAL_PREDICTIONS.path, rows, args.neighbors)
+    # 重新分类并写回启动清单；正在运行的服务会通过轮询自行载入新结果
+    VISUAL_PREDICTIONS.refresh()
+    print(f"Wrote {VISUAL_PREDICTIONS.path}: {len(VISUAL_PREDICTIONS)} prediction(s) at confidence >= {threshold:g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,8 @@
+"""
+生产环境 WSGI 入口：gunicorn -c gunicorn.conf.py wsgi:server
+
+开发调试仍使用 python app.py（Flask 开发服务器 + debug）。
+"""
+from app import app
+
+server = app.server